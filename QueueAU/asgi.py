@@ -3,6 +3,10 @@ ASGI config for QueueAU project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live queue event stream (/live-queue/events/) is only pushed when served
+through ASGI, e.g. ``uvicorn QueueAU.asgi:application``. Under WSGI it answers
+204 and the displays keep polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -1,3 +1,5 @@
+# Loaded by `celery -A QueueAU worker`, and by web processes only when they submit
+# a job to Celery (user.reports), so processes not using it never import celery.
 from celery import Celery
 import os
 
@@ -35,8 +35,6 @@ INSTALLED_APPS = [
     'core',
     'user',
     'request',
-    'django_celery_results',
-    'django_celery_beat',
 
 ]
 
@@ -134,6 +132,65 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache shared by all worker processes (e.g. redis://localhost:6379/1). Without it
+# each process gets its own LocMem cache: the queue event stream is not served
+# (displays keep polling every second), and cutoff and statistics caches re-check
+# the database to notice changes made in other workers.
+CACHE_URL = os.getenv('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
+
+# Cashier dispatch engine: how often (seconds) each worker pulls tickets issued by other workers
+QUEUE_DISPATCH_SYNC_SECONDS = float(os.getenv('QUEUE_DISPATCH_SYNC_SECONDS', 1.0))
+# ...and how often it re-reads all of today's waiting tickets, for ones committed late
+QUEUE_DISPATCH_RESYNC_SECONDS = float(os.getenv('QUEUE_DISPATCH_RESYNC_SECONDS', 30.0))
+
+# TransactionNF1 is the source of truth. Turn this on to keep dual-writing the legacy
+# Transaction table on every state change; otherwise run `sync_legacy_transactions --repair`.
+LEGACY_TRANSACTION_MIRROR = os.getenv('LEGACY_TRANSACTION_MIRROR', 'False').lower() in ('true', '1', 't')
+
+# Public display snapshots are rebuilt on every queue event, and otherwise once
+# they are older than this (covers changes that are not published as events)
+QUEUE_SNAPSHOT_TTL_MS = int(os.getenv('QUEUE_SNAPSHOT_TTL_MS', 1000))
+
+# Kiosk cutoff checks read a per-day table of CutoffSchedules from the cache
+# (request.cutoff_state), kept for this many seconds. With a shared cache
+# backend a check costs no query. With the default per-process LocMem cache each
+# check also reads one Watermark row to notice schedules changed in another worker;
+# set CACHE_URL to drop that query.
+CUTOFF_STATE_TTL = int(os.getenv('CUTOFF_STATE_TTL', 3600))
+
+# Statistics payload cache (seconds). Periods including today are also dropped on
+# every queue change; closed periods only on cut-offs and at midnight. Without
+# CACHE_URL, other workers notice cut-offs through one Watermark row read.
+STATS_CACHE_LIVE_TTL = int(os.getenv('STATS_CACHE_LIVE_TTL', 30))
+STATS_CACHE_CLOSED_TTL = int(os.getenv('STATS_CACHE_CLOSED_TTL', 6 * 3600))
+
+# Seasonal adjustment of the dashboard forecasts: "none", "day_of_week" or
+# "semester_phase" (weeks since the latest of FORECAST_SEMESTER_STARTS, YYYY-MM-DD)
+FORECAST_SEASONAL_MODEL = os.getenv('FORECAST_SEASONAL_MODEL', 'none')
+FORECAST_SEMESTER_STARTS = [s for s in os.getenv('FORECAST_SEMESTER_STARTS', '').split(',') if s]
+
+# Background PDF reports (user.reports): rendered on REPORT_WORKERS threads per
+# process ("thread"), or on Celery ("celery", needs a running `celery worker`;
+# a broker URL alone is not enough). Rows are rendered in parts of
+# REPORT_ROWS_PER_PART, jobs unfinished after REPORT_TIMEOUT_MINUTES are failed,
+# and finished files are kept for REPORT_RETENTION_HOURS.
+REPORT_RUNNER = os.getenv('REPORT_RUNNER', 'thread')
+if REPORT_RUNNER == 'celery':
+    # Their models import celery, so they are only installed where Celery is used
+    INSTALLED_APPS += ['django_celery_results', 'django_celery_beat']
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+REPORT_ROWS_PER_PART = int(os.getenv('REPORT_ROWS_PER_PART', 500))
+REPORT_TIMEOUT_MINUTES = int(os.getenv('REPORT_TIMEOUT_MINUTES', 30))
+REPORT_RETENTION_HOURS = int(os.getenv('REPORT_RETENTION_HOURS', 24))
+
 
 # SMTP Settings
 
@@ -160,6 +217,28 @@ while True:
     })
     i += 1
 
+# Emails are queued in the outbox (core.outbox) and sent by a worker thread in
+# each web process ("thread"), or by `manage.py run_email_outbox` ("external")
+EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'thread')
+EMAIL_TIMEOUT = 20
+# Messages per account per local day before it is skipped until midnight
+# (Gmail: 500, Google Workspace: 2000)
+EMAIL_DAILY_QUOTA = int(os.getenv('EMAIL_DAILY_QUOTA', 500))
+
+# Background jobs (cutoffs, rollups) run in whichever process holds the job
+# lease: any serving process ("web"), or only `manage.py run_jobs` ("external")
+JOB_RUNNER = os.getenv('JOB_RUNNER', 'web')
+# Processes that serve the site start the job runner and the email outbox worker.
+# Unset, that is guessed from the command line (runserver, gunicorn, uvicorn,
+# daphne, hypercorn, uwsgi); set "true" or "false" to decide, e.g. under another server.
+SERVES_REQUESTS = os.getenv('SERVES_REQUESTS')
+JOB_LEASE_SECONDS = 30
+# The leader's scheduled-cutoff timer notices schedules saved in other processes
+# within this many seconds. Each poll is a cache read with CACHE_URL set; without
+# it, a single-row database read, and only while a cutoff is pending (otherwise
+# new schedules are found by the timer's once-a-minute lookup).
+CUTOFF_TIMER_CHANGE_POLL_SECONDS = int(os.getenv('CUTOFF_TIMER_CHANGE_POLL_SECONDS', 30))
+
 
 RECAPTCHA_SITE_KEY   = config("RECAPTCHA_SITE_KEY", default="sitekey")
 RECAPTCHA_SECRET_KEY = config("RECAPTCHA_SECRET_KEY", default="secretkey")
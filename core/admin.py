@@ -8,6 +8,13 @@ from .models import TransactionNF1
 from .models import Department
 from .models import Course
 from .models import QueueState
+from .models import QueueCounter
+from .models import TransactionRollup
+from .models import Watermark
+from .models import JobLease
+from .models import ReportJob
+from .models import OutboundEmail
+from .models import EmailAccountHealth
 
 # Register your models here.
 
@@ -22,5 +29,10 @@ admin.site.register(TransactionNF1)
 admin.site.register(Department)
 admin.site.register(Course)
 admin.site.register(QueueState)
-
-
+admin.site.register(QueueCounter)
+admin.site.register(TransactionRollup)
+admin.site.register(Watermark)
+admin.site.register(JobLease)
+admin.site.register(ReportJob)
+admin.site.register(OutboundEmail)
+admin.site.register(EmailAccountHealth)
@@ -0,0 +1,174 @@
+"""
+Compatibility projection of TransactionNF1 onto the legacy Transaction table.
+
+TransactionNF1 is the single source of truth. The legacy table is only
+written on the hot paths when settings.LEGACY_TRANSACTION_MIRROR is on;
+otherwise it is materialized on demand by `sync_legacy_transactions`.
+Legacy rows are matched to their NF1 row through Transaction.nf1, never by
+pk or queueNumber.
+"""
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import Guest, NewEnrollee, Student, Transaction, TransactionNF1
+
+
+# Fields copied verbatim from an NF1 row onto its legacy projection
+PROJECTED_FIELDS = [
+    'queueNumber',
+    'transactionType',
+    'transaction_for',
+    'status',
+    'priority',
+    'onHoldCount',
+    'created_at',
+    'reservedBy_id',
+    'student_id',
+    'new_enrollee_id',
+    'guest_id',
+    'course_id',
+    'campus',
+]
+
+
+def mirror_enabled():
+    return getattr(settings, 'LEGACY_TRANSACTION_MIRROR', False)
+
+
+def _projection(nf1):
+    return {field: getattr(nf1, field) for field in PROJECTED_FIELDS}
+
+
+def create_projection(nf1):
+    legacy = Transaction.objects.create(nf1=nf1, **_projection(nf1))
+
+    # created_at is auto_now_add on the legacy model, so copy it with a plain UPDATE
+    Transaction.objects.filter(pk=legacy.pk).update(created_at=nf1.created_at)
+    return legacy
+
+
+def mirror_created(nf1):
+    """Dual-write a freshly issued NF1 transaction when the mirror is enabled."""
+    if not mirror_enabled():
+        return None
+    return create_projection(nf1)
+
+
+def mirror_update(nf1_ids, **changes):
+    """Apply the same column changes to the legacy rows of `nf1_ids` when the mirror is enabled."""
+    if not mirror_enabled():
+        return 0
+    if isinstance(nf1_ids, int):
+        nf1_ids = [nf1_ids]
+    return Transaction.objects.filter(nf1_id__in=nf1_ids).update(**changes)
+
+
+def link_orphans(nf1_qs):
+    """
+    Attach unlinked legacy rows to their NF1 row by queue number, requester and
+    day. Returns the number of rows linked.
+    """
+    linked = 0
+    candidates = {}
+    for nf1 in nf1_qs.filter(legacy__isnull=True).only('id', 'queueNumber', 'created_at', 'student_id', 'new_enrollee_id', 'guest_id'):
+        key = (nf1.queueNumber, nf1.student_id, nf1.new_enrollee_id, nf1.guest_id, nf1.created_at.date())
+        candidates.setdefault(key, []).append(nf1.id)
+
+    if not candidates:
+        return 0
+
+    orphans = Transaction.objects.filter(
+        nf1__isnull=True,
+        queueNumber__in={key[0] for key in candidates},
+    ).only('id', 'queueNumber', 'created_at', 'student_id', 'new_enrollee_id', 'guest_id')
+
+    for legacy in orphans.order_by('created_at'):
+        key = (legacy.queueNumber, legacy.student_id, legacy.new_enrollee_id, legacy.guest_id, legacy.created_at.date())
+        ids = candidates.get(key)
+        if ids:
+            Transaction.objects.filter(pk=legacy.pk).update(nf1_id=ids.pop(0))
+            linked += 1
+
+    return linked
+
+
+def find_drift(nf1_qs):
+    """
+    Compare NF1 rows against their legacy projection.
+    Returns (missing_nf1_ids, drifted) where drifted maps legacy pk -> changed fields.
+    """
+    legacy_rows = {
+        row['nf1_id']: row
+        for row in Transaction.objects.filter(nf1__in=nf1_qs).values('id', 'nf1_id', *PROJECTED_FIELDS)
+    }
+
+    missing = []
+    drifted = {}
+    for row in nf1_qs.values('id', *PROJECTED_FIELDS).iterator():
+        legacy = legacy_rows.get(row['id'])
+        if legacy is None:
+            missing.append(row['id'])
+            continue
+
+        changes = {
+            field: row[field]
+            for field in PROJECTED_FIELDS
+            if legacy[field] != row[field]
+        }
+        if changes:
+            drifted[legacy['id']] = changes
+
+    return missing, drifted
+
+
+def repair_drift(missing, drifted):
+    """Create missing projections and overwrite drifted legacy columns from NF1."""
+    for nf1 in TransactionNF1.objects.filter(pk__in=missing):
+        create_projection(nf1)
+
+    for legacy_id, changes in drifted.items():
+        Transaction.objects.filter(pk=legacy_id).update(**changes)
+
+    return len(missing), len(drifted)
+
+
+def _copy_from(model, key):
+    """UPDATE kwargs copying campus and course_id from the row of `model` that `key` points to."""
+    source = model.objects.filter(pk=OuterRef(key))
+    return {
+        'campus': Subquery(source.values('campus')[:1]),
+        'course_id': Subquery(source.values('course_id')[:1]),
+    }
+
+
+# Where a legacy row takes its campus and course from: its NF1 row, else its requester
+CAMPUS_SOURCES = [
+    ({'nf1__isnull': False}, TransactionNF1, 'nf1_id'),
+    ({'nf1__isnull': True, 'student__isnull': False}, Student, 'student_id'),
+    ({'nf1__isnull': True, 'new_enrollee__isnull': False}, NewEnrollee, 'new_enrollee_id'),
+    ({'nf1__isnull': True, 'guest__isnull': False}, Guest, 'guest_id'),
+]
+
+
+def backfill_campus(batch_size=5000, force=False, log=None):
+    """
+    Fill Transaction.campus and course on rows created before they existed,
+    batch_size rows per UPDATE. Only rows without a campus unless `force`.
+    Returns the number of rows updated.
+    """
+    rows = Transaction.objects.all() if force else Transaction.objects.filter(campus='')
+    bounds = list(rows.order_by('pk').values_list('pk', flat=True)[::batch_size])
+    last = rows.order_by('-pk').values_list('pk', flat=True).first()
+    if last is None:
+        return 0
+
+    updated = 0
+    for i, start in enumerate(bounds):
+        end = bounds[i + 1] if i + 1 < len(bounds) else last + 1
+        batch = rows.filter(pk__gte=start, pk__lt=end)
+        for filters, model, key in CAMPUS_SOURCES:
+            updated += batch.filter(**filters).update(**_copy_from(model, key))
+        if log:
+            log(f"Backfilled rows {start} → {end - 1} ({updated} so far)")
+    return updated
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0083_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('campus', models.CharField(blank=True, default='', max_length=100)),
+                ('priority', models.BooleanField(default=False)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$aGNfdVzKmWH3eFvGOxNppg$RfYUEkbjz0TrxC36f3kGsRZ5sP0eOYxVU4bZUP9mKac=', max_length=128, verbose_name='Password'),
+        ),
+        migrations.AddConstraint(
+            model_name='queuecounter',
+            constraint=models.UniqueConstraint(fields=('day', 'campus', 'priority'), name='unique_queue_counter_lane'),
+        ),
+    ]
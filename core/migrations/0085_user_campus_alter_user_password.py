@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0084_queuecounter_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='campus',
+            field=models.CharField(blank=True, choices=[('Main', 'Main'), ('South', 'South'), ('San Jose', 'San Jose')], default='', max_length=100, verbose_name='Campus'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$VSBQdmmxk9WoP9zsCruMN0$9xQMg4+ZYbOXOEPVf0X9bYkyvWi/DnrGcYvoGZGyes0=', max_length=128, verbose_name='Password'),
+        ),
+    ]
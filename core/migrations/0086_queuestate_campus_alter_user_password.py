@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:35
+
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def reset_queuestate_sequence(apps, schema_editor):
+    # The former singleton row keeps id=1 (campus=""), so move the new
+    # auto-increment past it before per-campus rows are created.
+    QueueState = apps.get_model('core', 'QueueState')
+    connection = schema_editor.connection
+    for sql in connection.ops.sequence_reset_sql(no_style(), [QueueState]):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0085_user_campus_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuestate',
+            name='campus',
+            field=models.CharField(blank=True, default='', max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='queuestate',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.RunPython(reset_queuestate_sequence, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$zD5XIKSXrXhJe5tgut9T7k$4/HSwHbVy29k0+/g2wa6bHAojFYNzcgexBXIZNt2isU=', max_length=128, verbose_name='Password'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0086_queuestate_campus_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='nf1',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='legacy', to='core.transactionnf1'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$CZEgye0j58f8sAIweMlg6Z$OBuYfExa/PvpKO3M4NCb3meaE+pFHHOq2Fb1kgH4LOU=', max_length=128, verbose_name='Password'),
+        ),
+    ]
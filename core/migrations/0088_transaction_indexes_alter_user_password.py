@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0087_transaction_nf1_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$JgKR6k3Y8HTocg7CWDCSiF$pwJxelkw1E/UHuUs2nBvEvZKdFZBnR2/SQVLe77FikI=', max_length=128, verbose_name='Password'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'reservedBy', 'priority', 'created_at'], name='txn_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at'], name='txn_status_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionnf1',
+            index=models.Index(fields=['status', 'reservedBy', 'priority', 'created_at'], name='nf1_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionnf1',
+            index=models.Index(fields=['campus', 'status', 'created_at'], name='nf1_campus_status_day_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0088_transaction_indexes_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Watermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$QheMBgt5bbJcfPVGEOcuv4$LGbyw2+Qs/4HZYgCaLnllSfr69/KTOUc0sptBewviKY=', max_length=128, verbose_name='Password'),
+        ),
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('campus', models.CharField(max_length=100)),
+                ('year_level', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('transaction_for', models.CharField(max_length=20)),
+                ('transactionType', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=50)),
+                ('priority', models.BooleanField(default=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('processing_seconds', models.FloatField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.course')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'campus'], name='rollup_date_campus_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0090_reportjob_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$ALUzSDcttpESr0lMK0e4rN$FVPwFyOe/CCwxRldjkc/zO7PCKl2D+jNrEC5ad4pIZU=', max_length=128, verbose_name='Password'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionnf1',
+            index=models.Index(fields=['reservedBy', 'created_at', 'id'], name='nf1_cashier_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionnf1',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='nf1_student_history_idx'),
+        ),
+    ]
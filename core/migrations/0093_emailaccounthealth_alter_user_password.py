@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0092_outboundemail_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailAccountHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=254, unique=True)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('sent_today', models.PositiveIntegerField(default=0)),
+                ('quota_reached', models.BooleanField(default=False)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('consecutive_failures', models.PositiveSmallIntegerField(default=0)),
+                ('avg_latency_ms', models.FloatField(blank=True, null=True)),
+                ('cooldown_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$8ZHQOTc48pm9HGCFfatBDy$AtzJJrxNBwWx12iJYbEkjjyKc79ic3FxvuTUARDmclE=', max_length=128, verbose_name='Password'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0093_emailaccounthealth_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('holder', models.CharField(max_length=255)),
+                ('expires_at', models.DateTimeField()),
+                ('acquired_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$CTOXMhsuFoxzkQTwiXId2F$llyqcqz0ODDN3HNJXw4HxbqTu9Z74lyriwf6uWgxhbU=', max_length=128, verbose_name='Password'),
+        ),
+    ]
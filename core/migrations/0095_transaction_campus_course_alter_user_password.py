@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0094_joblease_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='campus',
+            field=models.CharField(blank=True, choices=[('Main', 'Main'), ('South', 'South'), ('San Jose', 'San Jose')], default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='legacy_transactions', to='core.course'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$720000$qcwZK1Rjv3EUEiIK5l33hv$7hDin3KH6ArX+A435aDfHyeewb+vRoUXhsdlBlr5fBg=', max_length=128, verbose_name='Password'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['campus', 'status', 'created_at'], name='txn_campus_status_day_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_campus(apps, schema_editor):
+    """
+    Copy campus and course onto legacy rows created before 0095, from the
+    linked NF1 row or else the requester (as core.legacy.backfill_campus does).
+    """
+    Transaction = apps.get_model('core', 'Transaction')
+    sources = [
+        ({'nf1__isnull': False}, apps.get_model('core', 'TransactionNF1'), 'nf1_id'),
+        ({'nf1__isnull': True, 'student__isnull': False}, apps.get_model('core', 'Student'), 'student_id'),
+        ({'nf1__isnull': True, 'new_enrollee__isnull': False}, apps.get_model('core', 'NewEnrollee'), 'new_enrollee_id'),
+        ({'nf1__isnull': True, 'guest__isnull': False}, apps.get_model('core', 'Guest'), 'guest_id'),
+    ]
+
+    rows = Transaction.objects.filter(campus='')
+    bounds = list(rows.order_by('pk').values_list('pk', flat=True)[::BATCH_SIZE])
+    last = rows.order_by('-pk').values_list('pk', flat=True).first()
+    if last is None:
+        return
+
+    for i, start in enumerate(bounds):
+        end = bounds[i + 1] if i + 1 < len(bounds) else last + 1
+        batch = rows.filter(pk__gte=start, pk__lt=end)
+        for filters, model, key in sources:
+            source = model.objects.filter(pk=OuterRef(key))
+            batch.filter(**filters).update(
+                campus=Subquery(source.values('campus')[:1]),
+                course_id=Subquery(source.values('course_id')[:1]),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0095_transaction_campus_course_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_campus, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def normalize_campus(apps, schema_editor):
+    """
+    Merge counters of one campus spelled differently ('SOUTH', 'South') into a
+    single row keyed as QueueCounter.campus_key() does, keeping the highest number.
+    """
+    QueueCounter = apps.get_model('core', 'QueueCounter')
+
+    lanes = {}
+    for counter in QueueCounter.objects.order_by('-last_number', 'pk'):
+        key = (counter.day, (counter.campus or "").strip().casefold(), counter.priority)
+        lanes.setdefault(key, []).append(counter)
+
+    for (day, campus, priority), counters in lanes.items():
+        keep, rest = counters[0], counters[1:]
+        if rest:
+            QueueCounter.objects.filter(pk__in=[c.pk for c in rest]).delete()
+        if keep.campus != campus:
+            QueueCounter.objects.filter(pk=keep.pk).update(campus=campus)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0096_backfill_transaction_campus'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_campus, migrations.RunPython.noop),
+    ]
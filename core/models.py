@@ -1,4 +1,5 @@
-from django.db import models # type: ignore
+from django.db import models, transaction, IntegrityError # type: ignore
+from django.db.models import F
 from django.core.exceptions import ValidationError
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
@@ -26,6 +27,7 @@ class User(models.Model):
     isAdmin = models.BooleanField(default=False)
     isOnline = models.BooleanField(default=False)
     windowNum = models.PositiveSmallIntegerField("Window Number", unique=True)
+    campus = models.CharField("Campus", max_length=100, choices=CAMPUS_CHOICES, blank=True, default="")  # Blank = serves all campuses
 
     process_mode = models.CharField(
         max_length=20,
@@ -137,13 +139,65 @@ class Student(models.Model):
 
 # models.py
 class QueueState(models.Model):
-    id = models.PositiveSmallIntegerField(primary_key=True, default=1)  # Singleton
+    campus = models.CharField(max_length=100, blank=True, default="", unique=True)  # Blank = windows serving all campuses
     position = models.PositiveSmallIntegerField(default=0)  # 0–3 for P,P,S,S cycle
 
+    @classmethod
+    def for_campus(cls, campus):
+        state, _ = cls.objects.get_or_create(campus=campus or "")
+        return state
+
     def advance(self):
         self.position = (self.position + 1) % 4
         self.save()
 
+    def __str__(self):
+        return f"Rotation for {self.campus or 'All'} @ {self.position}"
+
+
+class QueueCounter(models.Model):
+    """
+    Per-day, per-campus, per-lane ticket sequence.
+    Each row hands out P-/S- numbers with one atomic increment.
+    Rows are keyed on campus_key(), as requesters spell campuses differently
+    (Guest defaults to 'SOUTH', students and enrollees to 'South').
+    """
+    day = models.DateField()
+    campus = models.CharField(max_length=100, blank=True, default="")
+    priority = models.BooleanField(default=False)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'campus', 'priority'], name='unique_queue_counter_lane'),
+        ]
+
+    @staticmethod
+    def campus_key(campus):
+        return (campus or "").strip().casefold()
+
+    @classmethod
+    def next_number(cls, day, campus, priority):
+        campus = cls.campus_key(campus)
+        lane = cls.objects.filter(day=day, campus=campus, priority=priority)
+
+        with transaction.atomic():
+            # The UPDATE row lock serializes concurrent kiosks until commit
+            if not lane.update(last_number=F('last_number') + 1):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(day=day, campus=campus, priority=priority, last_number=1)
+                    return 1
+                except IntegrityError:
+                    # Another kiosk created the lane first
+                    lane.update(last_number=F('last_number') + 1)
+
+            return lane.values_list('last_number', flat=True).get()
+
+    def __str__(self):
+        lane = 'P' if self.priority else 'S'
+        return f"{self.day} {self.campus or 'All'} {lane}-{self.last_number:04d}"
+
 
 class Transaction(models.Model):
     class Status(models.TextChoices):
@@ -184,6 +238,13 @@ class Transaction(models.Model):
     new_enrollee = models.ForeignKey(NewEnrollee, null=True, blank=True, on_delete=models.CASCADE, related_name='legacy_transactions')
     guest = models.ForeignKey(Guest, null=True, blank=True, on_delete=models.CASCADE, related_name='legacy_transactions')
 
+    # NF1 row this legacy row projects (TransactionNF1 is the source of truth)
+    nf1 = models.OneToOneField('TransactionNF1', null=True, blank=True, on_delete=models.CASCADE, related_name='legacy')
+
+    # Copied from the requester at creation, as on TransactionNF1, so campus filters need no joins
+    course = models.ForeignKey('Course', on_delete=models.SET_NULL, null=True, blank=True, related_name='legacy_transactions')
+    campus = models.CharField(max_length=100, choices=CAMPUS_CHOICES, blank=True, default='')
+
     def clean(self):
         references = [self.student, self.new_enrollee, self.guest]
         if sum(x is not None for x in references) != 1:
@@ -195,6 +256,16 @@ class Transaction(models.Model):
     def __str__(self):
         return f"Queue {self.queueNumber} - {self.status}"
 
+    class Meta:
+        indexes = [
+            # Cashier lookups: a window's current ticket and the next waiting one per lane
+            models.Index(fields=['status', 'reservedBy', 'priority', 'created_at'], name='txn_dispatch_idx'),
+            # Cutoff jobs: open tickets of a day
+            models.Index(fields=['status', 'created_at'], name='txn_status_day_idx'),
+            # Campus-scoped cutoffs and filters
+            models.Index(fields=['campus', 'status', 'created_at'], name='txn_campus_status_day_idx'),
+        ]
+
 
 class TransactionNF1(models.Model):
     class Status(models.TextChoices):
@@ -265,6 +336,15 @@ class TransactionNF1(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cashier lookups: a window's current ticket and the next waiting one per lane
+            models.Index(fields=['status', 'reservedBy', 'priority', 'created_at'], name='nf1_dispatch_idx'),
+            # Per-campus boards, previews and cutoffs for a day
+            models.Index(fields=['campus', 'status', 'created_at'], name='nf1_campus_status_day_idx'),
+            # Keyset-paginated histories of a cashier / a student, newest first
+            models.Index(fields=['reservedBy', 'created_at', 'id'], name='nf1_cashier_history_idx'),
+            models.Index(fields=['student', 'created_at', 'id'], name='nf1_student_history_idx'),
+        ]
     
 
     @classmethod
@@ -300,7 +380,70 @@ class CutoffSchedule(models.Model):
 
     def __str__(self):
         return f"Cutoff at {self.cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} for {'All' if not self.campus else self.campus}"
-    
+
+
+class TransactionRollup(models.Model):
+    """
+    Pre-aggregated TransactionNF1 counts per local day and hour for the analytics
+    charts. Rows of a day are rebuilt as a whole by core.rollups.
+    """
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()  # Asia/Manila hour of created_at
+    campus = models.CharField(max_length=100)
+    department = models.ForeignKey(Department, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    course = models.ForeignKey(Course, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    year_level = models.PositiveSmallIntegerField(null=True, blank=True)  # Students only
+    transaction_for = models.CharField(max_length=20)
+    transactionType = models.CharField(max_length=100)
+    status = models.CharField(max_length=50)
+    priority = models.BooleanField(default=False)
+
+    count = models.PositiveIntegerField(default=0)
+    processing_seconds = models.FloatField(default=0)  # Sum of updated_at - created_at
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'campus'], name='rollup_date_campus_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02}:00 {self.campus} {self.status} x{self.count}"
+
+
+class Watermark(models.Model):
+    """
+    Progress marker for background jobs: the last local day a job fully covered.
+    updated_at doubles as a change stamp for caches (see request.cutoff_state).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    day = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def get_day(cls, name):
+        return cls.objects.filter(name=name).values_list('day', flat=True).first()
+
+    @classmethod
+    def set_day(cls, name, day):
+        cls.objects.update_or_create(name=name, defaults={'day': day})
+
+    def __str__(self):
+        return f"{self.name} @ {self.day}"
+
+
+class JobLease(models.Model):
+    """
+    Time-limited leadership of a background job group (see request.jobs): only
+    the process whose lease has not expired runs the jobs.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=255)  # host:pid:nonce of the leader
+    expires_at = models.DateTimeField()
+    acquired_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder} until {self.expires_at}"
+
     
 
 import uuid
@@ -319,3 +462,90 @@ class TwoFactorToken(models.Model):
 
     def __str__(self):
         return f"2FA token for {self.user.email} ({self.token})"
+
+
+class ReportJob(models.Model):
+    """A PDF report rendered in the background by user.reports."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)  # Key of user.reports.REPORTS
+    params = models.JSONField(default=dict)
+    requested_by = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='reports/', blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def percent(self):
+        if self.status == self.Status.DONE:
+            return 100
+        return round(self.processed / self.total * 100) if self.total else 0
+
+    def __str__(self):
+        return f"{self.kind} report {self.id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """A message waiting in (or delivered from) the email outbox, see core.outbox."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    to = models.JSONField(default=list)
+    attachments = models.JSONField(default=list, blank=True)  # [{filename, content (base64), mimetype}]
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_via = models.CharField(max_length=254, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
+
+
+class EmailAccountHealth(models.Model):
+    """
+    Sending record of one EMAIL_ACCOUNTS address, shared by every outbox
+    worker (see core.outbox.AccountPool).
+    """
+
+    address = models.CharField(max_length=254, unique=True)
+    day = models.DateField(null=True, blank=True)  # Local day `sent_today` counts
+    sent_today = models.PositiveIntegerField(default=0)
+    quota_reached = models.BooleanField(default=False)  # Provider refused for the rest of `day`
+    successes = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    consecutive_failures = models.PositiveSmallIntegerField(default=0)
+    avg_latency_ms = models.FloatField(null=True, blank=True)  # Moving average of a send
+    cooldown_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.address} ({self.sent_today} sent on {self.day})"
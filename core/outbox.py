@@ -0,0 +1,454 @@
+"""
+Email outbox.
+
+Views never talk to SMTP: enqueue() stores an OutboundEmail and nudges a
+worker once the transaction commits. Workers claim due messages with a
+conditional UPDATE (so several processes can share the outbox) and send them
+through an AccountPool, which keeps one warm SMTP connection per account in
+settings.EMAIL_ACCOUNTS and reuses it for every message of a batch.
+
+Each send picks the healthiest account (see AccountPool.candidates), whose
+record is shared between processes in EmailAccountHealth. An account that hits
+its sending quota or fails to authenticate is rested for a while (until the
+daily reset for a daily quota) and the message moves on to the next account;
+a message no account could take is retried with exponential backoff, and
+given up after MAX_ATTEMPTS. Without EMAIL_ACCOUNTS (development, tests)
+messages go through the default EMAIL_BACKEND, e.g. the locmem or console
+backend.
+
+By default each web process runs a worker thread (EMAIL_OUTBOX_WORKER =
+"thread"); set it to "external" and run `manage.py run_email_outbox` to send
+from a dedicated process instead.
+"""
+
+import base64
+import logging
+import smtplib
+import threading
+import uuid
+from datetime import timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.utils.timezone import localdate, now
+
+from .models import EmailAccountHealth, OutboundEmail
+from .timeutils import day_bounds
+
+logger = logging.getLogger('custom_logger')
+
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+STALE_CLAIM = timedelta(minutes=5)  # A "sending" row older than this belonged to a dead worker
+
+QUOTA_COOLDOWN = timedelta(hours=1)
+AUTH_COOLDOWN = timedelta(minutes=30)
+ERROR_COOLDOWN = timedelta(minutes=1)
+
+# SMTP replies that mean "this account may not send right now", e.g. Gmail's
+# 550 5.4.5 Daily user sending limit exceeded / 421 4.7.0 Try again later.
+# The daily ones keep the account out until the quota resets.
+QUOTA_MARKERS = ('5.4.5', 'limit', 'quota', 'try again later', 'rate')
+DAILY_LIMIT_MARKERS = ('5.4.5', 'daily')
+
+
+def enqueue(subject, body, to_list, attachments=None):
+    """Store a message for delivery. `attachments` is a list of (filename, bytes, mimetype)."""
+    message = OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        to=list(to_list),
+        attachments=[
+            {'filename': filename, 'content': base64.b64encode(content).decode(), 'mimetype': mimetype}
+            for filename, content, mimetype in attachments or []
+        ],
+    )
+    transaction.on_commit(wake)
+    return message
+
+
+# -- accounts -------------------------------------------------------------
+
+
+def _is_quota_error(error):
+    text = str(getattr(error, 'smtp_error', error)).lower()
+    return any(marker in text for marker in QUOTA_MARKERS)
+
+
+def _is_daily_limit(error):
+    text = str(getattr(error, 'smtp_error', error)).lower()
+    return any(marker in text for marker in DAILY_LIMIT_MARKERS)
+
+
+def daily_quota():
+    return getattr(settings, 'EMAIL_DAILY_QUOTA', 500)
+
+
+def address(account):
+    return account['EMAIL_HOST_USER'] or settings.DEFAULT_FROM_EMAIL
+
+
+def _next_reset():
+    """When daily counters start over: the next local midnight."""
+    return day_bounds(localdate())[1]
+
+
+class AccountPool:
+    """
+    Warm SMTP connections per account. How each account is doing (sent today,
+    failures, latency, cool-down) lives in EmailAccountHealth, so every worker
+    process sees the same picture and spreads mail over the same accounts.
+    A pool belongs to one worker thread.
+    """
+
+    DEFAULT = {'EMAIL_HOST_USER': None, 'EMAIL_HOST_PASSWORD': None}
+
+    LATENCY_WEIGHT = 0.2  # Of the newest send in the moving average
+
+    def __init__(self, accounts=None):
+        accounts = settings.EMAIL_ACCOUNTS if accounts is None else accounts
+        self.accounts = list(accounts) or [self.DEFAULT]
+        self.connections = {}
+        EmailAccountHealth.objects.bulk_create(
+            [EmailAccountHealth(address=address(a)) for a in self.accounts],
+            ignore_conflicts=True,
+        )
+
+    def _health(self, account):
+        return EmailAccountHealth.objects.filter(address=address(account))
+
+    def _states(self):
+        return {h.address: h for h in EmailAccountHealth.objects.filter(address__in=[address(a) for a in self.accounts])}
+
+    def candidates(self):
+        """
+        Accounts that may send now, healthiest first: fewest failures in a
+        row, then fewest sent today (which spreads the load), then fastest.
+        Cooling-down accounts and those out of quota for today are left out.
+        """
+        current, today, quota = now(), localdate(), daily_quota()
+        states = self._states()
+
+        def available(account):
+            health = states.get(address(account))
+            if health is None:
+                return True
+            if health.cooldown_until and health.cooldown_until > current:
+                return False
+            return health.day != today or (not health.quota_reached and health.sent_today < quota)
+
+        def rank(account):
+            health = states.get(address(account))
+            if health is None:
+                return (0, 0, 0)
+            sent = health.sent_today if health.day == today else 0
+            return (health.consecutive_failures, sent, health.avg_latency_ms or 0)
+
+        return sorted(filter(available, self.accounts), key=rank)
+
+    def next_available_at(self):
+        """Earliest moment some account may send again."""
+        current, today, quota = now(), localdate(), daily_quota()
+        times = []
+        for health in self._states().values():
+            exhausted = health.day == today and (health.quota_reached or health.sent_today >= quota)
+            ready = _next_reset() if exhausted else current
+            if health.cooldown_until:
+                ready = max(ready, health.cooldown_until)
+            times.append(ready)
+        return min(times, default=current)
+
+    def connection(self, account):
+        key = address(account)
+        if key not in self.connections:
+            if account is self.DEFAULT:
+                connection = get_connection(fail_silently=False)
+            else:
+                connection = get_connection(
+                    host=settings.EMAIL_HOST,
+                    port=settings.EMAIL_PORT,
+                    username=account['EMAIL_HOST_USER'],
+                    password=account['EMAIL_HOST_PASSWORD'],
+                    use_tls=settings.EMAIL_USE_TLS,
+                    timeout=getattr(settings, 'EMAIL_TIMEOUT', 20),
+                    fail_silently=False,
+                )
+            connection.open()
+            self.connections[key] = connection
+        return self.connections[key]
+
+    def drop(self, account):
+        connection = self.connections.pop(address(account), None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def rest(self, account, duration, reason):
+        logger.warning(f"Email account {address(account)} resting for {duration}: {reason}")
+        self.drop(account)
+        self._health(account).update(cooldown_until=now() + duration)
+
+    def exhausted(self, account, reason):
+        """The provider refuses further mail from the account until its daily reset."""
+        logger.warning(f"Email account {address(account)} reached its daily quota: {reason}")
+        self.drop(account)
+        self._health(account).update(
+            day=localdate(), quota_reached=True, cooldown_until=_next_reset()
+        )
+
+    def record_success(self, account, seconds):
+        today, ms = localdate(), seconds * 1000
+        self._health(account).update(
+            # A new local day starts the counter over
+            sent_today=Case(When(day=today, then=F('sent_today') + 1), default=Value(1)),
+            quota_reached=Case(When(day=today, then=F('quota_reached')), default=Value(False)),
+            day=today,
+            successes=F('successes') + 1,
+            consecutive_failures=0,
+            avg_latency_ms=Case(
+                When(avg_latency_ms__isnull=True, then=Value(ms)),
+                default=F('avg_latency_ms') * (1 - self.LATENCY_WEIGHT) + ms * self.LATENCY_WEIGHT,
+                output_field=FloatField(),
+            ),
+            last_success_at=now(),
+        )
+
+    def record_failure(self, account, error):
+        self._health(account).update(
+            failures=F('failures') + 1,
+            consecutive_failures=F('consecutive_failures') + 1,
+            last_error=str(error)[:1000],
+            last_failure_at=now(),
+        )
+
+    def failure_streak(self, account):
+        return self._health(account).values_list('consecutive_failures', flat=True).first() or 0
+
+    def close(self):
+        for account in self.accounts:
+            self.drop(account)
+
+
+def account_health():
+    """Per-account metrics for the admin dashboard."""
+    current, today, quota = now(), localdate(), daily_quota()
+    configured = [address(a) for a in settings.EMAIL_ACCOUNTS] or [address(AccountPool.DEFAULT)]
+    states = {h.address: h for h in EmailAccountHealth.objects.filter(address__in=configured)}
+
+    rows = []
+    for name in configured:
+        health = states.get(name) or EmailAccountHealth(address=name)
+        sent_today = health.sent_today if health.day == today else 0
+        attempts = health.successes + health.failures
+
+        if health.day == today and (health.quota_reached or sent_today >= quota):
+            status = "Quota reached"
+        elif health.cooldown_until and health.cooldown_until > current:
+            status = "Cooling down"
+        elif health.consecutive_failures:
+            status = "Failing"
+        else:
+            status = "OK"
+
+        rows.append({
+            'address': name,
+            'status': status,
+            'sent_today': sent_today,
+            'quota': quota,
+            'success_rate': round(health.successes / attempts * 100, 1) if attempts else None,
+            'avg_latency_ms': round(health.avg_latency_ms) if health.avg_latency_ms is not None else None,
+            'consecutive_failures': health.consecutive_failures,
+            'cooldown_until': health.cooldown_until if status == "Cooling down" else None,
+            'last_error': health.last_error,
+        })
+    return rows
+
+
+def outbox_counts():
+    """Messages per status, e.g. for the admin dashboard."""
+    counts = dict(OutboundEmail.objects.values_list('status').annotate(n=Count('id')))
+    return {status: counts.get(status, 0) for status in OutboundEmail.Status.values}
+
+
+# -- delivery -------------------------------------------------------------
+
+
+def _email(message, account):
+    email = EmailMessage(
+        message.subject,
+        message.body,
+        account['EMAIL_HOST_USER'] or settings.DEFAULT_FROM_EMAIL,
+        message.to,
+    )
+    for attachment in message.attachments:
+        email.attach(attachment['filename'], base64.b64decode(attachment['content']), attachment['mimetype'])
+    return email
+
+
+def claim(limit=BATCH_SIZE):
+    """Mark up to `limit` due messages as ours and return them."""
+    current = now()
+    due = (
+        Q(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=current)
+        | Q(status=OutboundEmail.Status.SENDING, claimed_at__lt=current - STALE_CLAIM)
+    )
+    ids = list(OutboundEmail.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    # Rows another worker claimed in between no longer match `due`
+    OutboundEmail.objects.filter(due, id__in=ids).update(
+        status=OutboundEmail.Status.SENDING, claim_token=token, claimed_at=current
+    )
+    return list(OutboundEmail.objects.filter(claim_token=token, status=OutboundEmail.Status.SENDING).order_by('id'))
+
+
+def _finish(message, **fields):
+    OutboundEmail.objects.filter(pk=message.pk, claim_token=message.claim_token).update(**fields)
+
+
+def _retry(message, error, not_before=None):
+    attempts = message.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        logger.error(f"Giving up on email {message.pk} to {message.to}: {error}")
+        _finish(message, status=OutboundEmail.Status.FAILED, attempts=attempts, last_error=str(error))
+        return
+
+    delay = timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+    _finish(
+        message,
+        status=OutboundEmail.Status.PENDING,
+        attempts=attempts,
+        last_error=str(error),
+        next_attempt_at=max(now() + delay, not_before or now()),
+    )
+
+
+def _error_cooldown(pool, account):
+    """ERROR_COOLDOWN, doubled for every failure in a row (at most QUOTA_COOLDOWN)."""
+    streak = pool.failure_streak(account)
+    return min(ERROR_COOLDOWN * 2 ** max(streak - 1, 0), QUOTA_COOLDOWN)
+
+
+def deliver(message, pool):
+    """Send one claimed message through the first account able to take it."""
+    error = "no email account available"
+
+    for account in pool.candidates():
+        started = monotonic()
+        try:
+            pool.connection(account).send_messages([_email(message, account)])
+        except smtplib.SMTPAuthenticationError as e:
+            pool.record_failure(account, e)
+            pool.rest(account, AUTH_COOLDOWN, e)
+            error = e
+            continue
+        except smtplib.SMTPRecipientsRefused as e:
+            # The message itself is bad; another account will not help
+            _finish(message, status=OutboundEmail.Status.FAILED, attempts=message.attempts + 1, last_error=str(e))
+            return False
+        except smtplib.SMTPResponseException as e:
+            pool.record_failure(account, e)
+            if _is_daily_limit(e):
+                pool.exhausted(account, e)
+            elif _is_quota_error(e):
+                pool.rest(account, QUOTA_COOLDOWN, e)
+            elif e.smtp_code >= 500:
+                _finish(message, status=OutboundEmail.Status.FAILED, attempts=message.attempts + 1, last_error=str(e))
+                return False
+            else:
+                pool.rest(account, _error_cooldown(pool, account), e)
+            error = e
+            continue
+        except (smtplib.SMTPException, OSError) as e:
+            # Dropped or stale connection: reconnect on the next attempt
+            pool.record_failure(account, e)
+            pool.rest(account, _error_cooldown(pool, account), e)
+            error = e
+            continue
+
+        pool.record_success(account, monotonic() - started)
+        _finish(
+            message,
+            status=OutboundEmail.Status.SENT,
+            attempts=message.attempts + 1,
+            sent_via=address(account),
+            sent_at=now(),
+            last_error='',
+        )
+        return True
+
+    _retry(message, error, not_before=pool.next_available_at())
+    return False
+
+
+def deliver_pending(pool, limit=BATCH_SIZE):
+    """Claim and send one batch. Returns (claimed, sent)."""
+    messages = claim(limit)
+    sent = sum(deliver(message, pool) for message in messages)
+    return len(messages), sent
+
+
+# -- in-process worker ----------------------------------------------------
+
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def run_worker(stop=None, poll_seconds=5, idle_seconds=60):
+    """
+    Deliver until `stop` is set: drain the outbox in batches, then wait for a
+    wake-up (or `poll_seconds`, for retries). Connections are closed after
+    `idle_seconds` without mail.
+    """
+    pool = AccountPool()
+    idle_since = monotonic()
+    try:
+        while stop is None or not stop.is_set():
+            close_old_connections()
+            try:
+                claimed, _ = deliver_pending(pool)
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+
+            if claimed:
+                idle_since = monotonic()
+                continue
+
+            if pool.connections and monotonic() - idle_since > idle_seconds:
+                pool.close()
+            _wakeup.wait(poll_seconds)
+            _wakeup.clear()
+    finally:
+        pool.close()
+        close_old_connections()
+
+
+def wake():
+    """Nudge this process's worker, starting it on first use."""
+    global _worker
+    if getattr(settings, 'EMAIL_OUTBOX_WORKER', 'thread') != 'thread':
+        return
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name="email-outbox", daemon=True)
+            _worker.start()
+    notify()
+
+
+def notify():
+    """Interrupt the worker's wait, e.g. to check a stop flag."""
+    _wakeup.set()
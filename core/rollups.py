@@ -0,0 +1,135 @@
+"""
+Daily/hourly rollups of TransactionNF1 for the analytics charts.
+
+A local day is rolled up in one GROUP BY and its TransactionRollup rows are
+replaced as a whole, so rebuilding a day is idempotent. The "transaction_rollup"
+watermark records the last day covered: every day up to it can be read from
+the rollup table, later days (and always today) from TransactionNF1. Jobs that
+change closed days (cutoffs reach up to a week back) call mark_dirty(), which
+moves the watermark back so those days are read live until re-rolled.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour
+from django.utils.timezone import get_current_timezone, localdate
+
+from .models import TransactionNF1, TransactionRollup, Watermark
+from .timeutils import on_day
+
+
+WATERMARK = "transaction_rollup"
+
+# Closed days are re-rolled this far back on every run to pick up late status
+# changes that do not call mark_dirty() (e.g. a cashier completing after midnight)
+REFRESH_DAYS = 2
+
+GROUP_FIELDS = {
+    'campus': 'campus',
+    'course_id': 'course_id',
+    'department_id': 'course__department_id',
+    'year_level': 'student__year_level',
+    'transaction_for': 'transaction_for',
+    'transactionType': 'transactionType',
+    'status': 'status',
+    'priority': 'priority',
+}
+
+
+def processing_time():
+    return ExpressionWrapper(F('updated_at') - F('created_at'), output_field=DurationField())
+
+
+def rollup_day(day):
+    """Rebuild the rollup rows of local `day`. Returns the number of rows written."""
+    rows = (
+        TransactionNF1.objects.filter(**on_day('created_at', day))
+        .order_by()
+        .annotate(hour=ExtractHour('created_at', tzinfo=get_current_timezone()))
+        .values('hour', *GROUP_FIELDS.values())
+        .annotate(count=Count('id'), processing=Sum(processing_time()))
+    )
+
+    rollups = [
+        TransactionRollup(
+            date=day,
+            hour=row['hour'],
+            count=row['count'],
+            processing_seconds=row['processing'].total_seconds() if row['processing'] else 0,
+            **{field: row[source] for field, source in GROUP_FIELDS.items()},
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        TransactionRollup.objects.filter(date=day).delete()
+        TransactionRollup.objects.bulk_create(rollups)
+
+    return len(rollups)
+
+
+def rolled_through():
+    """Last local day fully covered by the rollup table, or None before the first backfill."""
+    return Watermark.get_day(WATERMARK)
+
+
+def mark_dirty(day):
+    """Transactions of closed local `day` changed: read it live until the next refresh re-rolls it."""
+    covered = rolled_through()
+    if covered is not None and day <= covered:
+        Watermark.set_day(WATERMARK, day - timedelta(days=1))
+
+
+def first_transaction_day():
+    first = TransactionNF1.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    return first.astimezone(get_current_timezone()).date() if first else None
+
+
+def rollup_range(start, end, log=None):
+    """
+    Rebuild every day from `start` to `end` (inclusive). The watermark only moves
+    forward when the rebuilt range joins the days already covered.
+    Returns the watermark afterwards.
+    """
+    day = start
+    while day <= end:
+        written = rollup_day(day)
+        if log:
+            log(f"{day}: {written} rollup rows")
+        day += timedelta(days=1)
+
+    covered = rolled_through()
+    if covered is None:
+        first = first_transaction_day()
+        joins = first is None or start <= first
+    else:
+        joins = start <= covered + timedelta(days=1)
+
+    if joins and (covered is None or covered < end):
+        Watermark.set_day(WATERMARK, end)
+        covered = end
+    return covered
+
+
+def refresh_rollups(log=None):
+    """
+    Roll up every closed day not covered yet (the whole history on first run),
+    plus the last REFRESH_DAYS days again. Returns the (start, end) rebuilt, or None.
+    """
+    yesterday = localdate() - timedelta(days=1)
+    covered = rolled_through()
+
+    if covered is None:
+        start = first_transaction_day()
+        if start is None:
+            return None
+    else:
+        start = min(covered + timedelta(days=1), yesterday - timedelta(days=REFRESH_DAYS - 1))
+
+    if start > yesterday:
+        return None
+
+    rollup_range(start, yesterday, log=log)
+    return start, yesterday
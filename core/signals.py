@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent after a queue state change is committed (enqueue, reserve, complete, hold, cancel, cut-off).
+# Receivers get `event` (str) and `campus` (str or None) keyword arguments.
+queue_changed = Signal()
@@ -1,3 +1,325 @@
-from django.test import TestCase
+import smtplib
+from datetime import timedelta
+from unittest import skipIf
 
-# Create your tests here.
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import get_current_timezone, localdate, now
+
+from core import outbox, rollups
+from core.models import EmailAccountHealth, OutboundEmail, Transaction, TransactionNF1, TransactionRollup, User
+from core.timeutils import on_day
+from user.dispatch import DispatchEngine
+
+
+CAMPUSES = ["Main", "South", "San Jose"]
+
+# Django renders priority=True as a bare `WHERE priority`, which PostgreSQL matches
+# against the index column but SQLite does not; lane plans only mean something there
+skip_lanes_on_sqlite = skipIf(connection.vendor == 'sqlite', "SQLite cannot seek on a bare boolean column")
+
+
+class QueueIndexPlanTests(TestCase):
+    """
+    The queue hot paths must be answered from the composite indexes. The table
+    holds a realistic shape (a long served history, a few waiting tickets) and
+    is ANALYZEd, so the planner picks indexes the way it would in production.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cashiers = [
+            User.objects.create(name=f"Cashier {n}", email=f"cashier{n}@example.com", windowNum=n)
+            for n in range(1, 11)
+        ]
+
+        # 30 days of served tickets, then today's open queue
+        served = ["completed"] * 14 + ["cancelled"] * 2 + ["cut_off"] * 3 + ["on_hold"]
+        rows = []
+        for i in range(3000):
+            rows.append((
+                dict(
+                    queueNumber=f"S-{i:04d}",
+                    transactionType="Tuition",
+                    status=served[i % len(served)],
+                    priority=i % 5 == 0,
+                    reservedBy=cls.cashiers[i % 10],
+                ),
+                CAMPUSES[i % 3],
+                now() - timedelta(days=1 + i % 30, minutes=i),
+            ))
+        for i in range(40):
+            rows.append((
+                dict(
+                    queueNumber=f"P-{i:03d}",
+                    transactionType="Tuition",
+                    status="in_process" if i < 3 else "on_queue",
+                    priority=i % 2 == 0,
+                    reservedBy=cls.cashiers[i] if i < 3 else None,
+                ),
+                CAMPUSES[i % 3],
+                now() - timedelta(minutes=i),
+            ))
+
+        TransactionNF1.objects.bulk_create([TransactionNF1(campus=campus, **row) for row, campus, _ in rows])
+        Transaction.objects.bulk_create([Transaction(**row) for row, _, _ in rows])
+
+        # created_at is auto_now_add; spread the rows over their days
+        for model in (TransactionNF1, Transaction):
+            objs = list(model.objects.order_by('pk'))
+            for obj, (_, _, created_at) in zip(objs, rows):
+                obj.created_at = created_at
+            model.objects.bulk_update(objs, ['created_at'], batch_size=500)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan; ask which index would be used
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, *indexes):
+        plan = self.plan(queryset)
+        self.assertTrue(any(index in plan for index in indexes), f"Expected one of {indexes} in plan:\n{plan}")
+
+    def test_dispatch_engine_pull_uses_an_index(self):
+        engine = DispatchEngine()
+        engine._day = localdate()
+        # The engine's own query: today's unreserved waiting tickets, all lanes at once
+        self.assertUsesIndex(
+            engine._ready_queryset().values_list('pk', 'campus', 'priority', 'created_at'),
+            'nf1_dispatch_idx', 'nf1_cashier_history_idx',
+        )
+
+    @skip_lanes_on_sqlite
+    def test_nf1_waiting_lane_uses_dispatch_index(self):
+        # As the public board and the cashier's upcoming list read one lane
+        for priority in (True, False):
+            self.assertUsesIndex(
+                TransactionNF1.objects.filter(
+                    status=TransactionNF1.Status.ON_QUEUE,
+                    reservedBy__isnull=True,
+                    priority=priority,
+                    **on_day('created_at'),
+                ).order_by('created_at'),
+                'nf1_dispatch_idx',
+            )
+
+    def test_nf1_campus_day_uses_campus_index(self):
+        self.assertUsesIndex(
+            TransactionNF1.objects.filter(
+                campus="Main",
+                status__in=[TransactionNF1.Status.ON_QUEUE, TransactionNF1.Status.ON_HOLD],
+                **on_day('created_at'),
+            ),
+            'nf1_campus_status_day_idx',
+        )
+
+    @skip_lanes_on_sqlite
+    def test_legacy_waiting_lane_uses_dispatch_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(
+                status=Transaction.Status.ON_QUEUE,
+                reservedBy__isnull=True,
+                priority=True,
+                **on_day('created_at'),
+            ).order_by('created_at'),
+            'txn_dispatch_idx',
+        )
+
+    def test_legacy_current_ticket_uses_dispatch_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(status=Transaction.Status.IN_PROCESS, reservedBy=self.cashiers[0]),
+            'txn_dispatch_idx',
+        )
+
+    def test_legacy_status_day_uses_status_day_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(
+                status__in=[Transaction.Status.ON_QUEUE, Transaction.Status.ON_HOLD],
+                created_at__gte=now() - timedelta(hours=1),
+                created_at__lt=now() + timedelta(hours=1),
+            ),
+            'txn_status_day_idx',
+        )
+
+
+class FakeConnection:
+    """Stands in for an SMTP connection: records messages, or raises `error`."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.error is not None:
+            raise self.error
+        self.sent.extend(messages)
+        return len(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_WORKER='external',
+    EMAIL_ACCOUNTS=[],
+)
+class EmailOutboxTests(TestCase):
+
+    ACCOUNTS = [
+        {'EMAIL_HOST_USER': 'first@example.com', 'EMAIL_HOST_PASSWORD': 'x'},
+        {'EMAIL_HOST_USER': 'second@example.com', 'EMAIL_HOST_PASSWORD': 'x'},
+    ]
+
+    def enqueue(self, n=1):
+        return [outbox.enqueue(f"Subject {i}", "Body", [f"to{i}@example.com"]) for i in range(n)]
+
+    def test_enqueue_then_deliver_pending_sends_with_attachments(self):
+        message = outbox.enqueue(
+            "Receipt", "See attached.", ["student@example.com"],
+            attachments=[("receipt.pdf", b"%PDF-1.4 data", "application/pdf")],
+        )
+
+        self.assertEqual(outbox.deliver_pending(outbox.AccountPool()), (1, 1))
+
+        self.assertEqual(len(mail.outbox), 1)
+        sent = mail.outbox[0]
+        self.assertEqual(sent.subject, "Receipt")
+        self.assertEqual(sent.to, ["student@example.com"])
+        self.assertEqual(sent.attachments, [("receipt.pdf", b"%PDF-1.4 data", "application/pdf")])
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.SENT)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(outbox.deliver_pending(outbox.AccountPool()), (0, 0))
+
+    def test_claim_never_hands_a_row_to_two_tokens(self):
+        self.enqueue(5)
+
+        first = outbox.claim(3)
+        second = outbox.claim(10)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({m.pk for m in first} & {m.pk for m in second})
+        self.assertNotEqual(first[0].claim_token, second[0].claim_token)
+        self.assertEqual(outbox.claim(10), [])
+
+        # A late _finish from a stale token does not touch the row
+        stale = first[0]
+        OutboundEmail.objects.filter(pk=stale.pk).update(claim_token='other')
+        outbox._finish(stale, status=OutboundEmail.Status.SENT)
+        self.assertEqual(OutboundEmail.objects.get(pk=stale.pk).status, OutboundEmail.Status.SENDING)
+
+    def test_stale_claim_is_taken_over(self):
+        self.enqueue()
+        [message] = outbox.claim()
+        OutboundEmail.objects.filter(pk=message.pk).update(claimed_at=now() - outbox.STALE_CLAIM - timedelta(seconds=1))
+
+        [again] = outbox.claim()
+        self.assertEqual(again.pk, message.pk)
+        self.assertNotEqual(again.claim_token, message.claim_token)
+
+    def test_daily_limit_exhausts_account_and_moves_on(self):
+        pool = outbox.AccountPool(self.ACCOUNTS)
+        limited = FakeConnection(smtplib.SMTPResponseException(550, '5.4.5 Daily user sending limit exceeded'))
+        healthy = FakeConnection()
+        pool.connections = {'first@example.com': limited, 'second@example.com': healthy}
+
+        self.enqueue()
+        [message] = outbox.claim()
+        self.assertTrue(outbox.deliver(message, pool))
+
+        self.assertEqual(len(healthy.sent), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.SENT)
+        self.assertEqual(message.sent_via, 'second@example.com')
+
+        first = EmailAccountHealth.objects.get(address='first@example.com')
+        self.assertTrue(first.quota_reached)
+        self.assertEqual(first.day, localdate())
+        self.assertGreater(first.cooldown_until, now())
+        self.assertEqual(first.consecutive_failures, 1)
+        self.assertEqual([outbox.address(a) for a in pool.candidates()], ['second@example.com'])
+
+    def test_retry_backs_off_then_fails_at_max_attempts(self):
+        self.enqueue()
+        [message] = outbox.claim()
+
+        before = now()
+        outbox._retry(message, "temporary failure")
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=outbox.RETRY_BASE_SECONDS))
+
+        OutboundEmail.objects.filter(pk=message.pk).update(next_attempt_at=now())
+        [message] = outbox.claim()
+        before = now()
+        outbox._retry(message, "temporary failure")
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 2)
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=2 * outbox.RETRY_BASE_SECONDS))
+
+        OutboundEmail.objects.filter(pk=message.pk).update(
+            attempts=outbox.MAX_ATTEMPTS - 1, next_attempt_at=now()
+        )
+        [message] = outbox.claim()
+        outbox._retry(message, "still failing")
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(message.attempts, outbox.MAX_ATTEMPTS)
+        self.assertEqual(outbox.claim(), [])
+
+
+class RollupRefreshTests(TestCase):
+
+    def test_cutoff_of_a_closed_day_is_rolled_up_again(self):
+        day = localdate() - timedelta(days=4)
+        txn = TransactionNF1.objects.create(queueNumber="S-001", transactionType="Tuition", campus="Main")
+        TransactionNF1.objects.filter(pk=txn.pk).update(created_at=now() - timedelta(days=4))
+        rollups.refresh_rollups()
+        self.assertEqual(rollups.rolled_through(), localdate() - timedelta(days=1))
+
+        TransactionNF1.objects.filter(pk=txn.pk).update(status=TransactionNF1.Status.CUT_OFF)
+        rollups.mark_dirty(day)
+        self.assertEqual(rollups.rolled_through(), day - timedelta(days=1))
+        rollups.mark_dirty(localdate())  # Open day: nothing rolled up to move back
+        self.assertEqual(rollups.rolled_through(), day - timedelta(days=1))
+
+        rollups.refresh_rollups()
+        self.assertEqual(rollups.rolled_through(), localdate() - timedelta(days=1))
+        self.assertEqual(
+            list(TransactionRollup.objects.filter(date=day).values_list('status', flat=True)),
+            [TransactionNF1.Status.CUT_OFF],
+        )
+
+    def test_admin_cutoff_of_a_closed_day_marks_it_dirty(self):
+        day = localdate() - timedelta(days=4)
+        txn = TransactionNF1.objects.create(queueNumber="S-001", transactionType="Tuition", campus="Main")
+        TransactionNF1.objects.filter(pk=txn.pk).update(created_at=now() - timedelta(days=4))
+        rollups.refresh_rollups()
+
+        admin = User.objects.create(name="Admin", email="admin@example.com", windowNum=99, isAdmin=True)
+        session = self.client.session
+        session.update({'user_id': admin.pk, 'is_admin': True})
+        session.save()
+        cutoff_time = (now() - timedelta(days=4)).astimezone(get_current_timezone()).replace(hour=23, minute=59)
+        self.client.post(
+            reverse('admin_queue_settings'),
+            {'campus': 'Main', 'cutoff_time': cutoff_time.strftime('%Y-%m-%dT%H:%M')},
+            HTTP_HOST='localhost',
+        )
+
+        self.assertEqual(TransactionNF1.objects.get().status, TransactionNF1.Status.CUT_OFF)
+        self.assertEqual(rollups.rolled_through(), day - timedelta(days=1))
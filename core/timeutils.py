@@ -0,0 +1,25 @@
+"""
+Local-day helpers.
+
+Filtering with `created_at__date=day` casts the column in SQL and cannot use
+its indexes. These helpers turn an Asia/Manila calendar day into a half-open
+UTC range (start <= t < end) so day filters compare the raw column instead.
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils.timezone import localdate, make_aware
+
+
+def day_bounds(day=None):
+    """Return the (start, end) UTC datetimes of local `day` (default: today)."""
+    day = day or localdate()
+    start = make_aware(datetime.combine(day, time.min))
+    end = make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+
+
+def on_day(field='created_at', day=None):
+    """Filter kwargs matching `field` within local `day`, e.g. `.filter(**on_day())`."""
+    start, end = day_bounds(day)
+    return {f'{field}__gte': start, f'{field}__lt': end}
@@ -1,39 +1,46 @@
 import os
+import sys
 from django.apps import AppConfig
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
 
 from django.utils.timezone import now
 
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 import pytz
 
 MANILA_TZ = pytz.timezone("Asia/Manila")
 
+# Local time the daily hard cutoff closes the day's queue
+HARD_CUTOFF_TIME = time(21, 31)
+HARD_CUTOFF_WATERMARK = "hard_cutoff"
+
+
+def _hard_cutoff_at(day):
+    """UTC moment of the hard cutoff of local `day`."""
+    return MANILA_TZ.localize(datetime.combine(day, HARD_CUTOFF_TIME)).astimezone(pytz.UTC)
+
 
 def process_scheduled_cutoffs():
     """
     Processes all overdue CutoffSchedule entries that have not yet been marked as cutoff.
     Marks associated NF1 and Legacy transactions as CUT_OFF within the same day window.
     """
+    from core import legacy, rollups
     from core.models import CutoffSchedule, TransactionNF1, Transaction
-    from django.db.models import Q
     from django.db import transaction
+    from . import cutoff_state, events
 
     local_now = now().astimezone(MANILA_TZ)
     print(f"[JOB] Started cutoff processing @ {local_now.isoformat()} (Asia/Manila)")
 
     try:
-        overdue = CutoffSchedule.objects.filter(
+        overdue = list(CutoffSchedule.objects.filter(
             is_cutoff=False,
             cutoff_time__lte=local_now.astimezone(pytz.UTC)
-        )
+        ).order_by('cutoff_time'))
 
-        count_overdue = overdue.count()
-        print(f"[JOB] Found {count_overdue} overdue cutoffs to process...")
+        print(f"[JOB] Found {len(overdue)} overdue cutoffs to process...")
 
-        if count_overdue == 0:
+        if not overdue:
             print("[✓] No overdue cutoffs found — job idle.")
             return
 
@@ -62,6 +69,7 @@ def process_scheduled_cutoffs():
                         continue
 
                 print(f"[✓] Marked CutoffSchedule ID {sched.id} as is_cutoff=True ✅")
+                cutoff_state.invalidate(cutoff_time_local.date())
 
                 # Compute cutoff range (day of cutoff)
                 cutoff_start = cutoff_time_local.replace(tzinfo=None)
@@ -87,18 +95,17 @@ def process_scheduled_cutoffs():
 
                 if sched.campus:
                     nf1_qs = nf1_qs.filter(campus=sched.campus)
-                    legacy_qs = legacy_qs.filter(
-                        Q(student__campus=sched.campus)
-                        | Q(new_enrollee__campus=sched.campus)
-                        | Q(guest__campus=sched.campus)
-                    )
+                    legacy_qs = legacy_qs.filter(campus=sched.campus)
 
                 nf1_updated = nf1_qs.update(status=TransactionNF1.Status.CUT_OFF)
-                legacy_updated = legacy_qs.update(status=Transaction.Status.CUT_OFF)
+                legacy_updated = legacy_qs.update(status=Transaction.Status.CUT_OFF) if legacy.mirror_enabled() else 0
 
                 print(
                     f"[→] Transactions updated — NF1: {nf1_updated}, Legacy: {legacy_updated}"
                 )
+                if nf1_updated:
+                    rollups.mark_dirty(cutoff_time_local.date())
+                events.publish(events.CUT_OFF, campus=sched.campus)
 
             except Exception as e:
                 print(f"[❌] Error processing cutoff ID {sched.id}: {e}")
@@ -114,43 +121,72 @@ def process_scheduled_cutoffs():
 
 def process_daily_hard_cutoff(days_back: int = 7):
     """
-    Apply daily hard cutoff at 5PM.
-    If the machine was off, also catch up for the past `days_back` days.
+    Apply the daily hard cutoff (HARD_CUTOFF_TIME, Asia/Manila).
+
+    The "hard_cutoff" Watermark holds the last day whose hard cutoff was
+    applied. A run cuts off everything still queued that was created between
+    that day's cutoff time and the latest cutoff time that has passed, as one
+    range UPDATE per table, then moves the watermark. Tickets issued after a
+    day's cutoff are therefore closed by the next run, whatever the gap, and a
+    run with the watermark already current does nothing. Without a watermark
+    (first run) it starts `days_back` days back.
     """
-    from core.models import TransactionNF1, Transaction
+    from core import legacy, rollups
+    from core.models import TransactionNF1, Transaction, Watermark
+    from core.timeutils import day_bounds
+    from . import events
 
     now_local = now().astimezone(MANILA_TZ)
     print(f"[AUTO] Daily Hard Cutoff started @ {now_local.isoformat()} (Asia/Manila)")
 
     try:
-        for days in range(0, days_back + 1):
-            try:
-                day = now_local.date() - timedelta(days=days)
-                print(f"[AUTO ▶] Processing hard cutoff for {day}")
-
-                nf1_updated = TransactionNF1.objects.filter(
-                    status__in=[
-                        TransactionNF1.Status.ON_QUEUE,
-                        TransactionNF1.Status.ON_HOLD,
-                    ],
-                    created_at__date=day,
-                ).update(status=TransactionNF1.Status.CUT_OFF)
-
-                legacy_updated = Transaction.objects.filter(
-                    status__in=[
-                        Transaction.Status.ON_QUEUE,
-                        Transaction.Status.ON_HOLD,
-                    ],
-                    created_at__date=day,
-                ).update(status=Transaction.Status.CUT_OFF)
-
-                print(
-                    f"[✓ AUTO] Hard Cutoff Applied — Date: {day}, "
-                    f"NF1: {nf1_updated}, Legacy: {legacy_updated}"
-                )
+        # Latest day whose cutoff time has passed
+        closed_day = now_local.date()
+        if now_local.time() < HARD_CUTOFF_TIME:
+            closed_day -= timedelta(days=1)
+
+        watermark = Watermark.get_day(HARD_CUTOFF_WATERMARK)
+        if watermark and watermark >= closed_day:
+            print(f"[✓ AUTO] Hard cutoff already applied through {watermark} — nothing to do.")
+            return
 
-            except Exception as e:
-                print(f"[❌ AUTO] Error applying hard cutoff for {day}: {e}")
+        if watermark:
+            range_start = _hard_cutoff_at(watermark)
+        else:
+            range_start = day_bounds(closed_day - timedelta(days=days_back))[0]
+        range_end = _hard_cutoff_at(closed_day)
+        print(f"[AUTO ▶] Processing hard cutoff for {range_start.astimezone(MANILA_TZ)} → {range_end.astimezone(MANILA_TZ)}")
+
+        nf1_updated = TransactionNF1.objects.filter(
+            status__in=[
+                TransactionNF1.Status.ON_QUEUE,
+                TransactionNF1.Status.ON_HOLD,
+            ],
+            created_at__gte=range_start,
+            created_at__lt=range_end,
+        ).update(status=TransactionNF1.Status.CUT_OFF)
+
+        legacy_updated = 0
+        if legacy.mirror_enabled():
+            legacy_updated = Transaction.objects.filter(
+                status__in=[
+                    Transaction.Status.ON_QUEUE,
+                    Transaction.Status.ON_HOLD,
+                ],
+                created_at__gte=range_start,
+                created_at__lt=range_end,
+            ).update(status=Transaction.Status.CUT_OFF)
+
+        Watermark.set_day(HARD_CUTOFF_WATERMARK, closed_day)
+
+        print(
+            f"[✓ AUTO] Hard Cutoff Applied — Through: {closed_day}, "
+            f"NF1: {nf1_updated}, Legacy: {legacy_updated}"
+        )
+        if nf1_updated:
+            rollups.mark_dirty(range_start.astimezone(MANILA_TZ).date())
+        if nf1_updated or legacy_updated:
+            events.publish(events.CUT_OFF)
 
     except Exception as e:
         print(f"[FATAL AUTO] Unexpected error in daily hard cutoff job: {e}")
@@ -160,42 +196,80 @@ def process_daily_hard_cutoff(days_back: int = 7):
         print(f"[AUTO ✓] Daily Hard Cutoff job completed @ {finished_at.isoformat()}")
 
 
+def refresh_transaction_rollups():
+    """
+    Rolls up closed days into TransactionRollup for the analytics charts.
+    Catches up every day missed since the last run (the full history on first run).
+    """
+    from core.rollups import refresh_rollups
+
+    started = now().astimezone(MANILA_TZ)
+    print(f"[ROLLUP] Refresh started @ {started.isoformat()} (Asia/Manila)")
+
+    try:
+        rebuilt = refresh_rollups()
+        if rebuilt:
+            print(f"[✓ ROLLUP] Rolled up {rebuilt[0]} → {rebuilt[1]}")
+        else:
+            print("[✓ ROLLUP] Nothing to roll up.")
+
+    except Exception as e:
+        print(f"[❌ ROLLUP] Error refreshing rollups: {e}")
+
+
+# WSGI/ASGI servers whose worker processes serve the site
+SERVERS = ("gunicorn", "uvicorn", "daphne", "hypercorn", "uwsgi")
+
+
+def _serves_requests():
+    """
+    True in processes that serve the site: runserver's reloaded child, or a
+    server in SERVERS. False for celery, other manage.py / django-admin
+    commands and anything else, unless settings.SERVES_REQUESTS says otherwise.
+    """
+    from django.conf import settings
+
+    explicit = getattr(settings, 'SERVES_REQUESTS', None)
+    if explicit:
+        return explicit.lower() in ('true', '1', 't')
+
+    path = sys.argv[0] if sys.argv else ""
+    program = os.path.basename(path)
+    if program == "__main__.py":  # python -m gunicorn
+        program = os.path.basename(os.path.dirname(path))
+
+    if program in ("manage.py", "django-admin", "django-admin.py"):
+        if sys.argv[1:2] != ["runserver"]:
+            return False
+        return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+    return program.startswith(SERVERS)
+
+
 class CoreConfig(AppConfig):
     name = 'request'  # your app name
     default_auto_field = 'django.db.models.BigAutoField'
 
     def ready(self):
-        # Prevent duplicate scheduler start under Django's auto-reloader
-        if os.environ.get("RUN_MAIN") != "true":
-            print("[Scheduler] Skipped (not in main runserver thread)")
+        from django.conf import settings
+        from django.db.models.signals import post_delete, post_save
+        from core.models import CutoffSchedule
+        from . import cutoff_state, cutoff_timer
+
+        # New or changed schedules re-arm the cutoff timer and refresh the kiosk's cutoff table
+        post_save.connect(cutoff_timer.on_schedule_saved, sender=CutoffSchedule, dispatch_uid="cutoff_timer_rearm")
+        post_save.connect(cutoff_state.on_schedule_changed, sender=CutoffSchedule, dispatch_uid="cutoff_state_saved")
+        post_delete.connect(cutoff_state.on_schedule_changed, sender=CutoffSchedule, dispatch_uid="cutoff_state_deleted")
+
+        # Only serving processes run jobs (and not the runserver auto-reloader parent)
+        if not _serves_requests():
+            print("[Scheduler] Skipped (not a serving process)")
             return
 
-        print("[Scheduler] Initializing job scheduler...")
-        scheduler = BackgroundScheduler(timezone="Asia/Manila")
-
-        # --- Overdue cutoff trigger (runs every 1 minute)
-        scheduler.add_job(
-            process_scheduled_cutoffs,
-            trigger=IntervalTrigger(minutes=1),
-            id="scheduled_cutoffs",
-            name="Overdue Cutoff Trigger (every 1 minute)",
-            replace_existing=True,
-            misfire_grace_time=60,  # run if missed by ≤ 60 seconds
-        )
-
-        # --- Daily hard cutoff (runs once a day at 21:10)
-        scheduler.add_job(
-            process_daily_hard_cutoff,
-            trigger=CronTrigger(hour=21, minute=31),
-            id="daily_hard_cutoff",
-            name="Daily Hard Cutoff at 15:00",
-            replace_existing=True,
-            kwargs={"days_back": 7},
-            misfire_grace_time=3600,  # run if missed by ≤ 1 hour
-        )
-
-        scheduler.start()
-        print("[Scheduler] Jobs started and active ✅")
-
-
+        # Every serving process competes for the job lease; one leader runs the jobs
+        if getattr(settings, 'JOB_RUNNER', 'web') == 'web':
+            from . import jobs
+            jobs.start()
 
+        # Send whatever was left in the email outbox by the previous run
+        from core import outbox
+        outbox.wake()
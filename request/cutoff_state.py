@@ -0,0 +1,123 @@
+"""
+Today's effective cutoff per campus, for the kiosk's is_campus_cutoff check.
+
+The day's CutoffSchedule rows are read once into a small table in the Django
+cache: {campus or None (all campuses): (cutoff_time, is_cutoff)} holding the
+latest schedule of each. A check is then a dict lookup. Saving or deleting a
+schedule, or marking it as applied, drops the table of its day.
+
+Every invalidation also touches the "cutoff-schedules" Watermark row, whose
+updated_at is a change stamp all processes can read (see version()). With a
+shared cache backend (Redis, Memcached, database) every worker sees the
+invalidations and a check costs no query. The default LocMem cache is per
+process, so there a cached table is only used while the stamp still matches:
+one indexed single-row read per check instead of a table that another worker
+may have made stale.
+
+stamp() is the cheapest change stamp available: a counter in the shared cache,
+or the Watermark row with a per-process cache.
+"""
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.timezone import localdate, now
+
+from core.timeutils import day_bounds
+
+
+KEY_PREFIX = "cutoff-state"
+VERSION_MARKER = "cutoff-schedules"  # Watermark row touched on every change
+STAMP_KEY = f"{KEY_PREFIX}:stamp"    # Counter bumped on every change, when the cache is shared
+
+
+def process_local():
+    return isinstance(caches['default'], LocMemCache)
+
+
+def version():
+    """Change stamp of the cutoff schedules, shared by all processes (None before any change)."""
+    from core.models import Watermark
+
+    return Watermark.objects.filter(name=VERSION_MARKER).values_list('updated_at', flat=True).first()
+
+
+def stamp():
+    """Change stamp of the cutoff schedules; costs no query with a shared cache."""
+    if process_local():
+        return version()
+    return cache.get(STAMP_KEY, 0)
+
+
+def _bump_stamp():
+    try:
+        cache.incr(STAMP_KEY)
+    except ValueError:
+        cache.add(STAMP_KEY, 0, timeout=None)
+        cache.incr(STAMP_KEY)
+
+
+def _key(day):
+    return f"{KEY_PREFIX}:{day.isoformat()}"
+
+
+def _load(day):
+    from core.models import CutoffSchedule
+
+    start, end = day_bounds(day)
+    table = {}
+    schedules = CutoffSchedule.objects.filter(cutoff_time__gte=start, cutoff_time__lt=end)
+    for campus, cutoff_time, is_cutoff in schedules.values_list('campus', 'cutoff_time', 'is_cutoff'):
+        campus = campus or None
+        if campus not in table or cutoff_time > table[campus][0]:
+            table[campus] = (cutoff_time, is_cutoff)
+    return table
+
+
+def table(day=None):
+    """The cutoff table of local `day` (default: today), loading it on a miss."""
+    day = day or localdate()
+    key = _key(day)
+    current = version() if process_local() else None
+    cached = cache.get(key)
+    if cached is None or cached[0] != current:
+        cached = (current, _load(day))
+        cache.set(key, cached, getattr(settings, 'CUTOFF_STATE_TTL', 3600))
+    return cached[1]
+
+
+def effective(campus, day=None):
+    """(cutoff_time, is_cutoff) of the latest schedule of `day` covering `campus`, or None."""
+    entries = table(day)
+    matches = [entry for entry in (entries.get(None), entries.get(campus or None)) if entry]
+    return max(matches, key=lambda entry: entry[0], default=None)
+
+
+def is_cut_off(campus, at=None):
+    """Whether requests for `campus` are closed at `at` (default: now)."""
+    at = at or now()
+    entry = effective(campus, localdate(at))
+    if entry is None:
+        return False
+    cutoff_time, is_cutoff = entry
+    return is_cutoff or at >= cutoff_time
+
+
+def invalidate(day=None):
+    from core.models import Watermark
+
+    day = day or localdate()
+    key = _key(day)
+    cache.delete(key)
+    # Again once committed, in case a reader cached the old schedules in between
+    transaction.on_commit(lambda: cache.delete(key))
+    transaction.on_commit(_bump_stamp)
+    # Lets workers with their own cache notice the change (see module docstring)
+    Watermark.objects.update_or_create(name=VERSION_MARKER, defaults={'day': day})
+
+
+def on_schedule_changed(sender, instance=None, **kwargs):
+    """post_save / post_delete receiver for CutoffSchedule."""
+    invalidate(localdate(instance.cutoff_time))
+    invalidate()  # In case it was moved away from today
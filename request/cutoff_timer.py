@@ -0,0 +1,154 @@
+"""
+Timer for scheduled cutoffs.
+
+Instead of polling CutoffSchedule every minute, one thread sleeps until the
+cutoff_time of the next pending schedule and runs process_scheduled_cutoffs
+right then. The first pass on start catches up on cutoffs missed while the
+server was down.
+
+The timer runs in the job leader only (see request.jobs), but schedules are
+saved by whichever web process served the admin. Saving one in the leader's
+own process re-arms the timer directly (see on_schedule_saved). Saving one
+elsewhere bumps the change stamp of request.cutoff_state, which the waiting
+timer reads every CHANGE_POLL_SECONDS, so it re-arms within that delay.
+
+With a shared cache that stamp is a cache read and is always watched. With a
+per-process cache it is a database read, so it is only watched while a cutoff
+is pending; with none pending, a new schedule is found by the next_pending()
+lookup every RESYNC_SECONDS, as often as the old per-minute poll ran.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.timezone import now
+
+logger = logging.getLogger('custom_logger')
+
+
+RESYNC_SECONDS = getattr(settings, 'CUTOFF_TIMER_RESYNC_SECONDS', 60)
+CHANGE_POLL_SECONDS = getattr(settings, 'CUTOFF_TIMER_CHANGE_POLL_SECONDS', 30)
+RETRY_SECONDS = 60          # Before retrying a cutoff that failed to apply
+CATCH_UP = timedelta(days=7)  # Older pending cutoffs are skipped (as process_scheduled_cutoffs does)
+
+
+def next_pending():
+    """cutoff_time of the earliest schedule still to apply, or None."""
+    from core.models import CutoffSchedule
+
+    return (
+        CutoffSchedule.objects
+        .filter(is_cutoff=False, cutoff_time__gte=now() - CATCH_UP)
+        .order_by('cutoff_time')
+        .values_list('cutoff_time', flat=True)
+        .first()
+    )
+
+
+class CutoffTimer:
+
+    def __init__(self, job):
+        self.job = job
+        self._rearm = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cutoff-timer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._rearm.set()
+
+    def rearm(self):
+        """Look up the next pending schedule again, e.g. after one was created or changed."""
+        self._rearm.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def _wait_seconds(self, due, failed_at=None):
+        if due is None:
+            return RESYNC_SECONDS
+
+        seconds = (due - now()).total_seconds()
+        if seconds <= 0 and failed_at == due:
+            return RETRY_SECONDS  # Still pending after a run: don't spin on it
+        return max(0, min(seconds, RESYNC_SECONDS))
+
+    def _sleep(self, seconds, stamp=None):
+        """
+        Wait `seconds`, or until re-armed here or, when `stamp` is given, until the
+        schedules' change stamp moves from it.
+        """
+        from . import cutoff_state
+
+        deadline = monotonic() + seconds
+        while not self._stop.is_set():
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return
+            poll = remaining if stamp is None else min(remaining, CHANGE_POLL_SECONDS)
+            if self._rearm.wait(poll):
+                self._rearm.clear()
+                return
+            if stamp is not None and cutoff_state.stamp() != stamp:
+                return
+
+    def _run(self):
+        from . import cutoff_state
+
+        failed_at = None
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                watch = not cutoff_state.process_local()
+                stamp = cutoff_state.stamp() if watch else None  # Before looking, so no change slips in between
+                due = next_pending()
+                seconds = self._wait_seconds(due, failed_at)
+                if seconds == 0:
+                    failed_at = due
+                    self.job()
+                    continue
+                failed_at = None
+                if not watch and due is not None:
+                    # A change between next_pending() and here is found by the next pass
+                    stamp = cutoff_state.stamp()
+                self._sleep(seconds, stamp)
+            except Exception:
+                logger.exception("Cutoff timer pass failed")
+                self._rearm.wait(RETRY_SECONDS)
+                self._rearm.clear()
+        close_old_connections()
+
+
+_timer = None
+
+
+def start(job):
+    """Start this process's timer running `job` (process_scheduled_cutoffs) when cutoffs fall due."""
+    global _timer
+    if _timer is None or _timer.stopped:
+        _timer = CutoffTimer(job)
+        _timer.start()
+    return _timer
+
+
+def stop():
+    if _timer is not None:
+        _timer.stop()
+
+
+def rearm():
+    if _timer is not None:
+        _timer.rearm()
+
+
+def on_schedule_saved(sender, instance=None, **kwargs):
+    transaction.on_commit(rearm)
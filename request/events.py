@@ -0,0 +1,74 @@
+"""
+Queue change events for the live displays and cashier dashboards.
+
+publish() bumps a version number in the Django cache so every worker sharing
+that cache sees the change, then fires core.signals.queue_changed. The
+server-sent event stream in views.queue_event_stream only watches that
+version, so an idle queue costs no database work at all.
+
+Events only cross worker processes through a shared cache (settings.CACHE_URL).
+With the default per-process LocMem cache the stream is not served at all and
+the pages keep polling; see shared().
+"""
+
+import json
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.timezone import now
+
+from core.signals import queue_changed
+
+
+VERSION_KEY = "queue-events:version"
+LAST_EVENT_KEY = "queue-events:last"
+
+# Event names pushed to subscribers
+ENQUEUE = "enqueue"
+RESERVE = "reserve"
+COMPLETE = "complete"
+HOLD = "hold"
+CANCEL = "cancel"
+CUT_OFF = "cut_off"
+PRESENCE = "presence"  # a window went online or offline
+
+
+def shared():
+    """Whether events published by one worker process reach streams served by another."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def _bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # First event since the cache was (re)started
+        cache.add(VERSION_KEY, 0, timeout=None)
+        return cache.incr(VERSION_KEY)
+
+
+def _publish_now(event, campus=None, **data):
+    version = _bump_version()
+    cache.set(LAST_EVENT_KEY, {
+        "version": version,
+        "event": event,
+        "campus": campus,
+        "at": now().isoformat(),
+        **data,
+    }, timeout=None)
+    queue_changed.send(sender=None, event=event, campus=campus)
+    return version
+
+
+def publish(event, campus=None, **data):
+    """Announce a queue change once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _publish_now(event, campus=campus, **data))
+
+
+def format_sse(payload, event="queue"):
+    return f"id: {payload.get('version', 0)}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
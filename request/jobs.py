@@ -0,0 +1,210 @@
+"""
+Background job runner with a single elected leader.
+
+Every web process (or a dedicated `manage.py run_jobs` process) starts a
+JobRunner, but only the holder of the "scheduler" JobLease row runs the jobs:
+the daily hard cutoff, the rollup refresh and the scheduled-cutoff timer. The
+leader renews its lease every LEASE_SECONDS / 3; when it dies, the lease
+expires and the next runner to check takes over within LEASE_SECONDS. Taking
+and renewing the lease are single conditional UPDATEs, so two processes can
+never both hold it.
+
+JOB_RUNNER = "web" (the default) runs a runner inside each serving process;
+"external" leaves it to `manage.py run_jobs`.
+"""
+
+import atexit
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from core.models import JobLease
+
+logger = logging.getLogger('custom_logger')
+
+
+LEASE_NAME = "scheduler"
+LEASE_SECONDS = getattr(settings, 'JOB_LEASE_SECONDS', 30)
+
+
+def default_holder():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """A JobLease row held by `holder` for `seconds` at a time."""
+
+    def __init__(self, name, holder, seconds):
+        self.name = name
+        self.holder = holder
+        self.seconds = seconds
+        self.expires_at = None  # Of our own hold, as last written
+
+    def acquire(self):
+        """Renew the lease, or take it over if it expired. True while we hold it."""
+        current = now()
+        expires_at = current + timedelta(seconds=self.seconds)
+        leases = JobLease.objects.filter(name=self.name)
+
+        held = (
+            leases.filter(holder=self.holder, expires_at__gte=current).update(expires_at=expires_at)
+            or leases.filter(Q(expires_at__lt=current) | Q(holder=self.holder)).update(
+                holder=self.holder, expires_at=expires_at, acquired_at=current
+            )
+        )
+        if not held and not leases.exists():
+            try:
+                with transaction.atomic():
+                    JobLease.objects.create(name=self.name, holder=self.holder, expires_at=expires_at)
+                held = True
+            except IntegrityError:
+                held = False  # Another process created it first
+
+        self.expires_at = expires_at if held else None
+        return bool(held)
+
+    @property
+    def held(self):
+        return self.expires_at is not None and self.expires_at > now()
+
+    def release(self):
+        if self.expires_at is not None:
+            JobLease.objects.filter(name=self.name, holder=self.holder).update(expires_at=now())
+            self.expires_at = None
+
+
+class JobRunner:
+
+    def __init__(self, holder=None):
+        self.lease = Lease(LEASE_NAME, holder or default_holder(), LEASE_SECONDS)
+        self.scheduler = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def leading(self):
+        return self.scheduler is not None
+
+    def _guarded(self, job):
+        """Run `job` only while the lease is still ours."""
+        def run(*args, **kwargs):
+            if not self.lease.held:
+                print(f"[Scheduler] Skipped {job.__name__}: no longer the leader")
+                return
+            close_old_connections()
+            try:
+                return job(*args, **kwargs)
+            finally:
+                close_old_connections()
+        run.__name__ = job.__name__
+        return run
+
+    def _lead(self):
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.triggers.cron import CronTrigger
+        from . import cutoff_timer
+        from .apps import (
+            HARD_CUTOFF_TIME, process_daily_hard_cutoff, process_scheduled_cutoffs, refresh_transaction_rollups,
+        )
+
+        print(f"[Scheduler] {self.lease.holder} is now the job leader; initializing job scheduler...")
+        scheduler = BackgroundScheduler(timezone="Asia/Manila")
+
+        # --- Daily hard cutoff (runs once a day at HARD_CUTOFF_TIME, and once now to
+        # catch up on days missed while no leader was running; a no-op when current)
+        scheduler.add_job(
+            self._guarded(process_daily_hard_cutoff),
+            trigger=CronTrigger(hour=HARD_CUTOFF_TIME.hour, minute=HARD_CUTOFF_TIME.minute),
+            id="daily_hard_cutoff",
+            name=f"Daily Hard Cutoff at {HARD_CUTOFF_TIME:%H:%M}",
+            replace_existing=True,
+            kwargs={"days_back": 7},
+            misfire_grace_time=3600,  # run if missed by ≤ 1 hour
+        )
+        scheduler.add_job(
+            self._guarded(process_daily_hard_cutoff),
+            id="daily_hard_cutoff_catch_up",
+            name="Daily Hard Cutoff catch-up",
+            kwargs={"days_back": 7},
+        )
+
+        # --- Analytics rollup of closed days (runs once a day at 00:15)
+        scheduler.add_job(
+            self._guarded(refresh_transaction_rollups),
+            trigger=CronTrigger(hour=0, minute=15),
+            id="transaction_rollups",
+            name="Transaction Rollup at 00:15",
+            replace_existing=True,
+            misfire_grace_time=6 * 3600,  # catches up on missed days anyway
+        )
+
+        scheduler.start()
+        self.scheduler = scheduler
+
+        # --- Scheduled cutoffs fire at their exact cutoff_time (catching up on missed ones first)
+        cutoff_timer.start(self._guarded(process_scheduled_cutoffs))
+        print("[Scheduler] Jobs started and active ✅")
+
+    def _step_down(self):
+        from . import cutoff_timer
+
+        cutoff_timer.stop()
+        self.scheduler.shutdown(wait=False)
+        self.scheduler = None
+        print(f"[Scheduler] {self.lease.holder} stepped down as job leader")
+
+    def run(self):
+        """Elect and run until stop(); blocks."""
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    leader = self.lease.acquire()
+                except Exception:
+                    logger.exception("Job lease check failed")
+                    leader = self.lease.held  # Keep leading until our lease runs out
+
+                if leader and not self.leading:
+                    self._lead()
+                elif not leader and self.leading:
+                    self._step_down()
+
+                self._stop.wait(self.lease.seconds / 3)
+        finally:
+            if self.leading:
+                self._step_down()
+            try:
+                self.lease.release()  # Lets a follower take over right away
+            except Exception:
+                logger.exception("Job lease release failed")
+            close_old_connections()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="job-runner", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+
+_runner = None
+
+
+def start():
+    """Start this process's job runner (once)."""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+        _runner.start()
+    return _runner
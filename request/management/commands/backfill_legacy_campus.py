@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.legacy import backfill_campus
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill campus and course on legacy Transaction rows created before those columns existed, "
+        "from their NF1 row or else their requester."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per UPDATE (default: 5000).'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-copy every row, not only those without a campus.'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        updated = backfill_campus(kwargs['batch_size'], force=kwargs['force'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Backfilled campus and course on {updated} legacy transactions."))
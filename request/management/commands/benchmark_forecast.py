@@ -0,0 +1,137 @@
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localdate
+
+from core.models import TransactionNF1
+from user import forecasting
+from user.statistics import grouped_counts
+
+
+TRACKED_STATUSES = [
+    TransactionNF1.Status.ON_HOLD,
+    TransactionNF1.Status.COMPLETED,
+    TransactionNF1.Status.CUT_OFF,
+]
+
+WINDOW = 7  # days of history behind each forecast, as on the dashboard
+
+
+def _sklearn_forecast(series_by_status):
+    # The per-status fit kpi_data used before the forecasting module
+    import numpy as np
+    from sklearn.linear_model import LinearRegression
+
+    forecast = {}
+    for status, series in series_by_status.items():
+        y = np.array(series)
+        X = np.array(range(len(series))).reshape(-1, 1)
+        model = LinearRegression().fit(X, y)
+        forecast[status] = int(model.predict(np.array([[len(series)]])).round()[0])
+    return forecast
+
+
+def _dict_profile(rows, days):
+    # The dict-based hourly profile forecast_chart_data used before
+    daily = {}
+    hours = {}
+    for row in rows:
+        if row['day'] in days:
+            daily[row['day']] = daily.get(row['day'], 0) + row['count']
+            hours[row['hour']] = hours.get(row['hour'], 0) + row['count']
+    total_days = len(daily) or 1
+    return sum(hours.get(h, 0) / total_days for h in range(6, 18))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency and backtest accuracy of the dashboard forecasts: the "
+        "NumPy forecasting module against the previous sklearn / dict implementation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Closed days to backtest (default 30).')
+        parser.add_argument('--repeat', type=int, default=200, help='Timing repetitions per method (default 200).')
+
+    def _timed(self, fn, repeat):
+        start = perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (perf_counter() - start) / repeat * 1e6
+
+    def handle(self, *args, **kwargs):
+        backtest_days = kwargs['days']
+        repeat = kwargs['repeat']
+        if backtest_days < 1 or repeat < 1:
+            raise CommandError("--days and --repeat must be positive.")
+
+        try:
+            import sklearn  # noqa: F401
+            has_sklearn = True
+        except ImportError:
+            has_sklearn = False
+            self.stdout.write(self.style.WARNING("scikit-learn is not installed; skipping the sklearn baseline."))
+
+        today = localdate()
+        first = today - timedelta(days=backtest_days + WINDOW)
+        days = [first + timedelta(days=i) for i in range(backtest_days + WINDOW)]
+
+        # Whole history in two grouped queries; everything below is in memory
+        status_rows = grouped_counts({}, 'day', 'status', days=days, status__in=TRACKED_STATUSES)
+        hour_rows = grouped_counts({}, 'day', 'hour', days=days, status=TransactionNF1.Status.COMPLETED)
+
+        by_status = {status: {} for status in TRACKED_STATUSES}
+        for row in status_rows:
+            by_status[row['status']][row['day']] = row['count']
+        series = {status: [counts.get(day, 0) for day in days] for status, counts in by_status.items()}
+        matrix = forecasting.day_hour_matrix(hour_rows, days)
+        daytime = matrix[:, 6:18].sum(axis=1)
+
+        # -- latency on the dashboard's 7-day window
+        window = {status: values[-WINDOW:] for status, values in series.items()}
+        window_days = days[-WINDOW:]
+        window_set = set(window_days)
+
+        self.stdout.write("Latency (µs per call)")
+        self.stdout.write(f"  trend, numpy:          {self._timed(lambda: forecasting.trend_forecast(window, window_days), repeat):10.1f}")
+        if has_sklearn:
+            self.stdout.write(f"  trend, sklearn:        {self._timed(lambda: _sklearn_forecast(window), repeat):10.1f}")
+        self.stdout.write(f"  profile, numpy:        {self._timed(lambda: forecasting.profile_forecast(forecasting.hourly_profile(forecasting.day_hour_matrix(hour_rows, window_days)), 6, 18), repeat):10.1f}")
+        self.stdout.write(f"  profile, dict:         {self._timed(lambda: _dict_profile(hour_rows, window_set), repeat):10.1f}")
+
+        # -- accuracy: forecast each closed day from the WINDOW days before it
+        errors = {}
+
+        def record(name, predicted, actual):
+            errors.setdefault(name, []).append(abs(predicted - actual))
+
+        for target in range(WINDOW, len(days)):
+            history_days = days[target - WINDOW:target]
+            history = {status: values[target - WINDOW:target] for status, values in series.items()}
+
+            for season in forecasting.SEASONAL_MODELS:
+                predicted = forecasting.trend_forecast(history, history_days, season=season)
+                for status in TRACKED_STATUSES:
+                    record(f"trend, numpy/{season}", predicted[status], series[status][target])
+
+                model = forecasting.seasonal_model(history_days, daytime[target - WINDOW:target], season)
+                profile = forecasting.hourly_profile(matrix[target - WINDOW:target])
+                record(
+                    f"profile, numpy/{season}",
+                    forecasting.profile_forecast(profile, 6, 18, model.factor(days[target])),
+                    daytime[target],
+                )
+
+            if has_sklearn:
+                predicted = _sklearn_forecast(history)
+                for status in TRACKED_STATUSES:
+                    record("trend, sklearn", predicted[status], series[status][target])
+
+            record("profile, dict", _dict_profile(hour_rows, set(history_days)), daytime[target])
+
+        self.stdout.write(f"\nBacktest MAE over {backtest_days} days (lower is better)")
+        for name, values in errors.items():
+            self.stdout.write(f"  {name:28s} {sum(values) / len(values):10.2f}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Libraries that must only load on first use (analytics, PDF and QR code)
+HEAVY_MODULES = [
+    'numpy', 'scipy', 'sklearn', 'pandas', 'seaborn', 'matplotlib',
+    'xhtml2pdf', 'reportlab', 'qrcode', 'PIL', 'pyarrow',
+]
+
+
+def _parse_importtime(stderr):
+    """Rows of (module, self_us, cumulative_us) from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the URLconf (every view a worker loads) in a fresh interpreter with "
+        "`python -X importtime` and fail if a heavy library is loaded at startup or "
+        "the import time exceeds --budget-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default=settings.ROOT_URLCONF,
+            help='Module to import after django.setup() (default: the ROOT_URLCONF).'
+        )
+        parser.add_argument('--budget-ms', type=float, help='Fail when the total import time exceeds this.')
+        parser.add_argument('--top', type=int, default=15, help='Slowest imports to list (default 15).')
+
+    def handle(self, *args, **kwargs):
+        module = kwargs['module']
+        code = f"import django; django.setup(); import {module}"
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'QueueAU.settings')}
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+        rows = _parse_importtime(result.stderr)
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+
+        self.stdout.write(f"Imported {module}: {len(rows)} modules in {total_ms:.1f} ms")
+        for name, _, cumulative_us in sorted(rows, key=lambda row: -row[2])[:kwargs['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        loaded = sorted({name.split('.')[0] for name, _, _ in rows} & set(HEAVY_MODULES))
+        problems = []
+        if loaded:
+            problems.append(f"heavy libraries loaded at startup: {', '.join(loaded)}")
+        if kwargs.get('budget_ms') is not None and total_ms > kwargs['budget_ms']:
+            problems.append(f"import time {total_ms:.1f} ms exceeds the {kwargs['budget_ms']:.1f} ms budget")
+
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup imports OK."))
@@ -110,6 +110,8 @@ class Command(BaseCommand):
                     student=txn_nf1.student,
                     new_enrollee=txn_nf1.new_enrollee,
                     guest=txn_nf1.guest,
+                    course=txn_nf1.course,
+                    campus=txn_nf1.campus,
                 )
 
                 print(f"✅ Created {txn_nf1.queueNumber} ({status}) for {model_class.__name__} ID {requester.pk}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Student
+from request.qr import ensure_student_qr, qr_digest, qr_path
+
+
+class Command(BaseCommand):
+    help = "Render and store the QR image of every student that does not have an up-to-date one yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render every student, e.g. after the logo changed.'
+        )
+
+    def handle(self, *args, **kwargs):
+        force = kwargs['force']
+        students = Student.objects.only('id', 'qrId', 'qr_image').order_by('id')
+
+        rendered = skipped = 0
+        for student in students.iterator(chunk_size=500):
+            if not force and student.qr_image.name == qr_path(qr_digest(student.qrId)) and student.qr_image.storage.exists(student.qr_image.name):
+                skipped += 1
+                continue
+
+            ensure_student_qr(student, force=force)
+            rendered += 1
+            if rendered % 500 == 0:
+                self.stdout.write(f"{rendered} rendered...")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} QR codes; {skipped} already up to date."))
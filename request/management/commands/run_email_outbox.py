@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the outbox (for EMAIL_OUTBOX_WORKER = 'external')."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send what is due now and exit instead of running until stopped.'
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=5,
+            help='Seconds between checks for new or retried mail (default 5).'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['once']:
+            pool = outbox.AccountPool()
+            claimed = sent = 0
+            try:
+                while True:
+                    batch_claimed, batch_sent = outbox.deliver_pending(pool)
+                    if not batch_claimed:
+                        break
+                    claimed += batch_claimed
+                    sent += batch_sent
+            finally:
+                pool.close()
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} of {claimed} due emails."))
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: (stop.set(), outbox.notify()))
+
+        self.stdout.write("Email outbox worker running (Ctrl+C to stop)...")
+        outbox.run_worker(stop=stop, poll_seconds=kwargs['poll'])
+        self.stdout.write(self.style.SUCCESS("Email outbox worker stopped."))
@@ -0,0 +1,22 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from request.jobs import JobRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background jobs (scheduled and daily cutoffs, rollups) as their own process. "
+        "Several instances may run; one is elected leader and the others take over if it dies. "
+        "Set JOB_RUNNER = 'external' so web processes leave the jobs to this command."
+    )
+
+    def handle(self, *args, **kwargs):
+        runner = JobRunner()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: runner.stop())
+
+        self.stdout.write(f"Job runner {runner.lease.holder} started (Ctrl+C to stop)...")
+        runner.run()
+        self.stdout.write(self.style.SUCCESS("Job runner stopped."))
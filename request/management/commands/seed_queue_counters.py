@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localdate
+
+from core.models import QueueCounter, TransactionNF1
+from core.timeutils import on_day
+
+
+class Command(BaseCommand):
+    help = "Seed the per-(day, campus, lane) queue counters from existing transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Local date to seed (YYYY-MM-DD). Defaults to today (Asia/Manila).'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs.get('date'):
+            try:
+                day = datetime.strptime(kwargs['date'], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Date must be in YYYY-MM-DD format.")
+        else:
+            day = localdate()
+
+        # Tickets issued before the counters existed were numbered per lane across all
+        # campuses, so every campus lane resumes above that day's lane-wide maximum.
+        campuses = set()
+        highest = {True: 0, False: 0}
+        issued = TransactionNF1.objects.filter(
+            **on_day('created_at', day),
+        ).values_list('campus', 'priority', 'queueNumber')
+
+        for campus, priority, queue_number in issued.iterator():
+            try:
+                number = int(queue_number.split('-')[-1])
+            except (AttributeError, ValueError):
+                continue
+            campuses.add(QueueCounter.campus_key(campus))
+            highest[priority] = max(highest[priority], number)
+
+        if not campuses:
+            self.stdout.write(self.style.WARNING(f"No transactions found for {day}; nothing to seed."))
+            return
+
+        for campus in sorted(campuses):
+            for priority, number in highest.items():
+                counter, _ = QueueCounter.objects.get_or_create(day=day, campus=campus, priority=priority)
+
+                # Never move a live counter backwards
+                QueueCounter.objects.filter(pk=counter.pk, last_number__lt=number).update(last_number=number)
+                counter.refresh_from_db()
+
+                lane = 'P' if priority else 'S'
+                self.stdout.write(self.style.SUCCESS(
+                    f"Seeded {day} [{campus or 'All'}] {lane} lane at {counter.last_number:04d}"
+                ))
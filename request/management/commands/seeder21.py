@@ -157,6 +157,8 @@ class Command(BaseCommand):
                     student=txn_nf1.student,
                     new_enrollee=txn_nf1.new_enrollee,
                     guest=txn_nf1.guest,
+                    course=txn_nf1.course,
+                    campus=txn_nf1.campus,
                 )
 
                 print(f"Created {txn_nf1.queueNumber} ({status}, {txn_for}, priority={priority}) for {model_class.__name__} ID {requester.pk}")
@@ -200,6 +202,8 @@ class Command(BaseCommand):
                     student=txn_nf1.student,
                     new_enrollee=txn_nf1.new_enrollee,
                     guest=txn_nf1.guest,
+                    course=txn_nf1.course,
+                    campus=txn_nf1.campus,
                 )
 
                 print(f"[ON_QUEUE Today] Created {txn_nf1.queueNumber} ({txn_for}) for {model_class.__name__} ID {requester.pk}")
@@ -199,6 +199,8 @@ class Command(BaseCommand):
                     student=txn_nf1.student,
                     new_enrollee=txn_nf1.new_enrollee,
                     guest=txn_nf1.guest,
+                    course=txn_nf1.course,
+                    campus=txn_nf1.campus,
                 )
 
                 print(f"✅ Created {txn_nf1.queueNumber} ({status}, {txn_for}, {txn_type}, priority={priority}) for {model_class.__name__} ID {requester.pk}")
@@ -244,6 +246,8 @@ class Command(BaseCommand):
                     student=txn_nf1.student,
                     new_enrollee=txn_nf1.new_enrollee,
                     guest=txn_nf1.guest,
+                    course=txn_nf1.course,
+                    campus=txn_nf1.campus,
                 )
 
                 print(f"[ON_QUEUE Today] Created {txn_nf1.queueNumber} ({txn_for}) for {model_class.__name__} ID {requester.pk}")
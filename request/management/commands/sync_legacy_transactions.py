@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from core.legacy import find_drift, link_orphans, repair_drift
+from core.models import TransactionNF1
+
+
+class Command(BaseCommand):
+    help = "Verify (and optionally repair) drift between TransactionNF1 and its legacy Transaction projection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='How many days back to check (default: 1). Use 0 to check the full history.'
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Link orphaned legacy rows, create missing ones and overwrite drifted columns from NF1.'
+        )
+
+    def handle(self, *args, **kwargs):
+        days = kwargs['days']
+        repair = kwargs['repair']
+
+        nf1_qs = TransactionNF1.objects.all()
+        if days > 0:
+            nf1_qs = nf1_qs.filter(created_at__gte=now() - timedelta(days=days))
+
+        with transaction.atomic():
+            if repair:
+                linked = link_orphans(nf1_qs)
+                if linked:
+                    self.stdout.write(self.style.SUCCESS(f"Linked {linked} legacy rows to their NF1 transaction."))
+
+            missing, drifted = find_drift(nf1_qs)
+
+            self.stdout.write(f"Missing legacy rows: {len(missing)}")
+            self.stdout.write(f"Drifted legacy rows: {len(drifted)}")
+
+            for legacy_id, changes in list(drifted.items())[:20]:
+                self.stdout.write(f"  Legacy #{legacy_id}: {', '.join(sorted(changes))}")
+
+            if not repair:
+                if missing or drifted:
+                    self.stdout.write(self.style.WARNING("Drift found. Re-run with --repair to fix it."))
+                else:
+                    self.stdout.write(self.style.SUCCESS("Legacy projection is in sync."))
+                return
+
+            created, updated = repair_drift(missing, drifted)
+            self.stdout.write(self.style.SUCCESS(f"Repaired: {created} created, {updated} updated."))
@@ -0,0 +1,136 @@
+"""
+QR code images for students, new enrollees and guests.
+
+qrcode and Pillow are imported on first use, so the kiosk and queue views
+that never draw a code do not load them. The AU logo is read and resized once
+per process.
+
+Student codes are rendered once and stored in MEDIA under a hash of the qrId
+(Student.qr_image), then served by the `qr_image` view with long-lived cache
+headers. The hash keeps the qrId itself out of URLs and file names, and a new
+qrId simply gets a new file.
+"""
+
+import hashlib
+import io
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+LOGO_PATH = os.path.join(settings.BASE_DIR, 'static', 'aulogo.png')
+QR_DIR = 'qr_codes'
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def has_logo():
+    return os.path.exists(LOGO_PATH)
+
+
+@lru_cache(maxsize=1)
+def _logo():
+    from PIL import Image
+
+    try:
+        with Image.open(LOGO_PATH) as logo:
+            logo.load()
+            return logo.copy()
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _resized_logo(qr_width):
+    """The logo scaled to a quarter of a `qr_width` wide code (codes of one size share it)."""
+    from PIL import Image
+
+    logo = _logo()
+    if logo is None:
+        return None
+
+    base_width = qr_width // 4
+    w_percent = base_width / float(logo.size[0])
+    h_size = int((float(logo.size[1]) * w_percent))
+    return logo.resize((base_width, h_size), Image.Resampling.LANCZOS)
+
+
+def _paste_logo(img):
+    logo = _resized_logo(img.size[0])
+    if logo is None:
+        return img
+
+    pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
+    img.paste(logo, pos, mask=logo if logo.mode == 'RGBA' else None)
+    return img
+
+
+def qr_png(data, with_logo=True):
+    """
+    PNG bytes of a QR code for `data`. With `with_logo`, the AU logo is placed
+    in the middle (high error correction keeps the code readable).
+    """
+    import qrcode
+
+    if with_logo:
+        qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H)
+        qr.add_data(data)
+        qr.make(fit=True)
+        img = _paste_logo(qr.make_image(fill_color="black", back_color="white").convert('RGB'))
+    else:
+        img = qrcode.make(data)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# -- stored student codes -------------------------------------------------
+
+
+def qr_digest(qr_id):
+    return hashlib.sha256(qr_id.encode()).hexdigest()
+
+
+def qr_path(digest):
+    return f"{QR_DIR}/{digest}.png"
+
+
+def ensure_student_qr(student, force=False):
+    """
+    Storage name of the student's QR image, rendering and storing it first
+    when missing (or with `force`). Keeps Student.qr_image pointing at it.
+    """
+    name = qr_path(qr_digest(student.qrId))
+
+    if force or not default_storage.exists(name):
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        saved = default_storage.save(name, ContentFile(qr_png(student.qrId)))
+        if saved != name:
+            # Another worker stored the same code meanwhile; keep a single copy
+            default_storage.delete(saved)
+
+    if student.qr_image.name != name:
+        student.qr_image.name = name
+        type(student).objects.filter(pk=student.pk).update(qr_image=name)
+    return name
+
+
+def student_qr_png(student):
+    """PNG bytes of the student's stored QR image."""
+    with default_storage.open(ensure_student_qr(student), 'rb') as image:
+        return image.read()
+
+
+def stored_qr(digest):
+    """Open file of a stored code by digest, or None."""
+    if not DIGEST_RE.match(digest):
+        return None
+    name = qr_path(digest)
+    if not default_storage.exists(name):
+        return None
+    return default_storage.open(name, 'rb')
@@ -0,0 +1,114 @@
+"""
+Shared snapshots of the public queue displays.
+
+Each snapshot is rendered once per queue event version (see events.py), or
+again after QUEUE_SNAPSHOT_TTL_MS for changes that are not published, and
+stored in the Django cache so every lobby display and worker reuses it.
+Responses carry an ETag over the rendered body; a display whose copy is still
+current gets a 304 without touching the database.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from django.utils.timezone import localtime
+
+from core.models import TransactionNF1
+from core.timeutils import on_day
+from . import events
+
+
+SNAPSHOT_KEY = "queue-snapshot:{name}"
+
+# Upcoming tickets shown per lane, and on-hold tickets shown on the board.
+# Ticket numbers restart per campus, so every entry carries its campus.
+NEXT_QUEUES_LIMIT = 5
+ON_HOLD_LIMIT = 10
+
+
+def _ttl_seconds():
+    return getattr(settings, 'QUEUE_SNAPSHOT_TTL_MS', 1000) / 1000.0
+
+
+def _board_entry(txn):
+    return {
+        "queue_number": txn['queueNumber'],
+        "campus": txn['campus'],
+        "created_at": localtime(txn['created_at']).strftime("%H:%M"),
+    }
+
+
+def build_live_queue_status():
+    transactions = TransactionNF1.objects.filter(
+        status=TransactionNF1.Status.IN_PROCESS,
+        reservedBy__isOnline=True,
+        **on_day('updated_at'),
+    ).values('reservedBy__windowNum', 'queueNumber', 'campus', 'status')
+
+    return [
+        {
+            "window": t['reservedBy__windowNum'],
+            "queue_number": t['queueNumber'],
+            "campus": t['campus'],
+            "status": t['status'],
+        }
+        for t in transactions
+    ]
+
+
+def build_public_next_queues():
+    today = (
+        TransactionNF1.objects.filter(**on_day('created_at'))
+        .order_by('created_at')
+        .values('queueNumber', 'campus', 'created_at')
+    )
+
+    waiting = today.filter(status=TransactionNF1.Status.ON_QUEUE, reservedBy__isnull=True)
+
+    return {
+        "priority": [_board_entry(t) for t in waiting.filter(priority=True)[:NEXT_QUEUES_LIMIT]],
+        "standard": [_board_entry(t) for t in waiting.filter(priority=False)[:NEXT_QUEUES_LIMIT]],
+        "on_hold": [_board_entry(t) for t in today.filter(status=TransactionNF1.Status.ON_HOLD)[:ON_HOLD_LIMIT]],
+    }
+
+
+def get_snapshot(name, builder):
+    """
+    Return (body, etag) for snapshot `name`, rebuilding it with `builder` when the
+    queue version moved or the cached copy is older than the TTL.
+    """
+    key = SNAPSHOT_KEY.format(name=name)
+    version = events.current_version()
+    cached = cache.get(key)
+
+    if cached and cached['version'] == version and time.time() - cached['built_at'] < _ttl_seconds():
+        return cached['body'], cached['etag']
+
+    body = json.dumps(builder()).encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    cache.set(key, {
+        "version": version,
+        "built_at": time.time(),
+        "body": body,
+        "etag": etag,
+    }, timeout=None)
+    return body, etag
+
+
+def snapshot_response(request, name, builder):
+    body, etag = get_snapshot(name, builder)
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"  # always revalidate, served from the snapshot
+    return response
@@ -1,3 +1,210 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import now
+
+from core import legacy
+from core.models import CutoffSchedule, Guest, QueueCounter, Student, Transaction, TransactionNF1, Watermark
+from request import cutoff_state, cutoff_timer, events
+from request.apps import _serves_requests, process_scheduled_cutoffs
+from request.snapshots import build_public_next_queues
+from request.views import generate_queue_number
+
+
+class PublicBoardTests(TestCase):
+
+    def test_board_entries_name_their_campus(self):
+        # Numbering restarts per campus, so the same number can wait on two campuses
+        for campus in ("Main", "South"):
+            TransactionNF1.objects.create(
+                queueNumber="P-001", transactionType="Tuition", campus=campus, priority=True,
+            )
+
+        board = build_public_next_queues()
+
+        self.assertEqual(
+            sorted((entry["queue_number"], entry["campus"]) for entry in board["priority"]),
+            [("P-001", "Main"), ("P-001", "South")],
+        )
+
+
+class QueueNumberTests(TestCase):
+
+    def test_guest_and_student_of_one_campus_share_a_counter(self):
+        guest = Guest.objects.create(qrId="guest-1")  # campus defaults to 'SOUTH'
+        student = Student.objects.create(
+            name="Student 1", studentId="2024-0001", email="student1@example.com", campus="South", qrId="student-1",
+        )
+
+        self.assertEqual(generate_queue_number(False, campus=guest.campus), "S-0001")
+        self.assertEqual(generate_queue_number(False, campus=student.campus), "S-0002")
+        self.assertEqual(generate_queue_number(False, campus=" south "), "S-0003")
+        self.assertEqual(QueueCounter.objects.get().campus, "south")
+
+
+class QueueEventStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_event_is_published_once_the_change_commits(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            events.publish(events.ENQUEUE, campus="Main", queue_number="S-0001")
+            self.assertEqual(events.current_version(), 0)  # Not before commit
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(events.current_version(), 1)
+        self.assertEqual(
+            cache.get(events.LAST_EVENT_KEY),
+            {"version": 1, "event": "enqueue", "campus": "Main", "queue_number": "S-0001", "at": mock.ANY},
+        )
+
+    async def test_stream_is_not_served_without_a_shared_cache(self):
+        # Events published by other workers would never reach it: clients keep polling
+        self.assertFalse(events.shared())
+        response = await self.async_client.get("/live-queue/events/", HTTP_HOST="localhost")
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'events'}})
+    def test_shared_cache_backends_carry_events(self):
+        self.assertTrue(events.shared())
+
+
+@override_settings(LEGACY_TRANSACTION_MIRROR=True)
+class ScheduledCutoffTests(TestCase):
+
+    def ticket(self, number, campus):
+        nf1 = TransactionNF1.objects.create(queueNumber=number, transactionType="Tuition", campus=campus)
+        legacy.create_projection(nf1)
+        return nf1
+
+    def test_campus_cutoff_closes_only_that_campus(self):
+        CutoffSchedule.objects.create(campus="Main", cutoff_time=now() - timedelta(minutes=5))
+        self.ticket("S-001", "Main")
+        self.ticket("S-001", "South")
+
+        process_scheduled_cutoffs()
+
+        for model in (TransactionNF1, Transaction):
+            self.assertEqual(
+                dict(model.objects.values_list('campus', 'status')),
+                {"Main": "cut_off", "South": "on_queue"},
+            )
+        self.assertTrue(CutoffSchedule.objects.get().is_cutoff)
+
+    @override_settings(LEGACY_TRANSACTION_MIRROR=False)
+    def test_legacy_rows_are_left_alone_without_the_mirror(self):
+        self.ticket("S-001", "Main")
+        CutoffSchedule.objects.create(campus="Main", cutoff_time=now() - timedelta(minutes=5))
+
+        process_scheduled_cutoffs()
+
+        self.assertEqual(TransactionNF1.objects.get().status, "cut_off")
+        self.assertEqual(Transaction.objects.get().status, "on_queue")
+
+    def test_backfilled_legacy_rows_are_cut_off(self):
+        self.ticket("S-001", "Main")
+        Transaction.objects.update(campus='', course=None)  # As created before the column existed
+
+        self.assertEqual(legacy.backfill_campus(), 1)
+        CutoffSchedule.objects.create(campus="Main", cutoff_time=now() - timedelta(minutes=5))
+        process_scheduled_cutoffs()
+
+        self.assertEqual(Transaction.objects.get().status, "cut_off")
+
+
+class CutoffStateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_change_in_another_worker_is_seen_through_the_version_row(self):
+        self.assertFalse(cutoff_state.is_cut_off("Main"))  # Cached, empty
+
+        # Another worker saves a schedule: its own cache is cleared, ours is not
+        CutoffSchedule.objects.bulk_create([CutoffSchedule(campus="Main", cutoff_time=now() - timedelta(minutes=1))])
+        self.assertFalse(cutoff_state.is_cut_off("Main"))
+        Watermark.objects.update_or_create(name=cutoff_state.VERSION_MARKER, defaults={'day': None})
+
+        self.assertTrue(cutoff_state.is_cut_off("Main"))
+        self.assertFalse(cutoff_state.is_cut_off("South"))
+
+
+@mock.patch.object(cutoff_timer, 'CHANGE_POLL_SECONDS', 0.05)
+class CutoffTimerTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.fired = threading.Event()
+
+    def job(self):
+        CutoffSchedule.objects.filter(is_cutoff=False, cutoff_time__lte=now()).update(is_cutoff=True)
+        self.fired.set()
+
+    def run_timer(self):
+        timer = cutoff_timer.CutoffTimer(self.job)
+        timer.start()
+        self.addCleanup(timer._thread.join, 2)
+        self.addCleanup(timer.stop)
+
+    def save_elsewhere(self, cutoff_time):
+        # As another process does it: no post_save here to re-arm this timer directly
+        CutoffSchedule.objects.bulk_create([CutoffSchedule(campus="Main", cutoff_time=cutoff_time)])
+        cutoff_state.invalidate()
+
+    def test_schedule_saved_in_another_process_wakes_the_timer(self):
+        CutoffSchedule.objects.create(campus="South", cutoff_time=now() + timedelta(hours=1))
+        self.run_timer()
+        # A cutoff is pending: the timer sleeps RESYNC_SECONDS, unless it notices the change
+        self.assertFalse(self.fired.wait(0.2))
+
+        self.save_elsewhere(now())
+
+        self.assertTrue(self.fired.wait(2))
+
+    def test_idle_timer_does_not_poll_the_change_stamp(self):
+        with mock.patch.object(cutoff_state, 'version', wraps=cutoff_state.version) as version:
+            self.run_timer()
+            self.assertFalse(self.fired.wait(0.3))
+        version.assert_not_called()
+
+    def test_shared_cache_stamp_wakes_the_timer_without_queries(self):
+        with mock.patch.object(cutoff_state, 'process_local', return_value=False), \
+                mock.patch.object(cutoff_state, 'version', wraps=cutoff_state.version) as version:
+            self.run_timer()
+            self.assertFalse(self.fired.wait(0.2))
+
+            self.save_elsewhere(now())
+
+            self.assertTrue(self.fired.wait(2))
+        version.assert_not_called()
+
+
+class ServesRequestsTests(TestCase):
+
+    def serves(self, argv, run_main=""):
+        with mock.patch('sys.argv', argv), mock.patch.dict('os.environ', {'RUN_MAIN': run_main}):
+            return _serves_requests()
+
+    @override_settings(SERVES_REQUESTS=None)
+    def test_guessed_from_the_command_line(self):
+        self.assertTrue(self.serves(["/venv/bin/gunicorn", "QueueAU.wsgi"]))
+        self.assertTrue(self.serves(["/venv/lib/python3.11/site-packages/gunicorn/__main__.py", "QueueAU.wsgi"]))
+        self.assertTrue(self.serves(["/venv/bin/uvicorn", "QueueAU.asgi:application"]))
+        self.assertTrue(self.serves(["/venv/bin/daphne", "QueueAU.asgi:application"]))
+        self.assertTrue(self.serves(["manage.py", "runserver"], run_main="true"))
+        self.assertTrue(self.serves(["manage.py", "runserver", "--noreload"]))
+
+        self.assertFalse(self.serves(["manage.py", "runserver"]))  # The auto-reloader parent
+        self.assertFalse(self.serves(["manage.py", "migrate"]))
+        self.assertFalse(self.serves(["/venv/bin/django-admin", "shell"]))
+        self.assertFalse(self.serves(["/venv/bin/celery", "-A", "QueueAU", "worker"]))
+
+    @override_settings(SERVES_REQUESTS="true")
+    def test_setting_overrides_the_guess(self):
+        self.assertTrue(self.serves(["/venv/bin/celery", "-A", "QueueAU", "worker"]))
+        with self.settings(SERVES_REQUESTS="false"):
+            self.assertFalse(self.serves(["/venv/bin/gunicorn", "QueueAU.wsgi"]))
@@ -15,7 +15,9 @@ from .views import (
     live_queue_page, public_next_queues,
     recover_qr,
     new_enrollee_quick_queue,
-    guest_quick_queue
+    guest_quick_queue,
+    queue_event_stream,
+    qr_image,
     )
 
 urlpatterns = [
@@ -24,6 +26,7 @@ urlpatterns = [
     path('student_register/', register_student, name='register_student'),
     path('student/success/<int:student_id>/', student_success, name='student_success'),
     path('student/recover_qr/', recover_qr, name='recover_qr'),
+    path('qr/<str:digest>.png', qr_image, name='qr_image'),
 
     # Remove on the thingies
     # path('new-enrollee/', register_new_enrollee, name='register_new_enrollee'),
@@ -37,6 +40,7 @@ urlpatterns = [
     path("live-queue/", live_queue_status, name="live-queue-status"),
     path("live-queue-page/", live_queue_page, name="live-queue-page"),
     path("public-next-queues/", public_next_queues, name="public-next-queues"),
+    path("live-queue/events/", queue_event_stream, name="queue-event-stream"),
 
 
 
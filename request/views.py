@@ -2,27 +2,29 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
 from django.utils.timezone import now
-from core.models import Student, Transaction, Guest, NewEnrollee, TransactionNF1, Course
+from core.models import Student, Transaction, Guest, NewEnrollee, TransactionNF1, Course, QueueCounter
 from .forms import StudentRegistrationForm, NewEnrolleeForm, GuestForm, QueueRequestForm, RegisterUser
 from .utils import generate_qr_id
+from user.dispatch import dispatch_engine
+from core.legacy import mirror_created
+from . import events
+from .snapshots import snapshot_response, build_live_queue_status, build_public_next_queues
+from . import qr
+from . import cutoff_state
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
-import qrcode
 import io
-from django.core.mail import EmailMessage, get_connection
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_GET
 from .printing import print_queue_slip
 from django.utils.timezone import localtime, now, make_aware, localdate
 from django.conf import settings
-from PIL import Image
 from django.db import transaction
 import random
 from django import forms
-from .tasks import generate_qr_and_send_email
 import uuid
 import os
 from io import BytesIO
-import base64
 from uuid import UUID
 from django.db.models import Q
 import threading
@@ -67,35 +69,35 @@ def register_student(request):
 def student_success(request, student_id):
     student = get_object_or_404(Student, id=student_id)
 
-    # Generate QR code dynamically with AU logo
-    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H)
-    qr.add_data(student.qrId)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
-
-    logo_path = os.path.join(settings.BASE_DIR, 'static', 'aulogo.png')
-    try:
-        logo = Image.open(logo_path)
-        base_width = img.size[0] // 4
-        w_percent = base_width / float(logo.size[0])
-        h_size = int((float(logo.size[1]) * w_percent))
-        logo = logo.resize((base_width, h_size), Image.Resampling.LANCZOS)
-        pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
-        img.paste(logo, pos, mask=logo if logo.mode == 'RGBA' else None)
-    except FileNotFoundError:
-        pass
-
-    # Convert QR image to base64 for rendering
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    # QR code with AU logo, rendered once and served from storage
+    qr.ensure_student_qr(student)
 
     return render(request, 'request/student_success.html', {
         'student': student,
-        'qr_code': qr_base64,
+        'qr_url': reverse('qr_image', args=[qr.qr_digest(student.qrId)]),
     })
 
 
+QR_CACHE_SECONDS = 365 * 24 * 3600
+
+
+@require_GET
+def qr_image(request, digest):
+    # Stored codes never change (a new qrId gets a new digest), so they can be cached for good
+    etag = f'"{digest}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        image = qr.stored_qr(digest)
+        if image is None:
+            raise Http404("QR code not found")
+        response = FileResponse(image, content_type='image/png')
+
+    response['ETag'] = etag
+    response['Cache-Control'] = f'private, max-age={QR_CACHE_SECONDS}, immutable'
+    return response
+
+
 
 '''
 
@@ -116,19 +118,13 @@ def register_new_enrollee(request):
             enrollee.save()
 
             # QR code now contains only the QR ID
-            qr = qrcode.make(enrollee.qrId)
-            buffer = io.BytesIO()
-            qr.save(buffer, format='PNG')
-            buffer.seek(0)
-
-            email = EmailMessage(
-                subject='New Enrollee Registered',
-                body=f'QR ID: {enrollee.qrId}',
-                from_email='noreply@phinmaed.com',
-                to=[NOTIFY_EMAIL],
+
+            send_rolling_email(
+                'New Enrollee Registered',
+                f'QR ID: {enrollee.qrId}',
+                [NOTIFY_EMAIL],
+                attachments=[('enrollee_qr.png', qr.qr_png(enrollee.qrId, with_logo=False), 'image/png')],
             )
-            email.attach('enrollee_qr.png', buffer.read(), 'image/png')
-            email.send(fail_silently=False)
 
             messages.success(request, "New enrollee registered. QR code sent via email.")
             return redirect('register_new_enrollee')
@@ -146,19 +142,13 @@ def register_guest(request):
             guest.qrId = generate_qr_id()
             guest.save()
 
-            qr = qrcode.make(guest.qrId)
-            buffer = io.BytesIO()
-            qr.save(buffer, format='PNG')
-            buffer.seek(0)
 
-            email = EmailMessage(
-                subject='New Guest Registered',
-                body=f'QR ID: {guest.qrId}',
-                from_email='noreply@phinmaed.com',
-                to=[NOTIFY_EMAIL],
+            send_rolling_email(
+                'New Guest Registered',
+                f'QR ID: {guest.qrId}',
+                [NOTIFY_EMAIL],
+                attachments=[('guest_qr.png', qr.qr_png(guest.qrId, with_logo=False), 'image/png')],
             )
-            email.attach('guest_qr.png', buffer.read(), 'image/png')
-            email.send(fail_silently=False)
 
             messages.success(request, "Guest registered. QR code sent via email.")
             return redirect('register_guest')
@@ -173,30 +163,19 @@ def register_guest(request):
 -------------------------------------       Request Queue Number        -------------------------------------
 '''
 
-def generate_queue_number(priority: bool, created_at=None):
+def generate_queue_number(priority: bool, created_at=None, campus=None):
     prefix = 'P' if priority else 'S'
 
     # Use Django's timezone-aware "now"
     if created_at is None:
         created_at = timezone.localtime(timezone.now())
 
-    # Normalize to the start of the local day using Django's timezone
-    start_of_day = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = start_of_day + timedelta(days=1)
-
-    count_legacy = Transaction.objects.filter(
-        created_at__gte=start_of_day,
-        created_at__lt=end_of_day,
-        priority=priority
-    ).count()
-
-    count_nf1 = TransactionNF1.objects.filter(
-        created_at__gte=start_of_day,
-        created_at__lt=end_of_day,
-        priority=priority
-    ).count()
-
-    next_num = max(count_legacy, count_nf1) + 1
+    # One atomic increment on the (day, campus, lane) counter instead of counting the day's rows
+    next_num = QueueCounter.next_number(
+        day=created_at.date(),
+        campus=campus,
+        priority=priority,
+    )
     return f"{prefix}-{next_num:04d}"
 
 
@@ -255,7 +234,7 @@ def request_queue(request):
                 requester.save(update_fields=["priority"])
 
             priority = requester.priority
-            queue_number = generate_queue_number(priority)
+            queue_number = generate_queue_number(priority, campus=requester.campus)
             timestamp = now()
 
             # --- Create NF1 transaction ---
@@ -268,20 +247,11 @@ def request_queue(request):
             txn_nf1.priority = priority
             txn_nf1.created_at = timestamp
             txn_nf1.save(update_fields=["status", "priority", "created_at"])
+            transaction.on_commit(lambda: dispatch_engine.enqueue(txn_nf1))
 
-            # --- Create legacy transaction ---
-            Transaction.objects.create(
-                queueNumber=txn_nf1.queueNumber,
-                transactionType=txn_nf1.transactionType,
-                status=txn_nf1.status,
-                priority=txn_nf1.priority,
-                onHoldCount=txn_nf1.onHoldCount,
-                created_at=txn_nf1.created_at,
-                reservedBy=txn_nf1.reservedBy,
-                student=txn_nf1.student,
-                new_enrollee=txn_nf1.new_enrollee,
-                guest=txn_nf1.guest,
-            )
+            # --- Legacy projection (only written when the mirror is enabled) ---
+            mirror_created(txn_nf1)
+            events.publish(events.ENQUEUE, campus=txn_nf1.campus)
 
             # --- Print queue slip asynchronously (avoid broken pipe) ---
             transaction.on_commit(lambda: threading.Thread(
@@ -301,6 +271,7 @@ def request_queue(request):
 
 
 from core.models import CutoffSchedule
+from core.timeutils import day_bounds
 from django.utils.timezone import now, get_current_timezone
 from datetime import timedelta
 import pytz
@@ -310,37 +281,11 @@ def is_campus_cutoff(campus: str) -> bool:
     """
     Check if the given campus has an active cutoff for today.
     Returns True if requests should be blocked.
-    """
-
-    tz = get_current_timezone()  # Usually Asia/Manila
-    current_time = now().astimezone(tz)
-
-    # Today's boundaries (local Manila time)
-    start_of_day = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = start_of_day + timedelta(days=1)
-
-    # Convert to UTC for DB query (since cutoff_time is stored in UTC)
-    start_utc = start_of_day.astimezone(pytz.UTC)
-    end_utc = end_of_day.astimezone(pytz.UTC)
-
-    # Find the most recent cutoff today for this campus (or global cutoff if no campus specified)
-    cutoff = (
-        CutoffSchedule.objects.filter(
-            Q(campus=campus) | Q(campus__isnull=True) | Q(campus="")
-        )
-        .filter(cutoff_time__gte=start_utc, cutoff_time__lt=end_utc)
-        .order_by("-cutoff_time")
-        .first()
-    )
-
-    if not cutoff:
-        return False  # No cutoff scheduled for today
-
-    # Convert cutoff_time from UTC to local timezone before comparison
-    cutoff_local = cutoff.cutoff_time.astimezone(tz)
 
-    # Active if: already marked as cutoff OR local time is past cutoff
-    return cutoff.is_cutoff or current_time >= cutoff_local
+    Answered from the cached cutoff table of today (see request.cutoff_state),
+    so issuing a ticket costs no extra query.
+    """
+    return cutoff_state.is_cut_off(campus)
 
 
 
@@ -369,7 +314,7 @@ def new_enrollee_quick_queue(request):
         requester.save(update_fields=["priority"])
 
     priority = requester.priority
-    queue_number = generate_queue_number(priority)
+    queue_number = generate_queue_number(priority, campus=requester.campus)
     timestamp = now()
 
     txn_nf1 = TransactionNF1.create_from_requester(
@@ -381,19 +326,10 @@ def new_enrollee_quick_queue(request):
     txn_nf1.priority = priority
     txn_nf1.created_at = timestamp
     txn_nf1.save(update_fields=["status", "priority", "created_at"])
+    transaction.on_commit(lambda: dispatch_engine.enqueue(txn_nf1))
 
-    Transaction.objects.create(
-        queueNumber=txn_nf1.queueNumber,
-        transactionType=txn_nf1.transactionType,
-        status=txn_nf1.status,
-        priority=txn_nf1.priority,
-        onHoldCount=txn_nf1.onHoldCount,
-        created_at=txn_nf1.created_at,
-        reservedBy=txn_nf1.reservedBy,
-        student=txn_nf1.student,
-        new_enrollee=txn_nf1.new_enrollee,
-        guest=txn_nf1.guest,
-    )
+    mirror_created(txn_nf1)
+    events.publish(events.ENQUEUE, campus=txn_nf1.campus)
 
     print_queue_slip(txn_nf1.queueNumber, txn_nf1.transactionType)
     messages.success(request, f"Quick queue created for {transaction_for}: {txn_nf1.queueNumber}")
@@ -426,7 +362,7 @@ def guest_quick_queue(request):
         requester.save(update_fields=["priority"])
 
     priority = requester.priority
-    queue_number = generate_queue_number(priority)
+    queue_number = generate_queue_number(priority, campus=requester.campus)
     timestamp = now()
 
     txn_nf1 = TransactionNF1.create_from_requester(
@@ -438,19 +374,10 @@ def guest_quick_queue(request):
     txn_nf1.priority = priority
     txn_nf1.created_at = timestamp
     txn_nf1.save(update_fields=["status", "priority", "created_at"])
+    transaction.on_commit(lambda: dispatch_engine.enqueue(txn_nf1))
 
-    Transaction.objects.create(
-        queueNumber=txn_nf1.queueNumber,
-        transactionType=txn_nf1.transactionType,
-        status=txn_nf1.status,
-        priority=txn_nf1.priority,
-        onHoldCount=txn_nf1.onHoldCount,
-        created_at=txn_nf1.created_at,
-        reservedBy=txn_nf1.reservedBy,
-        student=txn_nf1.student,
-        new_enrollee=txn_nf1.new_enrollee,
-        guest=txn_nf1.guest,
-    )
+    mirror_created(txn_nf1)
+    events.publish(events.ENQUEUE, campus=txn_nf1.campus)
 
     print_queue_slip(txn_nf1.queueNumber, txn_nf1.transactionType)
     messages.success(request, f"Quick queue created for {transaction_for}: {txn_nf1.queueNumber}")
@@ -488,31 +415,8 @@ import pytz
 from core.models import User, TransactionNF1
 
 def live_queue_status(request):
-    # Set timezone to Asia/Manila
-    manila_tz = pytz.timezone("Asia/Manila")
-    today = timezone.now().astimezone(manila_tz).date()
-
-    # Get online users
-    online_users = User.objects.filter(isOnline=True)
-
-    # Get in-process transactions reserved by online users, created/updated today
-    transactions = TransactionNF1.objects.filter(
-        reservedBy__in=online_users,
-        status=TransactionNF1.Status.IN_PROCESS,
-        updated_at__date=today
-    ).select_related('reservedBy')
-
-    # Format response
-    result = [
-        {
-            "window": t.reservedBy.windowNum,
-            "queue_number": t.queueNumber,
-            "status": t.status
-        }
-        for t in transactions
-    ]
-
-    return JsonResponse(result, safe=False)
+    # In-process tickets of online windows, served from the shared snapshot
+    return snapshot_response(request, "live_queue_status", build_live_queue_status)
 
 
 def live_queue_page(request):
@@ -520,45 +424,7 @@ def live_queue_page(request):
 
 # Re
 def public_next_queues(request):
-    today = localdate()
-    qs = Transaction.objects.filter(
-        status=Transaction.Status.ON_QUEUE,
-        reservedBy__isnull=True,
-        created_at__date=today
-    ).order_by('created_at')
-
-    priority_queues = [
-        {
-            "queue_number": txn.queueNumber,
-            "created_at": localtime(txn.created_at).strftime("%H:%M"),
-        }
-        for txn in qs.filter(priority=True)[:5]
-    ]
-
-    standard_queues = [
-        {
-            "queue_number": txn.queueNumber,
-            "created_at": localtime(txn.created_at).strftime("%H:%M"),
-        }
-        for txn in qs.filter(priority=False)[:5]
-    ]
-
-    on_hold_queues = [
-        {
-            "queue_number": txn.queueNumber,
-            "created_at": localtime(txn.created_at).strftime("%H:%M"),
-        }
-        for txn in Transaction.objects.filter(
-            status=Transaction.Status.ON_HOLD,
-            created_at__date=today
-        ).order_by('created_at')
-    ]
-
-    return JsonResponse({
-        "priority": priority_queues,
-        "standard": standard_queues,
-        "on_hold": on_hold_queues
-    })
+    return snapshot_response(request, "public_next_queues", build_public_next_queues)
 
 
 # Lost QR Code
@@ -580,30 +446,10 @@ def recover_qr(request):
             try:
                 student = Student.objects.get(email=email)
 
-                # Generate QR code
-                qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H)
-                qr.add_data(student.qrId)
-                qr.make(fit=True)
-                img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
-
-                # Add logo if available
-                logo_path = 'static/aulogo.png'
-                try:
-                    logo = Image.open(logo_path)
-                    base_width = img.size[0] // 4
-                    w_percent = base_width / float(logo.size[0])
-                    h_size = int((float(logo.size[1]) * w_percent))
-                    logo = logo.resize((base_width, h_size), Image.Resampling.LANCZOS)
-                    pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
-                    img.paste(logo, pos, mask=logo if logo.mode == 'RGBA' else None)
-                except FileNotFoundError:
+                # Stored QR code (rendered with the logo if available)
+                if not qr.has_logo():
                     messages.warning(request, "QR sent without logo: logo file not found.")
-
-                # Save QR to bytes
-                buffer = io.BytesIO()
-                img.save(buffer, format='PNG')
-                buffer.seek(0)
-                qr_bytes = buffer.read()
+                qr_bytes = qr.student_qr_png(student)
 
                 # Email details
                 subject = 'Your Student QR Code (Recovery)'
@@ -630,3 +476,52 @@ def recover_qr(request):
         form = QRRecoveryForm()
 
     return render(request, 'request/recover_qr.html', {'form': form})
+
+
+# Live queue event stream (server-sent events)
+
+import asyncio
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+EVENT_STREAM_POLL_SECONDS = 0.5
+EVENT_STREAM_HEARTBEAT_SECONDS = 15
+
+
+async def queue_event_stream(request):
+    """
+    Pushes a `queue` event whenever the queue changes (enqueue, reserve, complete,
+    hold, cut-off). Only served under ASGI with a shared cache; otherwise the
+    answer is 204 and clients stay on their polling fallback, either to avoid
+    pinning a WSGI worker or because events from other workers would be missed.
+    """
+    if not isinstance(request, ASGIRequest) or not events.shared():
+        return HttpResponse(status=204)
+
+    async def stream():
+        version = await cache.aget(events.VERSION_KEY, 0)
+        idle = 0.0
+
+        # Let the client reconnect quickly and start from the current state
+        yield f"retry: 3000\n\n{events.format_sse({'version': version, 'event': 'hello'})}"
+
+        while True:
+            await asyncio.sleep(EVENT_STREAM_POLL_SECONDS)
+            latest = await cache.aget(events.VERSION_KEY, 0)
+
+            if latest != version:
+                version = latest
+                idle = 0.0
+                payload = await cache.aget(events.LAST_EVENT_KEY) or {"version": version}
+                yield events.format_sse(payload)
+            else:
+                idle += EVENT_STREAM_POLL_SECONDS
+                if idle >= EVENT_STREAM_HEARTBEAT_SECONDS:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+    return response
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user'
+
+    def ready(self):
+        from core.signals import queue_changed
+        from .stats_cache import on_queue_changed
+
+        # Queue changes invalidate the cached statistics payloads
+        queue_changed.connect(on_queue_changed, dispatch_uid="stats_cache_invalidate")
@@ -0,0 +1,519 @@
+"""
+Payload builders for the admin statistics charts.
+
+Each builder takes the shared filters and a `counts` source with the
+signature of statistics.grouped_counts. The single-chart views pass
+grouped_counts itself (one GROUP BY per chart); the batch endpoint passes a
+SharedAggregate so every requested chart is served from one aggregation.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.utils.timezone import localdate, localtime, now
+
+from core.models import TransactionNF1
+from . import stats_cache
+from .statistics import get_date_range, grouped_counts
+
+
+TRANSACTION_FOR_CHOICES = [
+    ('enrollment', 'Enrollment'),
+    ('sem_1', 'Sem 1'),
+    ('sem_2', 'Sem 2'),
+    ('summer', 'Summer'),
+    ('off_term', 'Off Term'),
+]
+
+
+def _transaction_type_label(value):
+    return value.strip().title() if value else "Unknown"
+
+
+def generate_status_colors(n):
+    base = ['#36A2EB', '#FF6384', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40']
+    return [base[i % len(base)] for i in range(n)]
+
+
+def priority_start_date(time_filter):
+    """Start day of the priority breakdown, which only supports three periods."""
+    today = localdate()
+    if time_filter == "last_7_days":
+        return today - timedelta(days=6)
+    elif time_filter == "this_month":
+        return today.replace(day=1)
+    elif time_filter == "today":
+        return today
+    return None
+
+
+def statistics_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"labels": [], "datasets": []}
+
+    rows = counts(filters, 'day', 'campus', days=date_range, status=TransactionNF1.Status.COMPLETED)
+
+    # Grouping data
+    results = {str(day): {} for day in date_range}
+    for row in rows:
+        results.setdefault(str(row['day']), {})[row['campus']] = row['count']
+
+    all_campuses = sorted({camp for day in results.values() for camp in day})
+    datasets = []
+
+    for campus_name in all_campuses:
+        data = [results[str(d)].get(campus_name, 0) for d in date_range]
+        datasets.append({
+            "label": campus_name,
+            "data": data
+        })
+
+    return {
+        "labels": [str(d) for d in date_range],
+        "datasets": datasets
+    }
+
+
+def transaction_type_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"labels": [], "datasets": []}
+
+    rows = counts(filters, 'transactionType', since=date_range[0], status__iexact="completed")
+
+    # Types differing only in case/whitespace are merged
+    totals = defaultdict(int)
+    for row in rows:
+        totals[_transaction_type_label(row['transactionType'])] += row['count']
+
+    # Sort descending by count
+    sorted_items = sorted(totals.items(), key=lambda x: x[1], reverse=True)
+    labels = [k for k, v in sorted_items]
+    data = [v for k, v in sorted_items]
+
+    return {
+        "labels": labels,
+        "datasets": [{
+            "label": "Completed Transactions",
+            "data": data,
+            "backgroundColor": "rgba(75, 192, 192, 0.7)"
+        }]
+    }
+
+
+def status_donut_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"labels": [], "datasets": []}
+
+    rows = counts(filters, 'status', since=date_range[0])
+
+    # Count each status
+    totals = defaultdict(int)
+    for row in rows:
+        totals[row['status'].lower()] += row['count']
+
+    if not totals:
+        return {"labels": [], "data": []}
+
+    # Format labels like "Completed: 35 (52%)"
+    total = sum(totals.values())
+    labels = []
+    data = []
+    for k, v in sorted(totals.items()):
+        label = f"{k.replace('_', ' ').title()}: {v} ({(v/total)*100:.2f}%)"
+        labels.append(label)
+        data.append(v)
+
+    return {
+        "labels": labels,
+        "datasets": [{
+            "data": data,
+            "backgroundColor": generate_status_colors(len(data))
+        }]
+    }
+
+
+def status_by_department_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"labels": [], "datasets": []}
+
+    rows = counts(
+        filters, 'department', 'status',
+        since=date_range[0],
+        status__in=["completed", "cancelled", "cut_off"],
+    )
+
+    # Group counts by department and status
+    data = defaultdict(lambda: {"Completed": 0, "Cancelled": 0, "Cut Off": 0})
+
+    for row in rows:
+        dept = row['department'] or "Unknown"
+        status = row['status'].replace("_", " ").title()
+        data[dept][status] += row['count']
+
+    # Convert to Chart.js format
+    labels = sorted(data.keys())
+    status_keys = ["Completed", "Cancelled", "Cut Off"]
+    datasets = []
+
+    color_map = {
+        "Completed": "#4dc9f6",
+        "Cancelled": "#f67019",
+        "Cut Off": "#f53794"
+    }
+
+    for status in status_keys:
+        datasets.append({
+            "label": status,
+            "data": [data[dept].get(status, 0) for dept in labels],
+            "backgroundColor": color_map[status]
+        })
+
+    return {
+        "labels": labels,
+        "datasets": datasets
+    }
+
+
+def heatmap_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"series": [], "categories": []}
+
+    rows = counts(filters, 'day', 'transactionType', days=date_range)
+
+    # X-axis: Dates | Y-axis: Transaction Types
+    date_labels = [str(d) for d in date_range]
+    type_set = set()
+    totals = defaultdict(int)
+
+    for row in rows:
+        tx_type = _transaction_type_label(row['transactionType'])
+        type_set.add(tx_type)
+        totals[(tx_type, row['day'])] += row['count']
+
+    # Build ApexCharts series
+    series = []
+    for tx_type in sorted(type_set):
+        series.append({
+            "name": tx_type,
+            "data": [{"x": str(day), "y": totals.get((tx_type, day), 0)} for day in date_range]
+        })
+
+    return {
+        "series": series,
+        "categories": date_labels
+    }
+
+
+def hourly_heatmap_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"series": [], "categories": []}
+
+    rows = counts(filters, 'day', 'hour', days=date_range, status=TransactionNF1.Status.COMPLETED)
+
+    # Grouping by hour (Y) and date (X)
+    totals = {(f"{row['hour']:02}:00", str(row['day'])): row['count'] for row in rows}
+    dates = [str(d) for d in date_range]
+    hours = [f"{h:02}:00" for h in range(24)]  # 00:00 to 23:00
+
+    # Build ApexCharts-compatible data structure
+    series = []
+    for hour in hours:
+        series.append({
+            "name": hour,
+            "data": [{"x": day, "y": totals.get((hour, day), 0)} for day in dates]
+        })
+
+    return {
+        "series": series,
+        "categories": dates
+    }
+
+
+def forecast_payload(filters, counts=grouped_counts):
+    today = localdate()  # Asia/Manila local date
+    current_time = localtime(now())
+    time_filter = filters['time']
+
+    date_range = get_date_range(time_filter)
+    if not date_range:
+        return {"labels": [], "series": []}
+
+    # NumPy is only loaded once a forecast is actually drawn
+    from . import forecasting
+
+    # Closed days never change between cut-offs, so their day x hour counts are
+    # cached on the closed generation; only today's counts are read live.
+    closed_days = [d for d in date_range if d < today]
+    rows = []
+    if closed_days:
+        rows = stats_cache.memoize(
+            "forecast_history",
+            {**filters, 'days': f"{closed_days[0]}:{closed_days[-1]}"},
+            lambda: counts(filters, 'day', 'hour', days=closed_days, status=TransactionNF1.Status.COMPLETED),
+            live=False,
+        )
+    today_rows = counts(filters, 'day', 'hour', days=[today], status=TransactionNF1.Status.COMPLETED)
+
+    history_days = closed_days + ([today] if today in date_range else [])
+    matrix = forecasting.day_hour_matrix(rows + today_rows, history_days)
+    daily_totals = matrix.sum(axis=1)
+
+    # Average hourly pattern for forecasting
+    avg_by_hour = forecasting.hourly_profile(matrix)
+
+    # Labels and values (today's date shows as "Today")
+    labels = []
+    values = []
+
+    totals_by_day = dict(zip(history_days, daily_totals.astype(int).tolist()))
+    for d in date_range:
+        labels.append("Today" if d == today else str(d))
+        values.append(totals_by_day.get(d, 0))
+
+    # Today's actual + projected value
+    today_actual = sum(row['count'] for row in today_rows)
+    projected_remaining = forecasting.profile_forecast(avg_by_hour, current_time.hour + 1, 18)
+    projected_today = today_actual + projected_remaining
+
+    # Update or append today's forecasted value
+    if "Today" in labels:
+        values[labels.index("Today")] = round(projected_today)
+    else:
+        labels.append("Today")
+        values.append(round(projected_today))
+
+    # Forecast for next period (day/week/month)
+    if time_filter == "this_month":
+        next_month = today.month + 1 if today.month < 12 else 1
+        next_year = today.year if today.month < 12 else today.year + 1
+        next_label = f"{date(next_year, next_month, 1):%B}"
+        # Rough estimate: average daily * typical number of working days (22)
+        avg_daily = sum(values) / len(values) if values else 0
+        next_forecast = round(avg_daily * 22)
+
+    elif time_filter == "monthly":
+        # Next year forecast
+        next_label = str(today.year + 1)
+        avg_monthly = sum(values) / len(values) if values else 0
+        next_forecast = round(avg_monthly * 12)
+
+    else:
+        # Next day (Tomorrow)
+        next_label = "Tomorrow"
+        season = forecasting.seasonal_model(history_days, daily_totals)
+        next_forecast = forecasting.profile_forecast(
+            avg_by_hour, 6, 18, season.factor(today + timedelta(days=1))
+        )
+
+    labels.append(next_label)
+    values.append(round(next_forecast))
+
+    return {
+        "labels": labels,
+        "series": values,
+        "actual_today": today_actual
+    }
+
+
+def average_processing_time_payload(filters, counts=grouped_counts):
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"average_minutes": 0}
+
+    totals = counts(filters, days=date_range, with_processing=True, status=TransactionNF1.Status.COMPLETED)
+    count = sum(row['count'] for row in totals)
+    seconds = sum(row['processing_seconds'] for row in totals)
+
+    return {"average_minutes": round(seconds / count / 60, 2) if count else 0}
+
+
+def sem_transaction_type_payload(filters, counts=grouped_counts):
+    valid_sems = ["sem_1", "sem_2", "summer"]
+    valid_tx_types = ["P1", "P2", "P3"]
+
+    date_range = get_date_range(filters['time'])
+    if not date_range:
+        return {"categories": valid_tx_types, "series": []}
+
+    rows = counts(
+        dict(filters, transaction_for=None),  # the chart is split by semester itself
+        'transaction_for', 'transactionType',
+        days=date_range,
+        status=TransactionNF1.Status.COMPLETED,
+        transaction_for__in=valid_sems,
+        transactionType__in=valid_tx_types,
+    )
+
+    grouped = defaultdict(lambda: defaultdict(int))  # sem -> tx_type -> count
+    sem_labels = dict(TRANSACTION_FOR_CHOICES)
+
+    for row in rows:
+        sem = sem_labels.get(row['transaction_for'], row['transaction_for'])
+        grouped[sem][row['transactionType'].upper()] += row['count']
+
+    sems = [label for key, label in TRANSACTION_FOR_CHOICES if key in valid_sems]
+
+    series = []
+    for sem in sems:
+        series.append({"name": sem, "data": [grouped[sem].get(tx_type, 0) for tx_type in valid_tx_types]})
+
+    return {
+        "categories": valid_tx_types,
+        "series": series
+    }
+
+
+def priority_breakdown_payload(filters, counts=grouped_counts):
+    """Returns None for time filters the breakdown does not support."""
+    time_filter = filters['time']
+    start_date = priority_start_date(time_filter)
+    if start_date is None:
+        return None
+
+    # Only completed transactions, counted per priority flag
+    rows = counts(filters, 'priority', since=start_date, status__iexact="completed")
+    totals = {row['priority']: row['count'] for row in rows}
+
+    values = [totals.get(False, 0), totals.get(True, 0)]
+    total = sum(values)
+    percentages = [(v / total * 100 if total else 0) for v in values]
+
+    return {
+        "time_filter": time_filter.replace("_", " ").title(),
+        "department": filters['department'],
+        "course": filters['course'],
+        "campus": filters['campus'],
+        "non_priority": {
+            "count": values[0],
+            "percentage": round(percentages[0], 2)
+        },
+        "priority": {
+            "count": values[1],
+            "percentage": round(percentages[1], 2)
+        }
+    }
+
+
+# Chart ids accepted by the batch endpoint
+CHARTS = {
+    "statistics": statistics_payload,
+    "transaction_types": transaction_type_payload,
+    "status_donut": status_donut_payload,
+    "status_by_department": status_by_department_payload,
+    "heatmap_time": heatmap_payload,
+    "heatmap_hourly": hourly_heatmap_payload,
+    "forecast": forecast_payload,
+    "avg_processing_time": average_processing_time_payload,
+    "sem_tx_grouped": sem_transaction_type_payload,
+    "priority_breakdown": priority_breakdown_payload,
+}
+
+
+class SharedAggregate:
+    """
+    One grouped aggregation over every dimension the charts use, re-grouped in
+    Python for each chart. Drop-in replacement for grouped_counts as long as the
+    charts ask for days on or after `since` and the same filters apart from
+    transaction_for.
+    """
+
+    DIMENSIONS = ('day', 'hour', 'campus', 'department', 'status', 'transactionType', 'transaction_for', 'priority')
+
+    def __init__(self, filters, since):
+        self.since = since
+        # transaction_for is applied per chart, since some charts ignore it
+        self.rows = grouped_counts(
+            dict(filters, transaction_for=None),
+            *self.DIMENSIONS,
+            since=since,
+            with_processing=True,
+        )
+
+    @staticmethod
+    def _matches(row, lookups):
+        for lookup, value in lookups.items():
+            field, _, op = lookup.partition('__')
+            if op == 'in':
+                if row[field] not in value:
+                    return False
+            elif op == 'iexact':
+                if (row[field] or "").lower() != str(value).lower():
+                    return False
+            elif row[field] != value:
+                return False
+        return True
+
+    def __call__(self, filters, *dimensions, days=None, since=None, with_processing=False, **extra):
+        if filters.get('transaction_for'):
+            extra['transaction_for'] = filters['transaction_for']
+        wanted_days = set(days) if days else None
+
+        grouped = {}
+        for row in self.rows:
+            if wanted_days is not None and row['day'] not in wanted_days:
+                continue
+            if since and row['day'] < since:
+                continue
+            if not self._matches(row, extra):
+                continue
+
+            key = tuple(row[name] for name in dimensions)
+            group = grouped.get(key)
+            if group is None:
+                group = grouped[key] = dict(zip(dimensions, key), count=0, processing_seconds=0)
+            group['count'] += row['count']
+            group['processing_seconds'] += row['processing_seconds']
+
+        return list(grouped.values())
+
+
+# Charts counting every day from the period start rather than the listed days
+SINCE_CHARTS = {"transaction_types", "status_donut", "status_by_department", "priority_breakdown"}
+
+
+def is_live(chart_id, filters):
+    """Whether the chart's period includes today (and so changes with the queue)."""
+    if chart_id == "forecast" or chart_id in SINCE_CHARTS:
+        return True
+    date_range = get_date_range(filters['time'])
+    return bool(date_range) and max(date_range) >= localdate()
+
+
+def cached_chart(chart_id, filters):
+    """Payload of one chart, memoized in the statistics cache."""
+    return stats_cache.memoize(
+        chart_id, filters,
+        lambda: CHARTS[chart_id](filters),
+        live=is_live(chart_id, filters),
+    )
+
+
+def _compute_charts(filters, chart_ids):
+    """Payloads of `chart_ids` computed from a single shared aggregation."""
+    date_range = get_date_range(filters['time'])
+    starts = [min(date_range)] if date_range else []
+    if "priority_breakdown" in chart_ids and priority_start_date(filters['time']):
+        starts.append(priority_start_date(filters['time']))
+
+    counts = SharedAggregate(filters, min(starts)) if starts else grouped_counts
+
+    payload = {}
+    for chart_id in chart_ids:
+        result = CHARTS[chart_id](filters, counts)
+        payload[chart_id] = result if result is not None else {"error": "Invalid time filter"}
+    return payload
+
+
+def build_charts(filters, chart_ids):
+    """Payloads of `chart_ids`, from the cache where possible and one shared aggregation otherwise."""
+    return stats_cache.memoize_many(
+        chart_ids, filters,
+        lambda missing: _compute_charts(filters, missing),
+        live=lambda chart_id: is_live(chart_id, filters),
+    )
@@ -0,0 +1,225 @@
+"""
+In-process dispatch engine for the cashier windows.
+
+Today's ON_QUEUE transactions are kept in per-campus priority and standard
+lanes (heaps ordered by created_at), rebuilt from the database on first use
+each day and kept in sync by the enqueue hooks. Picking the next ticket is a
+heap pop; the conditional UPDATE that reserves it stays the durable record,
+so a ticket that another worker already took is simply skipped. A claimed
+ticket is held aside until its transaction commits; if it rolls back, the
+next sync finds the ticket still waiting and puts it back in its lane.
+
+Syncs pull tickets above the high-water mark of the pull before last, so a
+ticket that commits after a higher pk was already pulled is still found on
+the next pull. A full re-sync every QUEUE_DISPATCH_RESYNC_SECONDS catches
+tickets that commit later than that.
+
+The MIXED rotation is tracked per window campus, one QueueState row each; a
+MIXED dispatch locks its campus's row, so windows in every worker process
+follow one P, P, S, S cycle.
+"""
+
+import heapq
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from core.models import QueueState, TransactionNF1
+from core.timeutils import on_day
+
+
+MIXED_PATTERN = [True, True, False, False]  # P, P, S, S
+
+
+def _lane_campus(campus):
+    # Guests carry upper-case campus names ("SOUTH"), so lanes match case-insensitively
+    return (campus or "").strip().lower()
+
+
+class DispatchEngine:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day = None
+        self._lanes = {}          # (campus, priority) -> heap of (created_at, pk)
+        self._known = set()       # pks currently held in a lane
+        self._high_water = 0      # highest pk pulled from the database
+        self._pulled_from = 0     # high-water mark before the last pull; the next one re-scans from here
+        self._in_flight = {}      # claimed pk -> (campus, priority, created_at, claimed at) until commit
+        self._synced_at = 0.0
+        self._resynced_at = 0.0
+
+    # -- lane maintenance ------------------------------------------------
+
+    def _sync_interval(self):
+        return getattr(settings, 'QUEUE_DISPATCH_SYNC_SECONDS', 1.0)
+
+    def _resync_interval(self):
+        return getattr(settings, 'QUEUE_DISPATCH_RESYNC_SECONDS', 30.0)
+
+    def _ready_queryset(self):
+        return TransactionNF1.objects.filter(
+            status=TransactionNF1.Status.ON_QUEUE,
+            reservedBy__isnull=True,
+            **on_day('created_at', self._day),
+        )
+
+    def _push(self, pk, campus, priority, created_at):
+        if pk in self._known:
+            return
+        self._known.add(pk)
+        lane = (_lane_campus(campus), bool(priority))
+        heapq.heappush(self._lanes.setdefault(lane, []), (created_at, pk))
+
+    def _pull(self, qs):
+        for pk, campus, priority, created_at in qs.values_list('pk', 'campus', 'priority', 'created_at'):
+            if pk not in self._in_flight:  # _recover() decides on claimed tickets
+                self._push(pk, campus, priority, created_at)
+            self._high_water = max(self._high_water, pk)
+        self._synced_at = time.monotonic()
+
+    def _rebuild(self):
+        self._day = localdate()
+        self._lanes = {}
+        self._known = set()
+        self._high_water = 0
+        self._pulled_from = 0
+        self._in_flight = {}
+        self._pull(self._ready_queryset())
+        self._resynced_at = self._synced_at
+
+    def _ensure_fresh(self, full=False):
+        if full or self._day != localdate():
+            self._rebuild()
+        elif time.monotonic() - self._synced_at >= self._sync_interval():
+            self._recover()
+            ready = self._ready_queryset()
+            floor, self._pulled_from = self._pulled_from, self._high_water
+            if time.monotonic() - self._resynced_at >= self._resync_interval():
+                self._pull(ready)
+                self._resynced_at = self._synced_at
+            else:
+                # Tickets issued by other worker processes since the pull before last
+                self._pull(ready.filter(pk__gt=floor))
+
+    def _recover(self):
+        """Put back claimed tickets whose transaction rolled back (still waiting after a sync interval)."""
+        cutoff = time.monotonic() - self._sync_interval()
+        stale = [pk for pk, entry in self._in_flight.items() if entry[3] <= cutoff]
+        if not stale:
+            return
+        waiting = set(self._ready_queryset().filter(pk__in=stale).values_list('pk', flat=True))
+        for pk in stale:
+            campus, priority, created_at, _ = self._in_flight.pop(pk)
+            if pk in waiting:
+                self._push(pk, campus, priority, created_at)
+
+    def reset(self):
+        with self._lock:
+            self._day = None
+
+    def enqueue(self, txn):
+        """Add a freshly issued transaction to its lane."""
+        with self._lock:
+            if self._day != localdate():
+                return  # picked up by the rebuild on next dispatch
+            self._push(txn.pk, txn.campus, txn.priority, txn.created_at)
+
+    # -- dispatch --------------------------------------------------------
+
+    def _pop(self, campus, priority):
+        """Pop the oldest ticket of one lane kind, across campuses when campus is blank."""
+        if campus:
+            keys = [(campus, priority)]
+        else:
+            keys = [key for key in self._lanes if key[1] == priority]
+
+        heads = [(self._lanes[key][0], key) for key in keys if self._lanes.get(key)]
+        if not heads:
+            return None
+
+        _, key = min(heads)
+        created_at, pk = heapq.heappop(self._lanes[key])
+        self._known.discard(pk)
+        return pk, key, created_at
+
+    def _lane_order(self, user, rotation=None):
+        mode = user.process_mode
+        if mode == user.ProcessMode.PRIORITY_ONLY:
+            return [True]
+        if mode == user.ProcessMode.STANDARD_ONLY:
+            return [False]
+        if mode == user.ProcessMode.MIXED:
+            expected = MIXED_PATTERN[rotation.position % len(MIXED_PATTERN)]
+            return [expected, not expected]
+        return [True, False]
+
+    def _rotation(self, campus):
+        """This campus's QueueState row, locked until the caller's transaction ends."""
+        state = QueueState.for_campus(campus)
+        return QueueState.objects.select_for_update().get(pk=state.pk)
+
+    def _claim(self, pk, user):
+        return TransactionNF1.objects.filter(
+            pk=pk,
+            status=TransactionNF1.Status.ON_QUEUE,
+            reservedBy__isnull=True,
+        ).update(status=TransactionNF1.Status.IN_PROCESS, reservedBy=user)
+
+    def dispatch(self, user):
+        """
+        Reserve the next transaction for `user` and return it, or None.
+        Must run inside the caller's transaction.atomic() block.
+        """
+        campus = _lane_campus(getattr(user, 'campus', ""))
+        mixed = user.process_mode == user.ProcessMode.MIXED
+        # Read under the row lock, so two windows never serve the same step of the cycle
+        rotation = self._rotation(user.campus) if mixed else None
+        lane_order = self._lane_order(user, rotation)
+
+        for attempt in range(2):
+            with self._lock:
+                # An empty view may just be stale: rebuild from the database once before giving up
+                self._ensure_fresh(full=attempt > 0)
+
+            for index, priority in enumerate(lane_order):
+                while True:
+                    with self._lock:
+                        popped = self._pop(campus, priority)
+                    if popped is None:
+                        break
+                    pk, (lane, lane_priority), created_at = popped
+                    try:
+                        claimed = self._claim(pk, user)
+                    except Exception:
+                        with self._lock:
+                            self._push(pk, lane, lane_priority, created_at)
+                        raise
+                    if not claimed:
+                        continue  # taken by another window or cut off
+                    self._hold(pk, lane, lane_priority, created_at)
+
+                    if mixed and index == 0:
+                        rotation.advance()
+                    return TransactionNF1.objects.get(pk=pk)
+
+        return None
+
+    def _hold(self, pk, campus, priority, created_at):
+        with self._lock:
+            self._in_flight[pk] = (campus, priority, created_at, time.monotonic())
+
+        def settle():
+            with self._lock:
+                self._in_flight.pop(pk, None)
+
+        transaction.on_commit(settle)
+
+    def rotation_position(self, campus):
+        """Current MIXED rotation index for windows of `campus` (blank = all campuses), unlocked."""
+        return QueueState.objects.filter(campus=campus or "").values_list('position', flat=True).first() or 0
+
+
+dispatch_engine = DispatchEngine()
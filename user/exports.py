@@ -0,0 +1,234 @@
+"""
+Bulk export of TransactionNF1 for offline analysis.
+
+Rows are read with values_list().iterator() and written out as they arrive,
+so memory stays flat however many rows match. The filters are the statistics
+filters (statistics.filters_from_request); an explicit start_date/end_date
+(YYYY-MM-DD, local days) overrides the time filter for ranges such as a
+whole semester.
+
+CSV is always available. Arrow (IPC stream) and Parquet need pyarrow, which is
+imported on first use only.
+
+Under ASGI, Django consumes a sync streaming iterator by collecting it whole in
+a worker thread. The CSV and Arrow streams are therefore handed to ASGI servers
+wrapped by astream(), which reads each chunk through sync_to_async.
+"""
+
+import csv
+import tempfile
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import Case, CharField, Value, When
+from django.utils.dateparse import parse_date
+from django.utils.timezone import get_current_timezone, localdate
+
+from core.timeutils import day_bounds
+from .statistics import filtered_queryset, get_date_range
+
+
+CHUNK_SIZE = 2000
+
+# (column, field path or annotation name)
+COLUMNS = [
+    ('id', 'id'),
+    ('queue_number', 'queueNumber'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('status', 'status'),
+    ('transaction_type', 'transactionType'),
+    ('transaction_for', 'transaction_for'),
+    ('priority', 'priority'),
+    ('on_hold_count', 'onHoldCount'),
+    ('campus', 'campus'),
+    ('department', 'course__department__name'),
+    ('course', 'course__name'),
+    ('year_level', 'student__year_level'),
+    ('requester_type', 'requester_type'),
+    ('student_id', 'student__studentId'),
+    ('cashier', 'reservedBy__name'),
+    ('window', 'reservedBy__windowNum'),
+]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def export_period(filters, start_date=None, end_date=None):
+    """filtered_queryset() kwargs for the export period."""
+    if start_date or end_date:
+        start = parse_date(start_date) if start_date else None
+        end = parse_date(end_date) if end_date else localdate()
+        if (start_date and not start) or not end:
+            raise ExportError("Dates must be in YYYY-MM-DD format.")
+        if start is None:
+            return {'created_at__lt': day_bounds(end)[1]}
+        if start > end:
+            raise ExportError("start_date is after end_date.")
+        return {'days': [start + timedelta(days=i) for i in range((end - start).days + 1)]}
+
+    days = get_date_range(filters['time'])
+    if not days:
+        raise ExportError("Invalid time filter.")
+    if filters['time'] == "monthly":
+        # Month starts of this year; export the whole year to date
+        return {'since': days[0]}
+    return {'days': days}
+
+
+def export_queryset(filters, start_date=None, end_date=None):
+    """values_list() rows in COLUMNS order, oldest first."""
+    queryset = filtered_queryset(filters, **export_period(filters, start_date, end_date))
+    return (
+        queryset
+        .annotate(requester_type=Case(
+            When(student__isnull=False, then=Value('student')),
+            When(new_enrollee__isnull=False, then=Value('new_enrollee')),
+            When(guest__isnull=False, then=Value('guest')),
+            default=Value(''),
+            output_field=CharField(),
+        ))
+        .order_by('created_at', 'id')
+        .values_list(*(path for _, path in COLUMNS))
+    )
+
+
+def _rows(queryset):
+    tz = get_current_timezone()
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        # created_at / updated_at as Asia/Manila local time
+        yield row[:2] + (row[2].astimezone(tz), row[3].astimezone(tz)) + row[4:]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    """CSV text, one chunk per CHUNK_SIZE rows."""
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow([name for name, _ in COLUMNS])]
+    for row in _rows(queryset):
+        lines.append(writer.writerow(row[:2] + (row[2].isoformat(), row[3].isoformat()) + row[4:]))
+        if len(lines) >= CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def _schema():
+    import pyarrow as pa
+
+    tz = str(get_current_timezone())
+    types = {
+        'id': pa.int64(), 'priority': pa.bool_(), 'on_hold_count': pa.int32(),
+        'year_level': pa.int32(), 'window': pa.int32(),
+        'created_at': pa.timestamp('us', tz=tz), 'updated_at': pa.timestamp('us', tz=tz),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name, _ in COLUMNS])
+
+
+def _record_batches(queryset, schema):
+    import pyarrow as pa
+
+    def to_batch(rows):
+        columns = zip(*rows)
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+    rows = []
+    for row in _rows(queryset):
+        rows.append(row)
+        if len(rows) == CHUNK_SIZE:
+            yield to_batch(rows)
+            rows = []
+    if rows:
+        yield to_batch(rows)
+
+
+class _Collector:
+    """Writable file-like object collecting what pyarrow writes until drained."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def stream_arrow(queryset):
+    """Arrow IPC stream, one record batch per CHUNK_SIZE rows."""
+    import pyarrow as pa
+
+    schema = _schema()
+    sink = _Collector()
+    writer = pa.ipc.new_stream(sink, schema)
+    for batch in _record_batches(queryset, schema):
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+async def astream(chunks):
+    """
+    Async iterator over the sync iterator `chunks` (stream_csv, stream_arrow),
+    reading each chunk in the thread the queryset's connection belongs to.
+    """
+    done = object()
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await step(chunks, done)) is not done:
+            yield chunk
+    finally:
+        # Closes the server-side cursor when the client goes away early
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def write_parquet(queryset):
+    """
+    Parquet to a temporary file, one row group per CHUNK_SIZE rows (Parquet
+    keeps its footer at the end, so it cannot be streamed directly).
+    """
+    import pyarrow.parquet as pq
+
+    schema = _schema()
+    output = tempfile.TemporaryFile()
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in _record_batches(queryset, schema):
+            writer.write_batch(batch)
+    output.seek(0)
+    return output
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
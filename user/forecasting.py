@@ -0,0 +1,170 @@
+"""
+Lightweight forecasting for the admin dashboard.
+
+Everything here is closed-form NumPy over small aggregated arrays (daily
+totals, day x hour count matrices), so a forecast costs microseconds and no
+model fitting library is needed. Seasonal adjustments are pluggable: pick
+one with settings.FORECAST_SEASONAL_MODEL (see SEASONAL_MODELS).
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+
+
+def linear_trend(series, steps_ahead=1):
+    """
+    Ordinary least squares line through each row of `series` (k x n, one row
+    per series, evenly spaced points), evaluated `steps_ahead` points past the
+    end. Same result as fitting LinearRegression on x = 0..n-1 per row.
+    """
+    y = np.atleast_2d(np.asarray(series, dtype=float))
+    n = y.shape[1]
+    if n == 0:
+        return np.zeros(y.shape[0])
+    if n == 1:
+        return y[:, 0]
+
+    x = np.arange(n, dtype=float)
+    x_mean = x.mean()
+    y_mean = y.mean(axis=1)
+    slope = ((x - x_mean) * (y - y_mean[:, None])).sum(axis=1) / ((x - x_mean) ** 2).sum()
+    intercept = y_mean - slope * x_mean
+    return intercept + slope * (n - 1 + steps_ahead)
+
+
+def day_hour_matrix(rows, days):
+    """Turn grouped rows with 'day', 'hour' and 'count' into a len(days) x 24 matrix."""
+    index = {day: i for i, day in enumerate(days)}
+    matrix = np.zeros((len(days), 24))
+    for row in rows:
+        i = index.get(row['day'])
+        if i is not None and row['hour'] is not None:
+            matrix[i, row['hour']] += row['count']
+    return matrix
+
+
+def hourly_profile(matrix):
+    """Average count per hour of day over the days that had any activity."""
+    active_days = int((matrix.sum(axis=1) > 0).sum()) or 1
+    return matrix.sum(axis=0) / active_days
+
+
+# -- seasonal models ------------------------------------------------------
+
+
+class NoSeason:
+    """Every day looks the same."""
+
+    def fit(self, days, totals):
+        return self
+
+    def factor(self, day):
+        return 1.0
+
+
+class DayOfWeekSeason:
+    """Scales by how busy the target weekday was relative to the average active day."""
+
+    def fit(self, days, totals):
+        totals = np.asarray(totals, dtype=float)
+        weekdays = np.array([day.weekday() for day in days], dtype=int)
+        active = totals > 0
+
+        self.factors = np.ones(7)
+        if active.any():
+            overall = totals[active].mean()
+            sums = np.bincount(weekdays[active], weights=totals[active], minlength=7)
+            seen = np.bincount(weekdays[active], minlength=7)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                factors = (sums / seen) / overall
+            self.factors = np.where(seen > 0, factors, 1.0)
+        return self
+
+    def factor(self, day):
+        return float(self.factors[day.weekday()])
+
+
+class SemesterPhaseSeason:
+    """
+    Scales by the week of the semester, counted from the nearest start in
+    settings.FORECAST_SEMESTER_STARTS (ISO dates). Without configured starts it
+    behaves like NoSeason.
+    """
+
+    PHASES = 20  # weeks tracked; later weeks share the last phase
+
+    def _phase(self, day):
+        starts = [s for s in self.starts if s <= day]
+        if not starts:
+            return None
+        return min((day - max(starts)).days // 7, self.PHASES - 1)
+
+    def fit(self, days, totals):
+        from datetime import date
+
+        self.starts = sorted(date.fromisoformat(s) for s in getattr(settings, 'FORECAST_SEMESTER_STARTS', []))
+        self.factors = {}
+
+        totals = [float(t) for t in totals]
+        active = [t for t in totals if t > 0]
+        if not self.starts or not active:
+            return self
+
+        overall = sum(active) / len(active)
+        by_phase = {}
+        for day, total in zip(days, totals):
+            phase = self._phase(day)
+            if phase is not None and total > 0:
+                by_phase.setdefault(phase, []).append(total)
+
+        self.factors = {phase: (sum(v) / len(v)) / overall for phase, v in by_phase.items()}
+        return self
+
+    def factor(self, day):
+        if not self.starts:
+            return 1.0
+        return self.factors.get(self._phase(day), 1.0)
+
+
+SEASONAL_MODELS = {
+    'none': NoSeason,
+    'day_of_week': DayOfWeekSeason,
+    'semester_phase': SemesterPhaseSeason,
+}
+
+
+def seasonal_model(days, totals, name=None):
+    """Fit the configured (or named) seasonal model on daily totals."""
+    name = name or getattr(settings, 'FORECAST_SEASONAL_MODEL', 'none')
+    return SEASONAL_MODELS.get(name, NoSeason)().fit(days, totals)
+
+
+# -- forecasts used by the views ------------------------------------------
+
+
+def trend_forecast(series_by_key, days, steps_ahead=1, season=None):
+    """
+    Next-day forecast per key from evenly spaced daily series (one OLS line per
+    key, all fitted at once), adjusted by the configured (or `season`) model.
+    """
+    keys = list(series_by_key)
+    if not keys:
+        return {}
+
+    predictions = linear_trend([series_by_key[key] for key in keys], steps_ahead)
+    target = days[-1] + timedelta(days=steps_ahead)
+
+    forecast = {}
+    for key, prediction in zip(keys, predictions):
+        model = seasonal_model(days, series_by_key[key], season)
+        forecast[key] = int(np.round(prediction * model.factor(target)))
+    return forecast
+
+
+def profile_forecast(profile, first_hour, last_hour, season_factor=1.0):
+    """Expected count between `first_hour` (inclusive) and `last_hour` (exclusive)."""
+    if first_hour >= last_hour:
+        return 0.0
+    return float(profile[max(first_hour, 0):last_hour].sum()) * season_factor
@@ -32,11 +32,12 @@ class QueueModeForm(forms.ModelForm):
 class CashierForm(forms.ModelForm):
     class Meta:
         model = User
-        fields = ['name', 'email', 'windowNum', 'process_mode', 'verified', 'isOnline']
+        fields = ['name', 'email', 'windowNum', 'campus', 'process_mode', 'verified', 'isOnline']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'email': forms.EmailInput(attrs={'class': 'form-control'}),
             'windowNum': forms.NumberInput(attrs={'class': 'form-control'}),
+            'campus': forms.Select(attrs={'class': 'form-select'}),
             'process_mode': forms.Select(attrs={'class': 'form-select'}),
             'verified': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'isOnline': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
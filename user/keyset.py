@@ -0,0 +1,105 @@
+"""
+Keyset (seek) pagination on (created_at, id).
+
+A page is fetched as `WHERE (created_at, id) < (last seen) ORDER BY created_at
+DESC, id DESC LIMIT n+1`, so any page costs the same as the first one and only
+that page is loaded. Positions travel as opaque cursor tokens; a token
+remembers whether it points forwards (older rows) or backwards (newer rows).
+"""
+
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk, backwards=False):
+    raw = f"{'p' if backwards else 'n'}|{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """(created_at, pk, backwards) of a cursor token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        direction, created_at, pk = raw.split("|")
+        if direction not in ("n", "p"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(created_at), int(pk), direction == "p"
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _seek(created_at, pk, older):
+    if older:
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = None      # Older rows
+    previous_cursor: str = None  # Newer rows
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def paginate(queryset, cursor=None, per_page=10):
+    """
+    One page of `queryset`, newest first. Only per_page + 1 rows are read;
+    items are model instances (or whatever the queryset yields).
+    """
+    backwards = False
+    if cursor:
+        created_at, pk, backwards = decode_cursor(cursor)
+        queryset = queryset.filter(_seek(created_at, pk, older=not backwards))
+
+    ordering = ('created_at', 'id') if backwards else ('-created_at', '-id')
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    # Whichever side we came from has rows (at least the cursor's own)
+    has_older = more if not backwards else True
+    has_newer = more if backwards else bool(cursor)
+
+    page = KeysetPage(items=rows)
+    if rows:
+        if has_older:
+            page.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk)
+        if has_newer:
+            page.previous_cursor = encode_cursor(rows[0].created_at, rows[0].pk, backwards=True)
+    return page
+
+
+def iterate(queryset, chunk_size=2000):
+    """
+    Every row of `queryset`, oldest first, read chunk_size rows per query.
+    Unlike .iterator() this keeps memory flat on backends without
+    server-side cursors (MySQL, SQL Server).
+    """
+    queryset = queryset.order_by('created_at', 'id')
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(_seek(last.created_at, last.pk, older=False))
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
@@ -0,0 +1,104 @@
+"""
+Per-window cashier KPIs for the admin dashboard.
+
+All windows are computed in one query: verified users LEFT JOIN their
+transactions of yesterday and today (a FilteredRelation, so older history is
+never joined), with one conditional aggregate per metric. New metrics are
+added to aggregates() (SQL side) and DERIVED (computed from the aggregated
+row), never as extra queries per cashier.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FilteredRelation, Min, Q, Sum
+from django.utils.timezone import localdate, now
+
+from core.models import TransactionNF1, User
+from core.timeutils import day_bounds
+
+
+def _processing_time():
+    return ExpressionWrapper(F('recent__updated_at') - F('recent__created_at'), output_field=DurationField())
+
+
+def aggregates(today_start):
+    """Aggregate expressions over the `recent` relation (yesterday + today)."""
+    completed = Q(recent__status=TransactionNF1.Status.COMPLETED)
+    today = Q(recent__created_at__gte=today_start)
+    yesterday = Q(recent__created_at__lt=today_start)
+
+    return {
+        'today': Count('recent', filter=completed & today),
+        'yesterday': Count('recent', filter=completed & yesterday),
+        # Tickets this window touched today, and how many of those went on hold
+        'handled_today': Count('recent', filter=today),
+        'held_today': Count('recent', filter=today & Q(recent__onHoldCount__gt=0)),
+        'service_time_today': Sum(_processing_time(), filter=completed & today),
+        'first_today': Min('recent__created_at', filter=today),
+    }
+
+
+def _throughput(row, current_time):
+    # Completed tickets per hour since the window's first ticket of the day
+    if not row['today'] or not row['first_today']:
+        return 0
+    hours = max((current_time - row['first_today']).total_seconds() / 3600, 1 / 60)
+    return round(row['today'] / hours, 2)
+
+
+def _avg_service_minutes(row, current_time):
+    if not row['today'] or not row['service_time_today']:
+        return 0
+    return round(row['service_time_today'].total_seconds() / row['today'] / 60, 2)
+
+
+def _hold_rate(row, current_time):
+    if not row['handled_today']:
+        return 0
+    return round(row['held_today'] / row['handled_today'] * 100, 2)
+
+
+DERIVED = {
+    'throughput_per_hour': _throughput,
+    'avg_service_minutes': _avg_service_minutes,
+    'hold_rate': _hold_rate,
+}
+
+
+def cashier_kpis():
+    """KPI rows for every verified window, ordered by window number."""
+    today = localdate()
+    today_start, today_end = day_bounds(today)
+    yesterday_start, _ = day_bounds(today - timedelta(days=1))
+    current_time = now()
+
+    rows = (
+        User.objects.filter(verified=True)
+        .annotate(recent=FilteredRelation(
+            'reserved_transactions',
+            condition=Q(
+                reserved_transactions__created_at__gte=yesterday_start,
+                reserved_transactions__created_at__lt=today_end,
+            ),
+        ))
+        .values('id', 'name', 'windowNum')
+        .annotate(**aggregates(today_start))
+        .order_by('windowNum')
+    )
+
+    results = []
+    for row in rows:
+        delta = row['today'] - row['yesterday']
+        result = {
+            "cashier_name": row['name'],
+            "window": row['windowNum'],
+            "today": row['today'],
+            "yesterday": row['yesterday'],
+            "delta": abs(delta),
+            "trend": "up" if delta > 0 else ("down" if delta < 0 else "equal"),
+        }
+        for name, compute in DERIVED.items():
+            result[name] = compute(row, current_time)
+        results.append(result)
+
+    return results
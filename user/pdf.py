@@ -0,0 +1,41 @@
+"""
+PDF rendering for the transaction reports.
+
+xhtml2pdf (and the reportlab/PIL stack behind it) is imported on first use,
+so workers that never print a report do not load it.
+"""
+
+from io import BytesIO
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+def render_pdf(html, dest):
+    """Render `html` into the file-like `dest`. Returns the pisa status (check `.err`)."""
+    from xhtml2pdf import pisa
+
+    return pisa.CreatePDF(src=html, dest=dest)
+
+
+class PdfAssembler:
+    """
+    Builds one PDF out of HTML parts rendered separately, so the layout engine
+    only ever holds one part. pypdf ships with xhtml2pdf.
+    """
+
+    def __init__(self):
+        from pypdf import PdfWriter
+
+        self.writer = PdfWriter()
+
+    def add_html(self, html):
+        buffer = BytesIO()
+        if render_pdf(html, buffer).err:
+            raise PdfRenderError("xhtml2pdf could not render a report part")
+        buffer.seek(0)
+        self.writer.append(buffer)
+
+    def write(self, dest):
+        self.writer.write(dest)
@@ -0,0 +1,314 @@
+"""
+Background PDF reports.
+
+Report views only record a ReportJob and hand it to a worker: a small
+in-process thread pool by default, or Celery with REPORT_RUNNER = "celery"
+(which needs a broker and a running `celery worker`). The worker streams the queryset in keyset-paginated chunks, renders ROWS_PER_PART
+rows at a time into their own PDF and appends those pages to the result, so
+neither the HTML nor xhtml2pdf's layout tree ever holds the whole report.
+Progress is kept on the job for the status endpoint. A job whose worker died
+is not left spinning: see recover_stale().
+
+New reports are added to REPORTS: a builder turning the stored params into
+(queryset, context, row), where `row` maps a queryset item to what the
+template iterates over as `transactions`.
+"""
+
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.template.loader import get_template
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate, now
+
+from core.models import Course, Department, ReportJob, TransactionNF1, User
+from core.timeutils import day_bounds
+from . import keyset
+from .pdf import PdfAssembler
+
+logger = logging.getLogger('custom_logger')
+
+
+ROWS_PER_PART = getattr(settings, 'REPORT_ROWS_PER_PART', 500)
+CHUNK_SIZE = 2000
+PENDING_GRACE = timedelta(minutes=2)  # A thread-pool job not started by then was lost with its process
+
+
+# -- report definitions ---------------------------------------------------
+
+
+def requester_row(txn):
+    requester = txn.get_requester()
+    return {
+        "queue": txn.queueNumber,
+        "id_number": getattr(requester, 'studentId', getattr(requester, 'qrId', 'N/A')),
+        "name": getattr(requester, 'name', str(requester)),
+        "role": type(requester).__name__ if requester else "Unknown",
+    }
+
+
+def _lookup(model, pk):
+    return model.objects.filter(pk=pk).first() if pk else None
+
+
+def cashier_transactions(params):
+    """Transactions handled by a cashier between optional dates, with the profile filters."""
+    from_date = parse_date(params.get("start_date") or "")
+    to_date = parse_date(params.get("end_date") or "")
+
+    transactions = TransactionNF1.objects.filter(reservedBy_id=params['cashier_id'])
+    if from_date:
+        transactions = transactions.filter(created_at__gte=day_bounds(from_date)[0])
+    if to_date:
+        transactions = transactions.filter(created_at__lt=day_bounds(to_date)[1])
+    if params.get("department"):
+        transactions = transactions.filter(course__department_id=params["department"])
+    if params.get("course"):
+        transactions = transactions.filter(course_id=params["course"])
+    if params.get("campus"):
+        transactions = transactions.filter(campus=params["campus"])
+
+    transactions = transactions.select_related("student", "guest", "new_enrollee").order_by('created_at', 'id')
+    return transactions, from_date, to_date
+
+
+def cashier_print_report(params):
+    transactions, from_date, to_date = cashier_transactions(params)
+    context = {
+        "cashier": User.objects.get(pk=params['cashier_id']),
+        "from_date": from_date,
+        "to_date": to_date,
+        "department": _lookup(Department, params.get("department")),
+        "course": _lookup(Course, params.get("course")),
+        "campus": params.get("campus"),
+    }
+    return transactions, context, requester_row
+
+
+def cashier_transactions_report(params):
+    transactions, from_date, to_date = cashier_transactions(params)
+    department = _lookup(Department, params.get("department"))
+    course = _lookup(Course, params.get("course"))
+    context = {
+        "cashier": User.objects.get(pk=params['cashier_id']),
+        "filters": {
+            "start_date": from_date.strftime("%Y-%m-%d") if from_date else "All",
+            "end_date": to_date.strftime("%Y-%m-%d") if to_date else "All",
+            "department": department.name if department else "All",
+            "course": course.name if course else "All",
+            "campus": params.get("campus") or "All",
+        }
+    }
+    return transactions, context, requester_row
+
+
+def transaction_report(params):
+    """All transactions since the start of the statistics period, with the statistics filters."""
+    time_filter = params.get("time") or "last_7_days"
+
+    today = localdate()
+    if time_filter == "this_month":
+        start_date = today.replace(day=1)
+    elif time_filter == "today":
+        start_date = today
+    else:
+        start_date = today - timedelta(days=6)
+
+    queryset = TransactionNF1.objects.filter(created_at__gte=day_bounds(start_date)[0])
+    if params.get("campus"):
+        queryset = queryset.filter(campus__iexact=params["campus"])
+    if params.get("course"):
+        queryset = queryset.filter(course__id=params["course"])
+    if params.get("department"):
+        queryset = queryset.filter(course__department__id=params["department"])
+    if params.get("year"):
+        queryset = queryset.filter(student__year_level=params["year"])
+    if params.get("transaction_for"):
+        queryset = queryset.filter(transaction_for=params["transaction_for"])
+
+    queryset = queryset.select_related("student", "guest", "new_enrollee", "reservedBy").order_by('created_at', 'id')
+
+    context = {
+        "time_filter": time_filter.replace("_", " ").title(),
+        "generated_at": now(),
+        "campus": params.get("campus"),
+        "department": _lookup(Department, params.get("department")),
+        "course": _lookup(Course, params.get("course")),
+    }
+    return queryset, context, lambda txn: txn
+
+
+REPORTS = {
+    'cashier_print': {
+        'build': cashier_print_report,
+        'template': "cashier/transaction_print.html",
+        'filename': "filtered_transactions.pdf",
+        'attachment': True,
+    },
+    'cashier_transactions': {
+        'build': cashier_transactions_report,
+        'template': "admin/partials/transactions_pdf.html",
+        'filename': "cashier_transactions.pdf",
+    },
+    'transaction_report': {
+        'build': transaction_report,
+        'template': "admin/partials/transaction_report.html",
+        'filename': "transaction_report.pdf",
+    },
+}
+
+
+# -- rendering ------------------------------------------------------------
+
+
+def render_job(job_id):
+    """Render a pending job into its PDF file, recording progress along the way."""
+    claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.Status.PENDING).update(
+        status=ReportJob.Status.RUNNING
+    )
+    if not claimed:
+        return  # Already picked up by another worker
+
+    job = ReportJob.objects.get(pk=job_id)
+    report = REPORTS[job.kind]
+
+    try:
+        queryset, context, row = report['build'](job.params)
+        template = get_template(report['template'])
+        ReportJob.objects.filter(pk=job.pk).update(total=queryset.count())
+
+        pdf = PdfAssembler()
+        part = []
+        offset = 0
+
+        def flush():
+            nonlocal part, offset
+            # Every part repeats the table header; only the first has the report header
+            pdf.add_html(template.render({
+                **context,
+                "transactions": part,
+                "offset": offset,
+                "continuation": offset > 0,
+            }))
+            offset += len(part)
+            part = []
+            ReportJob.objects.filter(pk=job.pk).update(processed=offset)
+
+        for item in keyset.iterate(queryset, CHUNK_SIZE):
+            part.append(row(item))
+            if len(part) >= ROWS_PER_PART:
+                flush()
+        if part or offset == 0:
+            flush()
+
+        with tempfile.TemporaryFile() as output:
+            pdf.write(output)
+            output.seek(0)
+            job.file.save(f"{job.kind}-{job.pk}.pdf", File(output), save=False)
+
+        ReportJob.objects.filter(pk=job.pk).update(
+            file=job.file.name, status=ReportJob.Status.DONE, finished_at=now()
+        )
+    except Exception as e:
+        logger.exception(f"Report {job.pk} ({job.kind}) failed")
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.Status.FAILED, error=str(e), finished_at=now()
+        )
+
+
+# -- dispatch -------------------------------------------------------------
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _local_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_WORKERS', 2),
+                thread_name_prefix="report",
+            )
+    return _executor
+
+
+def _render_locally(job_id):
+    close_old_connections()
+    try:
+        render_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def purge_expired():
+    """Delete jobs (and their files) older than REPORT_RETENTION_HOURS."""
+    cutoff = now() - timedelta(hours=getattr(settings, 'REPORT_RETENTION_HOURS', 24))
+    for job in ReportJob.objects.filter(created_at__lt=cutoff).exclude(status=ReportJob.Status.RUNNING):
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+
+
+def runner():
+    return getattr(settings, 'REPORT_RUNNER', 'thread')
+
+
+def _submit(job_id):
+    if runner() == 'celery':
+        from QueueAU.celery import app  # noqa: F401 (binds shared tasks to the configured broker)
+        from .tasks import build_report
+        build_report.delay(str(job_id))
+    else:
+        _local_executor().submit(_render_locally, job_id)
+
+
+def recover_stale():
+    """
+    Fail jobs still unfinished REPORT_TIMEOUT_MINUTES after they were requested
+    (their worker died or hung), and resubmit thread-pool jobs nobody started
+    within PENDING_GRACE (queued in a process that has since gone away).
+    Returns (failed, resubmitted).
+    """
+    current = now()
+    timeout = timedelta(minutes=getattr(settings, 'REPORT_TIMEOUT_MINUTES', 30))
+    unfinished = ReportJob.objects.filter(status__in=[ReportJob.Status.PENDING, ReportJob.Status.RUNNING])
+
+    failed = unfinished.filter(created_at__lt=current - timeout).update(
+        status=ReportJob.Status.FAILED,
+        error="The report timed out. Please request it again.",
+        finished_at=current,
+    )
+
+    if runner() == 'celery':
+        return failed, 0  # The broker still holds queued tasks
+    lost = list(
+        unfinished.filter(status=ReportJob.Status.PENDING, created_at__lt=current - PENDING_GRACE)
+        .values_list('pk', flat=True)
+    )
+    for job_id in lost:
+        _submit(job_id)  # render_job's claim makes a duplicate a no-op
+    return failed, len(lost)
+
+
+def enqueue(kind, params, requested_by=None):
+    """Record a report job and schedule it once the current transaction commits."""
+    if kind not in REPORTS:
+        raise ValueError(f"Unknown report: {kind}")
+
+    purge_expired()
+    recover_stale()
+    job = ReportJob.objects.create(kind=kind, params=params, requested_by=requested_by)
+    transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+
+def filename(job):
+    return REPORTS[job.kind]['filename']
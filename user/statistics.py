@@ -0,0 +1,224 @@
+"""
+Query layer for the admin statistics charts.
+
+Every chart endpoint shares the same filter set (campus, department, course,
+year, transaction_for, time). `grouped_counts` turns those filters into one
+GROUP BY and returns plain dict rows, so no model instances are loaded.
+Closed days already covered by the rollup table (core.rollups) are read from
+TransactionRollup; today and any day not rolled up yet come from TransactionNF1.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils.timezone import get_current_timezone, localdate
+
+from core.models import TransactionNF1, TransactionRollup
+from core.rollups import processing_time, rolled_through
+from core.timeutils import day_bounds
+
+
+FILTER_PARAMS = ['campus', 'department', 'course', 'year', 'transaction_for', 'time']
+
+
+def get_date_range(time_filter):
+    today = localdate()  # Asia/Manila local date
+
+    if time_filter == "last_7_days":
+        return [today - timedelta(days=i) for i in reversed(range(7))]
+
+    elif time_filter == "this_month":
+        start = today.replace(day=1)
+        return [start + timedelta(days=i) for i in range((today - start).days + 1)]
+
+    elif time_filter == "monthly":
+        year_start = today.replace(month=1, day=1)
+        return [year_start.replace(month=m) for m in range(1, today.month + 1)]
+
+    elif time_filter == "today":
+        return [today]
+
+    elif time_filter == "weekly":
+        start_of_week = today - timedelta(days=today.weekday())  # Monday as start
+        return [start_of_week + timedelta(days=i) for i in range((today - start_of_week).days + 1)]
+
+    else:
+        return []
+
+
+def filters_from_request(request, default_time="last_7_days"):
+    """Read the shared chart filters from the query string."""
+    filters = {param: request.GET.get(param) or None for param in FILTER_PARAMS}
+    filters['time'] = filters['time'] or default_time
+    return filters
+
+
+def _date_lookup(days):
+    """Filter kwargs for a list of local days, as a UTC range whenever the days are contiguous."""
+    first, last = min(days), max(days)
+    if (last - first).days + 1 == len(set(days)):
+        start, _ = day_bounds(first)
+        _, end = day_bounds(last)
+        return {'created_at__gte': start, 'created_at__lt': end}
+
+    # Sparse days (e.g. the "monthly" filter's month starts)
+    return {'created_at__date__in': days}
+
+
+# Filter lookups on TransactionNF1 and on TransactionRollup
+LIVE_LOOKUPS = {
+    'campus': 'campus__iexact',
+    'course': 'course__id',
+    'department': 'course__department__id',
+    'year': 'student__year_level',
+    'transaction_for': 'transaction_for',
+}
+ROLLUP_LOOKUPS = {
+    'campus': 'campus__iexact',
+    'course': 'course_id',
+    'department': 'department_id',
+    'year': 'year_level',
+    'transaction_for': 'transaction_for',
+}
+
+
+def _apply_filters(queryset, filters, lookups):
+    for param, lookup in lookups.items():
+        if filters.get(param):
+            queryset = queryset.filter(**{lookup: filters[param]})
+    return queryset
+
+
+def filtered_queryset(filters, days=None, since=None, **extra):
+    """
+    TransactionNF1 rows matching the chart filters.
+
+    `days` limits to those local days, `since` to everything from that local day on;
+    `extra` is passed to filter() as is.
+    """
+    queryset = TransactionNF1.objects.filter(**extra)
+
+    if days:
+        queryset = queryset.filter(**_date_lookup(days))
+    if since:
+        queryset = queryset.filter(created_at__gte=day_bounds(since)[0])
+
+    return _apply_filters(queryset, filters, LIVE_LOOKUPS)
+
+
+def _dimension(name, rollup=False):
+    """Field path or expression grouping by dimension `name` on either source."""
+    tz = get_current_timezone()
+    if name == 'day':
+        return 'date' if rollup else TruncDate('created_at', tzinfo=tz)
+    if name == 'hour':
+        return 'hour' if rollup else ExtractHour('created_at', tzinfo=tz)
+    if name == 'department':
+        return 'department__name' if rollup else 'course__department__name'
+    return name
+
+
+def _grouped(queryset, dimensions, count, processing=None, rollup=False):
+    annotations = {}
+    paths = {}
+    for name in dimensions:
+        expression = _dimension(name, rollup)
+        if isinstance(expression, str):
+            paths[name] = expression
+        else:
+            annotations[name] = expression
+
+    totals = {'count': count}
+    if processing is not None:
+        totals['processing_seconds'] = processing
+
+    rows = list(
+        queryset.order_by()
+        .annotate(**annotations)
+        .values(*paths.values(), *annotations)
+        .annotate(**totals)
+    )
+
+    # Report field paths under their dimension name
+    renamed = {path: name for name, path in paths.items() if path != name}
+    if renamed:
+        for row in rows:
+            for path, name in renamed.items():
+                row[name] = row.pop(path)
+    return rows
+
+
+def _split_days(days, since):
+    """Split the requested period into (rolled-up closed days, days read live)."""
+    today = localdate()
+    covered = rolled_through()
+
+    if days is None:
+        days = [since + timedelta(days=i) for i in range((today - since).days + 1)] if since <= today else []
+
+    if covered is None:
+        return [], days
+
+    rolled = [d for d in days if d <= covered and d < today]
+    live = [d for d in days if d > covered or d >= today]
+    return rolled, live
+
+
+def grouped_counts(filters, *dimensions, days=None, since=None, with_processing=False, **extra):
+    """
+    Count transactions matching `filters` grouped by `dimensions`, over the local
+    `days` or every day `since`. `extra` filters apply to both sources, so they
+    may only use fields TransactionRollup shares with TransactionNF1.
+
+    Dimensions are model fields plus 'day' and 'hour' (Asia/Manila) and
+    'department' (the department name). Returns dicts holding each dimension and
+    'count' (and 'processing_seconds' with `with_processing`).
+    """
+    rolled, live = _split_days(days, since)
+    rows = []
+
+    if rolled:
+        queryset = _apply_filters(
+            TransactionRollup.objects.filter(**_rollup_date_lookup(rolled), **extra),
+            filters,
+            ROLLUP_LOOKUPS,
+        )
+        rows += _grouped(
+            queryset, dimensions, Sum('count'),
+            Sum('processing_seconds') if with_processing else None,
+            rollup=True,
+        )
+
+    if live:
+        queryset = filtered_queryset(filters, days=live, **extra)
+        live_rows = _grouped(
+            queryset, dimensions, Count('id'),
+            Sum(processing_time()) if with_processing else None,
+        )
+        for row in live_rows:
+            if with_processing:
+                row['processing_seconds'] = row['processing_seconds'].total_seconds() if row['processing_seconds'] else 0
+        rows += live_rows
+
+    if not (rolled and live):
+        return rows
+
+    # Same group can come from both sources; merge them
+    merged = {}
+    for row in rows:
+        key = tuple(row[name] for name in dimensions)
+        if key in merged:
+            merged[key]['count'] += row['count']
+            if with_processing:
+                merged[key]['processing_seconds'] += row['processing_seconds']
+        else:
+            merged[key] = row
+    return list(merged.values())
+
+
+def _rollup_date_lookup(days):
+    first, last = min(days), max(days)
+    if (last - first).days + 1 == len(set(days)):
+        return {'date__gte': first, 'date__lte': last}
+    return {'date__in': days}
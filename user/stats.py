@@ -1,6 +1,5 @@
 # utils.py
 
-import matplotlib.pyplot as plt
 import io
 import base64
 from datetime import datetime, timedelta
@@ -19,6 +18,8 @@ def get_date_range(time_filter):
         raise ValueError("Invalid time filter")
 
 def generate_statistics_chart(campus, department, course, time_filter):
+    import matplotlib.pyplot as plt  # heavy; only load when a chart is drawn
+
     transactions = TransactionNF1.objects.filter(status=TransactionNF1.Status.COMPLETED)
 
     if campus:
@@ -0,0 +1,160 @@
+"""
+Memoization of the admin statistics payloads in the Django cache.
+
+Entries are keyed by (endpoint, normalized filters, date bucket, generation).
+Periods that include today use a short TTL and the "live" generation, which
+every committed queue change bumps through core.signals.queue_changed.
+Closed periods use a long TTL and only the "closed" generation, bumped by
+cut-offs (the only changes that touch past days).
+
+Any backend works. With the default per-process LocMem cache each worker keeps
+its own entries and generations, so a cut-off would not reach the closed
+entries of other workers: there the closed generation is the updated_at of a
+Watermark row instead, one single-row read per lookup of closed entries. Live
+entries of other workers may lag by up to STATS_CACHE_LIVE_TTL.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import localdate
+
+from request import events
+
+
+KEY_PREFIX = "stats-cache"
+LIVE_GENERATION_KEY = f"{KEY_PREFIX}:generation:live"
+CLOSED_GENERATION_KEY = f"{KEY_PREFIX}:generation:closed"
+CLOSED_MARKER = "stats-cache-closed"  # Watermark row touched on every closed-generation bump
+
+
+def _ttl(live):
+    if live:
+        return getattr(settings, 'STATS_CACHE_LIVE_TTL', 30)
+    return getattr(settings, 'STATS_CACHE_CLOSED_TTL', 6 * 3600)
+
+
+def normalize_filters(filters):
+    """Drop empty filters and canonicalize values so equivalent requests share an entry."""
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if value in (None, ""):
+            continue
+        value = str(value).strip()
+        if name == 'campus':
+            value = value.lower()
+        normalized[name] = value
+    return normalized
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def _generation(live):
+    if live or events.shared():
+        return cache.get(LIVE_GENERATION_KEY if live else CLOSED_GENERATION_KEY, 0)
+
+    from core.models import Watermark
+
+    stamp = Watermark.objects.filter(name=CLOSED_MARKER).values_list('updated_at', flat=True).first()
+    return int(stamp.timestamp() * 1_000_000) if stamp else 0
+
+
+def make_key(endpoint, filters, live=True, generation=None):
+    digest = hashlib.md5(
+        json.dumps(normalize_filters(filters), sort_keys=True).encode()
+    ).hexdigest()
+
+    # Entries never outlive the local day they were computed on
+    bucket = localdate().isoformat()
+    if generation is None:
+        generation = _generation(live)
+    return f"{KEY_PREFIX}:{endpoint}:{digest}:{bucket}:{'live' if live else 'closed'}{generation}"
+
+
+def memoize(endpoint, filters, compute, live=True):
+    """Return the cached payload of `endpoint` for `filters`, computing it on a miss."""
+    key = make_key(endpoint, filters, live)
+    payload = cache.get(key)
+    if payload is not None:
+        _incr(f"{KEY_PREFIX}:hits:{endpoint}")
+        return payload
+
+    _incr(f"{KEY_PREFIX}:misses:{endpoint}")
+    payload = compute()
+    cache.set(key, payload, _ttl(live))
+    return payload
+
+
+def memoize_many(endpoints, filters, compute, live):
+    """
+    Like memoize() for several endpoints sharing `filters`. `compute(missing)`
+    returns the payloads of the missing endpoints as a dict; `live(endpoint)`
+    tells whether an endpoint's period includes today.
+    """
+    kinds = {endpoint: live(endpoint) for endpoint in endpoints}
+    generations = {kind: _generation(kind) for kind in set(kinds.values())}
+    keys = {endpoint: make_key(endpoint, filters, kind, generations[kind]) for endpoint, kind in kinds.items()}
+    found = cache.get_many(list(keys.values()))
+
+    payloads = {}
+    missing = []
+    for endpoint, key in keys.items():
+        if key in found:
+            payloads[endpoint] = found[key]
+            _incr(f"{KEY_PREFIX}:hits:{endpoint}")
+        else:
+            missing.append(endpoint)
+            _incr(f"{KEY_PREFIX}:misses:{endpoint}")
+
+    if missing:
+        computed = compute(missing)
+        for endpoint in missing:
+            cache.set(keys[endpoint], computed[endpoint], _ttl(kinds[endpoint]))
+        payloads.update(computed)
+
+    return {endpoint: payloads[endpoint] for endpoint in endpoints}
+
+
+def invalidate(closed=False):
+    """Drop every live entry (and every closed one too with `closed`)."""
+    from core.models import Watermark
+
+    _incr(LIVE_GENERATION_KEY)
+    if closed:
+        _incr(CLOSED_GENERATION_KEY)
+        Watermark.objects.update_or_create(name=CLOSED_MARKER, defaults={'day': localdate()})
+
+
+def counters(endpoints):
+    """Hit/miss counters per endpoint, plus totals."""
+    names = [f"{KEY_PREFIX}:{kind}:{endpoint}" for endpoint in endpoints for kind in ('hits', 'misses')]
+    values = cache.get_many(names)
+
+    result = {}
+    for endpoint in endpoints:
+        result[endpoint] = {
+            'hits': values.get(f"{KEY_PREFIX}:hits:{endpoint}", 0),
+            'misses': values.get(f"{KEY_PREFIX}:misses:{endpoint}", 0),
+        }
+
+    hits = sum(c['hits'] for c in result.values())
+    misses = sum(c['misses'] for c in result.values())
+    return {
+        'endpoints': result,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0,
+    }
+
+
+def on_queue_changed(sender, event=None, campus=None, **kwargs):
+    # Cut-offs also close out tickets of past days
+    invalidate(closed=event == events.CUT_OFF)
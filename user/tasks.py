@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .reports import render_job
+
+
+@shared_task
+def build_report(job_id):
+    render_job(job_id)
@@ -1,3 +1,215 @@
-from django.test import TestCase
+import subprocess
+import sys
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from core.models import QueueState, ReportJob, TransactionNF1, User, Watermark
+from user import reports, stats_cache
+from user.dispatch import DispatchEngine
+
+
+class DispatchEngineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.window = User.objects.create(
+            name="Cashier 1", email="cashier1@example.com", windowNum=1,
+            campus="Main", process_mode=User.ProcessMode.MIXED,
+        )
+
+    def setUp(self):
+        self.engine = DispatchEngine()
+
+    def ticket(self, number, priority):
+        return TransactionNF1.objects.create(
+            queueNumber=number, transactionType="Tuition", campus="Main", priority=priority,
+        )
+
+    def dispatch(self):
+        with transaction.atomic():
+            txn = self.engine.dispatch(self.window)
+        return txn.queueNumber if txn else None
+
+    def test_mixed_rotation_is_read_from_queue_state(self):
+        for n in range(1, 4):
+            self.ticket(f"P-{n:03d}", True)
+            self.ticket(f"S-{n:03d}", False)
+
+        self.assertEqual(self.dispatch(), "P-001")
+        self.assertEqual(QueueState.objects.get(campus="Main").position, 1)
+
+        # Another worker process served the second P step
+        QueueState.objects.filter(campus="Main").update(position=2)
+        self.assertEqual(self.dispatch(), "S-001")
+        self.assertEqual(self.engine.rotation_position("Main"), 3)
+
+        self.assertEqual(self.dispatch(), "S-002")
+        self.assertEqual(self.dispatch(), "P-002")
+        self.assertEqual(self.engine.rotation_position("Main"), 1)
+
+    @override_settings(QUEUE_DISPATCH_SYNC_SECONDS=0)
+    def test_ticket_of_rolled_back_claim_is_dispatched_again(self):
+        self.window.process_mode = User.ProcessMode.PRIORITY_ONLY
+        self.ticket("P-001", True)
+        self.ticket("P-002", True)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(self.engine.dispatch(self.window).queueNumber, "P-001")
+                raise RuntimeError("request failed after the claim")
+
+        self.assertEqual(self.dispatch(), "P-001")
+        self.assertEqual(TransactionNF1.objects.get(queueNumber="P-001").reservedBy, self.window)
+
+    def late_ticket(self, pk, number):
+        # Issued (lower pk, earlier created_at) but committed after higher pks were pulled
+        TransactionNF1.objects.create(pk=pk, queueNumber=number, transactionType="Tuition", campus="Main", priority=True)
+        TransactionNF1.objects.filter(pk=pk).update(created_at=now() - timedelta(minutes=5))
+
+    @override_settings(QUEUE_DISPATCH_SYNC_SECONDS=0)
+    def test_ticket_committed_below_the_high_water_mark_is_pulled(self):
+        self.window.process_mode = User.ProcessMode.PRIORITY_ONLY
+        TransactionNF1.objects.bulk_create([
+            TransactionNF1(pk=pk, queueNumber=f"P-{pk:03d}", transactionType="Tuition", campus="Main", priority=True)
+            for pk in (10, 11, 12, 13)
+        ])
+
+        self.assertEqual(self.dispatch(), "P-010")
+        self.late_ticket(5, "P-005")
+        self.assertEqual(self.dispatch(), "P-005")  # Re-scanned from the high-water mark before the last pull
+
+        self.assertEqual(self.dispatch(), "P-011")
+        self.late_ticket(6, "P-006")
+        self.assertEqual(self.dispatch(), "P-012")  # Left for the next full re-sync...
+
+        self.late_ticket(7, "P-007")  # ...which then finds both
+        with self.settings(QUEUE_DISPATCH_RESYNC_SECONDS=0):
+            self.assertEqual(self.dispatch(), "P-006")
+        self.assertEqual(self.dispatch(), "P-007")
+        self.assertEqual(self.dispatch(), "P-013")
+
+    def test_upcoming_list_shows_only_the_window_campus(self):
+        self.ticket("P-001", True)
+        TransactionNF1.objects.create(queueNumber="P-001", transactionType="Tuition", campus="South", priority=True)
+
+        session = self.client.session
+        session['user_id'] = self.window.pk
+        session.save()
+        response = self.client.get(reverse('next_queues_list'), HTTP_HOST='localhost')
+
+        self.assertEqual([q["queue_number"] for q in response.json()["queues"]], ["P-001"])
+
+
+class CashierDashboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.window = User.objects.create(name="Cashier 1", email="cashier1@example.com", windowNum=1, campus="Main")
+
+    def test_both_dashboards_listen_for_queue_events(self):
+        stream = f'new EventSource("{reverse("queue-event-stream")}")'
+
+        session = self.client.session
+        session['user_id'] = self.window.pk
+        session.save()
+        served = self.client.get(reverse('cashier'), HTTP_HOST='localhost')
+        self.assertContains(served, stream, count=1)
+        self.assertContains(served, "let dashboardDataTimer = setInterval(fetchDashboardData")
+
+        request = RequestFactory().get('/', HTTP_HOST='localhost')
+        request.session = self.client.session
+        page = render_to_string('cashier/dashboard.html', {'user': self.window}, request=request)
+        self.assertEqual(page.count(stream), 1)
+        self.assertIn("let dashboardDataTimer = setInterval(fetchDashboardData", page)
+
+
+class StatsCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cutoff_in_another_worker_drops_closed_entries(self):
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return len(computed)
+
+        self.assertEqual(stats_cache.memoize("chart", {}, compute, live=False), 1)
+        self.assertEqual(stats_cache.memoize("chart", {}, compute, live=False), 1)
+
+        # Another worker's cut-off bumps its own LocMem generation and the shared row
+        Watermark.objects.update_or_create(name=stats_cache.CLOSED_MARKER, defaults={'day': None})
+
+        self.assertEqual(stats_cache.memoize("chart", {}, compute, live=False), 2)
+
+
+class ExportTests(TestCase):
+
+    async def test_csv_is_streamed_asynchronously_under_asgi(self):
+        admin = await User.objects.acreate(name="Admin", email="admin@example.com", windowNum=99, isAdmin=True)
+        await TransactionNF1.objects.acreate(queueNumber="S-001", transactionType="Tuition", campus="Main")
+        session = await self.async_client.asession()
+        session.update({'user_id': admin.pk, 'is_admin': True})
+        await sync_to_async(session.save)()
+
+        response = await self.async_client.get(reverse('transactions_export'), HTTP_HOST='localhost')
+
+        self.assertTrue(response.is_async)  # Not collected whole in a worker thread
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "queue_number"])
+        self.assertEqual(lines[1].split(",")[1], "S-001")
+
+
+class ReportJobTests(TestCase):
+
+    def job(self, status, age):
+        job = ReportJob.objects.create(kind='cashier_print', status=status)
+        ReportJob.objects.filter(pk=job.pk).update(created_at=now() - age)
+        return job
+
+    @override_settings(CELERY_BROKER_URL='redis://localhost:6379/0')
+    def test_thread_runner_is_the_default_even_with_a_broker(self):
+        with mock.patch.object(reports, '_local_executor') as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            job = reports.enqueue('cashier_print', {})
+        executor.return_value.submit.assert_called_once_with(reports._render_locally, job.pk)
+
+    @override_settings(REPORT_TIMEOUT_MINUTES=30)
+    def test_stale_jobs_are_failed_or_resubmitted(self):
+        hung = self.job(ReportJob.Status.RUNNING, timedelta(minutes=31))
+        lost = self.job(ReportJob.Status.PENDING, timedelta(minutes=5))
+        fresh = self.job(ReportJob.Status.PENDING, timedelta(seconds=10))
+        busy = self.job(ReportJob.Status.RUNNING, timedelta(minutes=5))
+
+        with mock.patch.object(reports, '_submit') as submit:
+            self.assertEqual(reports.recover_stale(), (1, 1))
+        submit.assert_called_once_with(lost.pk)
+
+        statuses = dict(ReportJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[hung.pk], ReportJob.Status.FAILED)
+        self.assertEqual(statuses[fresh.pk], ReportJob.Status.PENDING)
+        self.assertEqual(statuses[busy.pk], ReportJob.Status.RUNNING)
+
+    def test_celery_is_only_loaded_by_the_celery_runner(self):
+        script = (
+            "import sys, django; django.setup(); import request.views, user.views; "
+            "print('celery' in sys.modules, 'kombu' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split()[-2:], ["False", "False"])
+
+    @override_settings(REPORT_RUNNER='celery')
+    def test_celery_jobs_are_not_resubmitted(self):
+        self.job(ReportJob.Status.PENDING, timedelta(minutes=5))
+        with mock.patch.object(reports, '_submit') as submit:
+            self.assertEqual(reports.recover_stale(), (0, 0))
+        submit.assert_not_called()
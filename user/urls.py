@@ -61,6 +61,8 @@ urlpatterns = [
     # Statistics Emeruts:
     path("admin/dashboard/statistics/", views.admin_statistics, name="admin_statistics"),
     path("admin/dashboard/statistics/data/", views.statistics_data, name="statistics_data"),
+    path("admin/dashboard/statistics/batch/", views.statistics_batch, name="statistics_batch"),
+    path("admin/dashboard/statistics/cache-stats/", views.statistics_cache_stats, name="statistics_cache_stats"),
     path("admin/dashboard/statistics/transaction-types/", views.transaction_type_chart_data, name="transaction_type_chart_data"),
     path("admin/dashboard/statistics/status-donut/", views.status_donut_chart_data, name="status_donut_chart_data"),
     path("admin/dashboard/statistics/status-by-department/", views.status_by_department_chart_data, name="status_by_department_chart_data"),
@@ -76,6 +78,7 @@ urlpatterns = [
 
 
     path("admin/dashboard/statistics/print/", views.generate_transaction_pdf, name="transaction_report_pdf"),
+    path("admin/dashboard/statistics/export/", views.transactions_export, name="transactions_export"),
 
 
 
@@ -103,6 +106,10 @@ urlpatterns = [
     path("admin/dashboard/cashiers/list/<int:cashier_id>/delete/", views.cashier_delete_view, name="cashier_delete"),
     path('admin/dashboard/cashiers/list/<int:cashier_id>/transactions/pdf/', views.cashier_transactions_pdf_view, name='cashier_transactions_pdf'),
 
+    path('reports/<uuid:job_id>/', views.report_job, name='report_job'),
+    path('reports/<uuid:job_id>/status/', views.report_job_status, name='report_job_status'),
+    path('reports/<uuid:job_id>/download/', views.report_job_download, name='report_job_download'),
+
 
 
 
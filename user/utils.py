@@ -1,5 +1,4 @@
 
-import matplotlib.pyplot as plt
 import os
 from datetime import datetime, timedelta
 from core.models import TransactionNF1, Course, Department
@@ -21,6 +20,8 @@ def get_date_range(time_filter):
         raise ValueError("Invalid time filter")
 
 def generate_statistics_chart(campus, department, course, time_filter):
+    import matplotlib.pyplot as plt  # heavy; only load when a chart is drawn
+
     # Filter ORM
     transactions = TransactionNF1.objects.filter(status=TransactionNF1.Status.COMPLETED)
 
@@ -7,21 +7,21 @@ from core.models import (
     Guest,
     NewEnrollee,
     CAMPUS_CHOICES,
-    QueueState,
     TransactionNF1,
     Department,
     Course,
     CutoffSchedule,
-    TwoFactorToken
+    TwoFactorToken,
+    ReportJob,
     )
 import random
-from django.core.mail import send_mail
 from .forms import ChangePasswordForm, QueueModeForm, CashierForm
 from django.http import JsonResponse
 from django.utils.timezone import now, make_aware, get_current_timezone
 from django.views.decorators.http import require_POST, require_GET
 from django.template.loader import render_to_string
-from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.db.models import Q
 from django.utils.dateparse import parse_date
 from django.utils import timezone
@@ -29,9 +29,6 @@ from datetime import datetime, timedelta, timezone as dt_timezone
 from django.db.models import Count, Q
 from django.core.paginator import Paginator
 from django.utils.timezone import now, timedelta
-from django.db.models.functions import TruncDate
-from sklearn.linear_model import LinearRegression
-import numpy as np
 from django.utils.crypto import get_random_string
 from django.urls import reverse
 from django.db import transaction
@@ -39,6 +36,15 @@ from django.conf import settings
 import logging
 import os
 from .email_sender import send_rolling_email
+from .dispatch import dispatch_engine, MIXED_PATTERN
+from core.legacy import mirror_enabled, mirror_update
+from core import outbox, rollups
+from request import events
+from core.timeutils import on_day
+from .statistics import filters_from_request, grouped_counts
+from . import charts, stats_cache
+from .kpis import cashier_kpis
+from . import exports, keyset, reports
 
 logger = logging.getLogger('custom_logger')
 
@@ -106,6 +112,7 @@ def verify_2fa_uuid(request, token):
             user = token_obj.user
             user.isOnline = True
             user.save()
+            events.publish(events.PRESENCE, campus=user.campus, window=user.windowNum)
 
             request.session['user_id'] = user.id
             request.session['user_name'] = user.name
@@ -172,6 +179,7 @@ def logout_user(request):
             with transaction.atomic():
                 user.isOnline = False
                 user.save(update_fields=['isOnline'])
+                events.publish(events.PRESENCE, campus=user.campus, window=user.windowNum)
 
             updated_status = User.objects.get(id=user.id).isOnline
             logger.debug(f"isOnline after save: {updated_status}")
@@ -328,75 +336,24 @@ def cashier_profile_content(request):
     return render(request, "cashier/partials/profile_content.html", {"user": user, "form": form})
 
 
-def print_cashier_transactions(request):
-    user = get_current_user(request)
-    if not user:
-        return redirect("login")
+REPORT_PARAMS = ["start_date", "end_date", "department", "course", "campus"]
 
-    from_date = parse_date(request.GET.get("start_date", ""))
-    to_date = parse_date(request.GET.get("end_date", ""))
-    department_id = request.GET.get("department")
-    course_id = request.GET.get("course")
-    campus = request.GET.get("campus")
-
-    transactions = TransactionNF1.objects.filter(reservedBy=user)
-
-    if from_date:
-        transactions = transactions.filter(created_at__date__gte=from_date)
-    if to_date:
-        transactions = transactions.filter(created_at__date__lte=to_date)
-    if department_id:
-        transactions = transactions.filter(course__department_id=department_id)
-    if course_id:
-        transactions = transactions.filter(course_id=course_id)
-    if campus:
-        transactions = transactions.filter(campus=campus)
-
-    transactions = transactions.select_related("student", "guest", "new_enrollee", "course__department")
-
-    department = None
-    course = None
-    try:
-        if department_id:
-            department = Department.objects.get(id=department_id)
-        if course_id:
-            course = Course.objects.get(id=course_id)
-    except (Department.DoesNotExist, Course.DoesNotExist):
-        pass
-
-    results = []
-    for txn in transactions:
-        requester = txn.get_requester()
-        role = type(requester).__name__ if requester else "Unknown"
-        id_number = getattr(requester, 'studentId', getattr(requester, 'qrId', 'N/A'))
-        name = getattr(requester, 'name', str(requester))
-        results.append({
-            "queue": txn.queueNumber,
-            "id_number": id_number,
-            "name": name,
-            "role": role,
-        })
 
-    context = {
-        "cashier": user,
-        "transactions": results,
-        "from_date": from_date,
-        "to_date": to_date,
-        "department": department,
-        "course": course,
-        "campus": campus,
-    }
+def _report_params(request, names, **extra):
+    return {**{name: request.GET.get(name) for name in names}, **extra}
 
-    template = get_template("cashier/transaction_print.html")
-    html = template.render(context)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="filtered_transactions.pdf"'
 
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    if pisa_status.err:
-        return HttpResponse("Error generating PDF", status=500)
+def print_cashier_transactions(request):
+    user = get_current_user(request)
+    if not user:
+        return redirect("login")
 
-    return response
+    job = reports.enqueue(
+        "cashier_print",
+        _report_params(request, REPORT_PARAMS, cashier_id=user.pk),
+        requested_by=user,
+    )
+    return redirect("report_job", job_id=job.pk)
 
 
 def verify_otp(request):
@@ -485,40 +442,9 @@ def cashier_settings_content(request):
 from django.utils.timezone import localdate, localtime
 
 
-MIXED_PATTERN = [True, True, False, False]  # P, P, S, S
-
-
 def get_next_transaction(user):
-    today = localdate()
-    qs = Transaction.objects.select_for_update().filter(
-        status=Transaction.Status.ON_QUEUE,
-        reservedBy__isnull=True,
-        created_at__date=today
-    )
-
-    mode = user.process_mode
-    if mode == user.ProcessMode.PRIORITY_ONLY:
-        return qs.filter(priority=True).order_by('created_at').first()
-    elif mode == user.ProcessMode.STANDARD_ONLY:
-        return qs.filter(priority=False).order_by('created_at').first()
-    elif mode == user.ProcessMode.MIXED:
-        queue_state, _ = QueueState.objects.select_for_update().get_or_create(id=1)
-
-        current_index = queue_state.position % len(MIXED_PATTERN)
-        expected_priority = MIXED_PATTERN[current_index]
-
-        filtered_qs = qs.filter(priority=expected_priority).order_by('created_at')
-        next_txn = filtered_qs.first()
-
-        if next_txn:
-            queue_state.position = (queue_state.position + 1) % len(MIXED_PATTERN)
-            queue_state.save(update_fields=['position'])
-            return next_txn
-        else:
-            fallback_qs = qs.exclude(priority=expected_priority).order_by('created_at')
-            return fallback_qs.first()
-
-    return qs.order_by('created_at').first()
+    """Reserve and return the next NF1 transaction for this window via the dispatch engine."""
+    return dispatch_engine.dispatch(user)
 
 
 
@@ -538,7 +464,7 @@ def next_queue(request):
     current_txn_nf1 = TransactionNF1.objects.select_for_update().filter(
         reservedBy=user,
         status=TransactionNF1.Status.IN_PROCESS,
-        created_at__date=today
+        **on_day('created_at', today)
     ).order_by('-created_at').first()
 
     if current_txn_nf1:
@@ -547,26 +473,14 @@ def next_queue(request):
             status=TransactionNF1.Status.COMPLETED
         )
 
-        verified_txn = TransactionNF1.objects.get(pk=current_txn_nf1.pk)
-        logger.debug(f"Verified NF1 {verified_txn.queueNumber} status after update: {verified_txn.status}")
-
-        legacy_txn = Transaction.objects.filter(pk=current_txn_nf1.pk).first()
-        if legacy_txn:
-            legacy_txn.status = Transaction.Status.COMPLETED
-            legacy_txn.save(update_fields=['status'])
-            logger.debug(f"Legacy transaction {legacy_txn.queueNumber} updated to COMPLETED")
-        else:
-            logger.warning(f"No legacy transaction found for NF1 pk={current_txn_nf1.pk}")
+        mirror_update(current_txn_nf1.pk, status=Transaction.Status.COMPLETED)
+        events.publish(events.COMPLETE, campus=current_txn_nf1.campus)
 
     # Step 2: Ensure user has no active transaction
-    has_active = Transaction.objects.filter(
-        reservedBy=user,
-        status=Transaction.Status.IN_PROCESS,
-        created_at__date=today
-    ).exists() or TransactionNF1.objects.filter(
+    has_active = TransactionNF1.objects.filter(
         reservedBy=user,
         status=TransactionNF1.Status.IN_PROCESS,
-        created_at__date=today
+        **on_day('created_at', today)
     ).exists()
 
     if has_active:
@@ -575,25 +489,13 @@ def next_queue(request):
             "error": "User already has a transaction in process."
         }, status=400)
 
-    # Step 3: Reserve the next transaction
+    # Step 3: Reserve the next transaction (the engine already marked NF1 IN_PROCESS)
     next_txn = get_next_transaction(user)
 
     if next_txn:
-        logger.debug(f"Reserving next transaction: {next_txn.queueNumber}")
-
-        TransactionNF1.objects.filter(pk=next_txn.pk).update(
-            status=TransactionNF1.Status.IN_PROCESS,
-            reservedBy=user
-        )
-
-        legacy_txn = Transaction.objects.select_for_update().filter(pk=next_txn.pk).first()
-        if legacy_txn:
-            legacy_txn.status = Transaction.Status.IN_PROCESS
-            legacy_txn.reservedBy = user
-            legacy_txn.save(update_fields=['status', 'reservedBy'])
-            logger.debug(f"Legacy transaction {legacy_txn.queueNumber} updated to IN_PROCESS")
-        else:
-            logger.warning(f"No legacy transaction found for next pk={next_txn.pk}")
+        logger.debug(f"Reserved next transaction: {next_txn.queueNumber}")
+        mirror_update(next_txn.pk, status=Transaction.Status.IN_PROCESS, reservedBy=user)
+        events.publish(events.RESERVE, campus=next_txn.campus, window=user.windowNum)
 
         logger.info(f"Next queue reserved: {next_txn.queueNumber} by {user.name}")
         return JsonResponse({
@@ -627,11 +529,12 @@ def get_current_queue(request):
     today = localdate()
 
     txn = (
-        Transaction.objects.filter(
+        TransactionNF1.objects.filter(
             reservedBy=user,
-            status=Transaction.Status.IN_PROCESS,
-            created_at__date=today,
+            status=TransactionNF1.Status.IN_PROCESS,
+            **on_day('created_at', today),
         )
+        .select_related("student", "new_enrollee", "guest")
         .order_by("-created_at")
         .first()
     )
@@ -678,29 +581,21 @@ def skip_queue(request):
         logger.warning("Unauthorized skip_queue attempt.")
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
-    # Step 1: Find current legacy transaction
-    txn = Transaction.objects.filter(
+    # Step 1: Find the window's current transaction
+    txn = TransactionNF1.objects.filter(
         reservedBy=user,
-        status=Transaction.Status.IN_PROCESS
+        status=TransactionNF1.Status.IN_PROCESS
     ).order_by('-created_at').first()
 
     if txn:
-        queue_num = txn.queueNumber
-        txn.status = Transaction.Status.CANCELLED
-        txn.save()
-        logger.info(f"Legacy transaction {queue_num} cancelled by user {user.name} (ID: {user.id})")
-
-        # Step 2: Mirror cancellation to NF1
-        updated_count = TransactionNF1.objects.filter(queueNumber=queue_num).update(
-            status=TransactionNF1.Status.CANCELLED
-        )
+        TransactionNF1.objects.filter(pk=txn.pk).update(status=TransactionNF1.Status.CANCELLED)
+        logger.info(f"Transaction {txn.queueNumber} cancelled by user {user.name} (ID: {user.id})")
 
-        if updated_count == 0:
-            logger.warning(f"No NF1 transaction found for queueNumber {queue_num} during skip.")
-        else:
-            logger.debug(f"NF1 transaction {queue_num} cancelled successfully.")
+        # Step 2: Legacy projection, matched by its NF1 link
+        mirror_update(txn.pk, status=Transaction.Status.CANCELLED)
+        events.publish(events.CANCEL, campus=txn.campus)
     else:
-        logger.info(f"No IN_PROCESS legacy transaction found for user {user.name} during skip.")
+        logger.info(f"No IN_PROCESS transaction found for user {user.name} during skip.")
 
     return JsonResponse({"success": True})
 
@@ -711,11 +606,14 @@ def next_queues_list(request):
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
     today = localdate()
-    qs = Transaction.objects.filter(
-        status=Transaction.Status.ON_QUEUE,
+    qs = TransactionNF1.objects.filter(
+        status=TransactionNF1.Status.ON_QUEUE,
         reservedBy__isnull=True,
-        created_at__date=today
+        **on_day('created_at', today)
     )
+    if user.campus:
+        # Same tickets the dispatch engine would give this window (its campus lanes)
+        qs = qs.filter(campus__iexact=user.campus)
 
     mode = user.process_mode
     txns = []
@@ -727,24 +625,22 @@ def next_queues_list(request):
         txns = qs.filter(priority=False).order_by('created_at')[:10]
 
     elif mode == user.ProcessMode.MIXED:
-        from django.db import transaction
-        with transaction.atomic():
-            queue_state, _ = QueueState.objects.select_for_update().get_or_create(id=1)
-            position = queue_state.position
-
-            pattern = MIXED_PATTERN
-            p_list = list(qs.filter(priority=True).order_by('created_at')[:20])
-            s_list = list(qs.filter(priority=False).order_by('created_at')[:20])
-            txns = []
-
-            i = 0
-            while len(txns) < 10 and (p_list or s_list):
-                expected = pattern[(position + i) % len(pattern)]
-                if expected and p_list:
-                    txns.append(p_list.pop(0))
-                elif not expected and s_list:
-                    txns.append(s_list.pop(0))
-                i += 1
+        # Read-only preview: uses this campus's rotation without locking QueueState
+        position = dispatch_engine.rotation_position(user.campus)
+
+        pattern = MIXED_PATTERN
+        p_list = list(qs.filter(priority=True).order_by('created_at')[:20])
+        s_list = list(qs.filter(priority=False).order_by('created_at')[:20])
+        txns = []
+
+        i = 0
+        while len(txns) < 10 and (p_list or s_list):
+            expected = pattern[(position + i) % len(pattern)]
+            if expected and p_list:
+                txns.append(p_list.pop(0))
+            elif not expected and s_list:
+                txns.append(s_list.pop(0))
+            i += 1
 
     data = [
         {
@@ -766,29 +662,20 @@ def hold_queue(request):
         logger.warning("Unauthorized attempt to place queue on hold.")
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
-    txn = Transaction.objects.filter(
+    txn = TransactionNF1.objects.filter(
         reservedBy=user,
-        status=Transaction.Status.IN_PROCESS
+        status=TransactionNF1.Status.IN_PROCESS
     ).first()
 
     if txn:
-        queue_num = txn.queueNumber
-        txn.status = Transaction.Status.ON_HOLD
-        txn.onHoldCount += 1
-        txn.save()
-
-        logger.info(f"Transaction {queue_num} placed ON_HOLD by user {user.name} (ID: {user.id})")
-
-        # Mirror update in NF1
-        updated_count = TransactionNF1.objects.filter(queueNumber=queue_num).update(
+        TransactionNF1.objects.filter(pk=txn.pk).update(
             status=TransactionNF1.Status.ON_HOLD,
             onHoldCount=F('onHoldCount') + 1
         )
+        logger.info(f"Transaction {txn.queueNumber} placed ON_HOLD by user {user.name} (ID: {user.id})")
 
-        if updated_count == 0:
-            logger.warning(f"No NF1 transaction found to hold for queueNumber {queue_num}")
-        else:
-            logger.debug(f"NF1 transaction {queue_num} successfully updated to ON_HOLD.")
+        mirror_update(txn.pk, status=Transaction.Status.ON_HOLD, onHoldCount=F('onHoldCount') + 1)
+        events.publish(events.HOLD, campus=txn.campus)
     else:
         logger.info(f"No active transaction found to hold for user {user.name}.")
 
@@ -800,10 +687,10 @@ def list_on_hold_transactions(request):
     if not user:
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
-    txns = Transaction.objects.filter(
+    txns = TransactionNF1.objects.filter(
         reservedBy=user,
-        status=Transaction.Status.ON_HOLD
-    ).order_by('-created_at')
+        status=TransactionNF1.Status.ON_HOLD
+    ).select_related('student', 'new_enrollee', 'guest').order_by('-created_at')
 
     result = []
     for txn in txns:
@@ -844,31 +731,26 @@ def update_hold_status(request):
         logger.warning(f"Malformed JSON or missing keys in update_hold_status by {user.name}: {e}")
         return JsonResponse({"error": "Invalid request data"}, status=400)
 
-    if new_status not in [Transaction.Status.COMPLETED, Transaction.Status.CANCELLED]:
+    if new_status not in [TransactionNF1.Status.COMPLETED, TransactionNF1.Status.CANCELLED]:
         logger.warning(f"Invalid status '{new_status}' passed by user {user.name}")
         return JsonResponse({"error": "Invalid status"}, status=400)
 
     try:
-        txn = Transaction.objects.get(
+        txn = TransactionNF1.objects.get(
             id=txn_id,
             reservedBy=user,
-            status=Transaction.Status.ON_HOLD
+            status=TransactionNF1.Status.ON_HOLD
         )
 
-        txn.status = new_status
-        txn.save()
+        TransactionNF1.objects.filter(pk=txn.pk).update(status=new_status)
         logger.info(f"Transaction {txn.queueNumber} updated to {new_status} by user {user.name}")
 
-        updated_count = TransactionNF1.objects.filter(queueNumber=txn.queueNumber).update(status=new_status)
-
-        if updated_count == 0:
-            logger.warning(f"No matching NF1 transaction for queueNumber {txn.queueNumber}")
-        else:
-            logger.debug(f"NF1 transaction {txn.queueNumber} updated to {new_status}")
+        mirror_update(txn.pk, status=new_status)
+        events.publish(events.COMPLETE if new_status == TransactionNF1.Status.COMPLETED else events.CANCEL, campus=txn.campus)
 
         return JsonResponse({"success": True})
 
-    except Transaction.DoesNotExist:
+    except TransactionNF1.DoesNotExist:
         logger.warning(f"Transaction with ID {txn_id} not found or not owned by user {user.name}")
         return JsonResponse({"error": "Not found"}, status=404)
 
@@ -916,6 +798,8 @@ def admin_dashboard(request):
                 'online_count': online_count,
                 'non_verified': non_verified,
                 'verified': verified,
+                'email_accounts': outbox.account_health(),
+                'email_outbox': outbox.outbox_counts(),
             },
             request=request 
         )
@@ -956,6 +840,8 @@ def admin_dashboard_summary(request):
                 'online_count': online_count,
                 'non_verified': non_verified,
                 'verified': verified,
+                'email_accounts': outbox.account_health(),
+                'email_outbox': outbox.outbox_counts(),
             },
             request=request 
         )
@@ -1017,7 +903,7 @@ def admin_queue_settings(request):
             cutoff_date = cutoff_time_ph.date()
             txn_filters = {
                 "status__in": ["on_queue", "on_hold"],
-                "created_at__date": cutoff_date
+                **on_day('created_at', cutoff_date),
             }
             txn_nf1_filters = txn_filters.copy()
             if campus:
@@ -1026,17 +912,17 @@ def admin_queue_settings(request):
             updated_nf1 = TransactionNF1.objects.filter(**txn_nf1_filters).update(
                 status=TransactionNF1.Status.CUT_OFF
             )
+            if updated_nf1:
+                rollups.mark_dirty(cutoff_date)  # A back-dated cutoff can change a closed day
 
-            legacy_txns = Transaction.objects.filter(**txn_filters)
-            if campus:
-                legacy_txns = legacy_txns.filter(
-                    Q(student__campus=campus) |
-                    Q(new_enrollee__campus=campus) |
-                    Q(guest__campus=campus)
-                )
-            updated_legacy = legacy_txns.update(status=Transaction.Status.CUT_OFF)
+            if mirror_enabled():
+                legacy_txns = Transaction.objects.filter(**txn_filters)
+                if campus:
+                    legacy_txns = legacy_txns.filter(campus=campus)
+                updated_legacy = legacy_txns.update(status=Transaction.Status.CUT_OFF)
 
             logger.info(f"Applied immediate cutoff -> NF1: {updated_nf1}, Legacy: {updated_legacy}")
+            events.publish(events.CUT_OFF, campus=campus)
 
             message = (
                 f"✅ Cutoff applied for <strong>{campus or 'All Campuses'}</strong> at "
@@ -1160,11 +1046,10 @@ def reject_cashier(request, cashier_id):
         cashier = get_object_or_404(User, id=cashier_id, verified=False)
         
         # Send rejection email before deletion
-        send_mail(
-            subject="Verification Rejected",
-            message=f"Dear {cashier.name},\n\nWe regret to inform you that your cashier account has been rejected by the admin.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[cashier.email],
+        send_rolling_email(
+            "Verification Rejected",
+            f"Dear {cashier.name},\n\nWe regret to inform you that your cashier account has been rejected by the admin.",
+            [cashier.email],
         )
         cashier.delete()
         messages.success(request, f"{cashier.name} has been rejected and deleted.")
@@ -1179,51 +1064,23 @@ def cashier_transactions_view(request, cashier_id):
         return render(request, 'unauthorized.html', {"message": "Admin access required."})
     
 
-    from_date = parse_date(request.GET.get("start_date", ""))
-    to_date = parse_date(request.GET.get("end_date", ""))
-    department_id = request.GET.get("department")
-    course_id = request.GET.get("course")
-    campus = request.GET.get("campus")
-
-    transactions = TransactionNF1.objects.filter(reservedBy_id=cashier_id)
-
-    if from_date:
-        transactions = transactions.filter(created_at__date__gte=from_date)
-    if to_date:
-        transactions = transactions.filter(created_at__date__lte=to_date)
-    if department_id:
-        transactions = transactions.filter(course__department_id=department_id)
-    if course_id:
-        transactions = transactions.filter(course_id=course_id)
-    if campus:
-        transactions = transactions.filter(campus=campus)
-
-    # Optimize query
-    transactions = transactions.select_related("student", "guest", "new_enrollee", "course__department")
-
-    # Build results list manually with role and dynamic ID
-    results = []
-    for txn in transactions:
-        requester = txn.get_requester()
-        role = type(requester).__name__ if requester else "Unknown"
-        results.append({
-            "id_number": getattr(requester, 'studentId', getattr(requester, 'qrId', 'N/A')),
-            "name": getattr(requester, 'name', str(requester)),
-            "role": role,
-            "queue": txn.queueNumber,
-        })
-
-    # Paginate the results
-    paginator = Paginator(results, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cashier = get_object_or_404(User, pk=cashier_id)
+    transactions, _, _ = reports.cashier_transactions(
+        _report_params(request, REPORT_PARAMS, cashier_id=cashier_id)
+    )
 
+    # Keyset pagination: only the requested page is read and hydrated
+    try:
+        page = keyset.paginate(transactions, request.GET.get("cursor"), per_page=10)
+    except keyset.InvalidCursor:
+        page = keyset.paginate(transactions, per_page=10)
+    page.items = [reports.requester_row(txn) for txn in page.items]
 
     currect_user = User.objects.filter(id=user_id).first()
     context = {
         "user": currect_user,
-        "cashier": get_object_or_404(User, pk=cashier_id),
-        "transactions": page_obj,
+        "cashier": cashier,
+        "transactions": page,
         "departments": Department.objects.all(),
         "courses": Course.objects.all(),
         "campuses": [c[0] for c in CAMPUS_CHOICES],
@@ -1320,12 +1177,20 @@ def update_priority_requests(request):
     return redirect('student_list')
 
 
+STUDENT_TRANSACTIONS_PER_PAGE = 20
+
+
 def student_transactions_ajax(request, student_id):
     student = get_object_or_404(Student, id=student_id)
 
-    transactions = Transaction.objects.filter(
-        student=student
-    ).order_by("-created_at")
+    try:
+        page = keyset.paginate(
+            TransactionNF1.objects.filter(student=student),
+            request.GET.get("cursor"),
+            per_page=STUDENT_TRANSACTIONS_PER_PAGE,
+        )
+    except keyset.InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
 
     txn_data = [
         {
@@ -1333,35 +1198,38 @@ def student_transactions_ajax(request, student_id):
             "type": txn.transactionType,
             "status": txn.get_status_display(),  # Better: human-readable
             "priority": txn.priority,
-            "created": txn.created_at.strftime("%Y-%m-%d %H:%M"),
+            "created": localtime(txn.created_at).strftime("%Y-%m-%d %H:%M"),
         }
-        for txn in transactions
+        for txn in page.items
     ]
 
     return JsonResponse({
         "transactions": txn_data,
-        "student_name": student.name
+        "student_name": student.name,
+        "next_cursor": page.next_cursor,
     })
 
 
 
 def kpi_data(request):
+    return JsonResponse(stats_cache.memoize("kpi_data", {}, _kpi_data_payload))
+
+
+def _kpi_data_payload():
     # Convert to Manila local time
     today = localtime(now()).date()
     start_date = today - timedelta(days=6)
 
-    # Transactions on queue today
-    on_queue_today = TransactionNF1.objects.filter(
-        created_at__date=today,
-        status=TransactionNF1.Status.ON_QUEUE
-    ).count()
-
-    # Status counts for today
-    status_counts = (
-        TransactionNF1.objects
-        .filter(created_at__date=today)
-        .values('status')
-        .annotate(count=Count('id'))
+    # Status counts and queue breakdown for today in one aggregate
+    today_qs = TransactionNF1.objects.filter(**on_day('created_at', today))
+    status_counts = today_qs.values('status').annotate(count=Count('id')).order_by()
+
+    on_queue = Q(status=TransactionNF1.Status.ON_QUEUE)
+    breakdown = today_qs.aggregate(
+        on_queue_today=Count('id', filter=on_queue),
+        students=Count('id', filter=on_queue & Q(student_id__isnull=False)),
+        new_enrollees=Count('id', filter=on_queue & Q(new_enrollee_id__isnull=False)),
+        guests=Count('id', filter=on_queue & Q(guest_id__isnull=False)),
     )
 
     tracked_statuses = [
@@ -1370,94 +1238,45 @@ def kpi_data(request):
         TransactionNF1.Status.CUT_OFF,
     ]
 
-    # 7-day status breakdown
-    raw_counts = (
-        TransactionNF1.objects
-        .filter(
-            created_at__date__range=(start_date, today),
-            status__in=tracked_statuses
-        )
-        .annotate(day=TruncDate('created_at'))
-        .values('day', 'status')
-        .annotate(count=Count('id'))
-    )
+    # 7-day status breakdown (closed days come from the rollups)
+    day_range = [start_date + timedelta(days=i) for i in range(7)]
+    raw_counts = grouped_counts({}, 'day', 'status', days=day_range, status__in=tracked_statuses)
 
     # Daily data structuring
-    day_range = [start_date + timedelta(days=i) for i in range(7)]
     trend_data = {status: [] for status in tracked_statuses}
+    series = {status: [] for status in tracked_statuses}
 
     for status in tracked_statuses:
         daily_counts = {entry['day']: entry['count'] for entry in raw_counts if entry['status'] == status}
         for day in day_range:
-            trend_data[status].append({
-                'date': day.isoformat(),
-                'count': daily_counts.get(day, 0)
-            })
+            count = daily_counts.get(day, 0)
+            trend_data[status].append({'date': day.isoformat(), 'count': count})
+            series[status].append(count)
 
-    # Linear regression forecast
-    forecast = {}
-    for status in tracked_statuses:
-        y = np.array([point['count'] for point in trend_data[status]])
-        X = np.array(range(7)).reshape(-1, 1)
-        model = LinearRegression().fit(X, y)
-        pred = int(model.predict(np.array([[7]])).round()[0])
-        forecast[status] = pred
-
-    # Queue breakdown
-    queued_today = TransactionNF1.objects.filter(
-        created_at__date=today,
-        status=TransactionNF1.Status.ON_QUEUE
-    )
-    student_count = queued_today.filter(student_id__isnull=False).count()
-    new_enrollee_count = queued_today.filter(new_enrollee_id__isnull=False).count()
-    guest_count = queued_today.filter(guest_id__isnull=False).count()
+    # Linear trend forecast, all statuses fitted at once (NumPy loads on first use)
+    from .forecasting import trend_forecast
+    forecast = trend_forecast(series, day_range)
 
-    return JsonResponse({
-        'on_queue_today': on_queue_today,
+    return {
+        'on_queue_today': breakdown['on_queue_today'],
         'status_counts': list(status_counts),
         'transaction_trends': trend_data,
         'forecast': forecast,
         'queue_breakdown': {
-            'students': student_count,
-            'new_enrollees': new_enrollee_count,
-            'guests': guest_count
+            'students': breakdown['students'],
+            'new_enrollees': breakdown['new_enrollees'],
+            'guests': breakdown['guests'],
         }
-    })
+    }
 
 
 def kpi_summary(request):
-    manila_now = localtime(now())  # Converts UTC to Asia/Manila automatically using TIME_ZONE
-    today = manila_now.date()
-    yesterday = today - timedelta(days=1)
-
-    verified_cashiers = User.objects.filter(verified=True)
-
-    results = []
-    for cashier in verified_cashiers:
-        today_count = TransactionNF1.objects.filter(
-            reservedBy=cashier,
-            status=TransactionNF1.Status.COMPLETED,
-            created_at__date=today
-        ).count()
-
-        yesterday_count = TransactionNF1.objects.filter(
-            reservedBy=cashier,
-            status=TransactionNF1.Status.COMPLETED,
-            created_at__date=yesterday
-        ).count()
-
-        delta = today_count - yesterday_count
-        trend = "up" if delta > 0 else ("down" if delta < 0 else "equal")
-
-        results.append({
-            "cashier_name": cashier.name,
-            "today": today_count,
-            "yesterday": yesterday_count,
-            "delta": abs(delta),
-            "trend": trend
-        })
+    return JsonResponse(stats_cache.memoize("kpi_summary", {}, _kpi_summary_payload))
 
-    return JsonResponse({"data": results})
+
+def _kpi_summary_payload():
+    # Today/yesterday completions and service KPIs for every window in one query
+    return {"data": cashier_kpis()}
 
 
 '''
@@ -1487,811 +1306,211 @@ def admin_statistics(request):
     return render(request, "admin/partials/statistics.html", context)
 
 
-# Modify This
-def get_date_range(time_filter):
-    today = localdate()  # Asia/Manila local date
-
-    if time_filter == "last_7_days":
-        return [today - timedelta(days=i) for i in reversed(range(7))]
-
-    elif time_filter == "this_month":
-        start = today.replace(day=1)
-        return [start + timedelta(days=i) for i in range((today - start).days + 1)]
-
-    elif time_filter == "monthly":
-        year_start = today.replace(month=1, day=1)
-        return [year_start.replace(month=m) for m in range(1, today.month + 1)]
-
-    elif time_filter == "today":
-        return [today]
-
-    elif time_filter == "weekly":
-        start_of_week = today - timedelta(days=today.weekday())  # Monday as start
-        return [start_of_week + timedelta(days=i) for i in range((today - start_of_week).days + 1)]
-
-    else:
-        return []
-
-
-
-def statistics_data(request):
-
+def _admin_required(request):
+    """Redirect/unauthorized response for non-admin sessions, else None."""
     user_id = request.session.get('user_id')
     if not user_id:
         return redirect('login')
     
     if not request.session.get('is_admin', False):
         return render(request, 'unauthorized.html', {"message": "Admin access required."})
-    
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-
-    transactions = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        created_at__date__in=date_range
-    )
+    return None
 
-    # Apply filters
-    if campus:
-        transactions = transactions.filter(campus__iexact=campus)
-    if course:
-        transactions = transactions.filter(course__id=course)
-    if department:
-        transactions = transactions.filter(course__department__id=department)
-    if year:
-        transactions = transactions.filter(student__year_level=year)
-    if txn_for:
-        transactions = transactions.filter(transaction_for=txn_for)
-
-    # Grouping data
-    results = {str(date): {} for date in date_range}
-    for date in date_range:
-        day_txns = transactions.filter(created_at__date=date)
-        for campus_name in day_txns.values_list("campus", flat=True).distinct():
-            count = day_txns.filter(campus=campus_name).count()
-            results[str(date)][campus_name] = count
-
-    all_campuses = sorted({camp for day in results.values() for camp in day})
-    datasets = []
-
-    for campus_name in all_campuses:
-        data = [results[str(d)].get(campus_name, 0) for d in date_range]
-        datasets.append({
-            "label": campus_name,
-            "data": data
-        })
 
-    return JsonResponse({
-        "labels": [str(d) for d in date_range],
-        "datasets": datasets
-    })
+def statistics_data(request):
+    denied = _admin_required(request)
+    if denied:
+        return denied
 
+    return JsonResponse(charts.cached_chart("statistics", filters_from_request(request)))
 
-def transaction_type_chart_data(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"labels": [], "datasets": []})
-
-    start_date = date_range[0]
-
-    queryset = TransactionNF1.objects.filter(
-        status__iexact="completed",
-        created_at__date__gte=start_date
-    )
 
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # === Manual Count by transactionType ===
-    counts = defaultdict(int)
-    for txn in queryset:
-        txn_type = txn.transactionType.strip().title() if txn.transactionType else "Unknown"
-        counts[txn_type] += 1
-
-    # Sort descending by count
-    sorted_items = sorted(counts.items(), key=lambda x: x[1], reverse=True)
-    labels = [k for k, v in sorted_items]
-    data = [v for k, v in sorted_items]
+def statistics_batch(request):
+    """
+    All requested charts in one response, computed from one shared aggregation.
+    Takes the usual filters plus `charts` (comma separated chart ids, default: all).
+    """
+    denied = _admin_required(request)
+    if denied:
+        return denied
 
-    return JsonResponse({
-        "labels": labels,
-        "datasets": [{
-            "label": "Completed Transactions",
-            "data": data,
-            "backgroundColor": "rgba(75, 192, 192, 0.7)"
-        }]
-    })
+    requested = request.GET.get("charts")
+    chart_ids = [c.strip() for c in requested.split(",") if c.strip()] if requested else list(charts.CHARTS)
 
+    unknown = [c for c in chart_ids if c not in charts.CHARTS]
+    if unknown:
+        return JsonResponse({"error": f"Unknown chart ids: {', '.join(unknown)}"}, status=400)
 
-def status_donut_chart_data(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"labels": [], "datasets": []})
-
-    start_date = date_range[0]
-
-    queryset = TransactionNF1.objects.filter(created_at__date__gte=start_date)
-
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # Count each status
-    counts = defaultdict(int)
-    for txn in queryset:
-        status = txn.status.lower()
-        counts[status] += 1
-
-    if not counts:
-        return JsonResponse({"labels": [], "data": []})
-
-    # Format labels like "Completed: 35 (52%)"
-    total = sum(counts.values())
-    labels = []
-    data = []
-    for k, v in counts.items():
-        label = f"{k.replace('_', ' ').title()}: {v} ({(v/total)*100:.2f}%)"
-        labels.append(label)
-        data.append(v)
+    return JsonResponse(charts.build_charts(filters_from_request(request), chart_ids))
 
-    return JsonResponse({
-        "labels": labels,
-        "datasets": [{
-            "data": data,
-            "backgroundColor": generate_status_colors(len(data))
-        }]
-    })
 
+def statistics_cache_stats(request):
+    """Hit/miss counters of the statistics cache."""
+    denied = _admin_required(request)
+    if denied:
+        return denied
 
-def generate_status_colors(n):
-    base = ['#36A2EB', '#FF6384', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40']
-    return [base[i % len(base)] for i in range(n)]
+    return JsonResponse(stats_cache.counters(list(charts.CHARTS) + ["kpi_data", "kpi_summary"]))
 
 
-def status_by_department_chart_data(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"labels": [], "datasets": []})
-
-    start_date = date_range[0]
-
-    queryset = TransactionNF1.objects.filter(
-        created_at__date__gte=start_date,
-        status__in=["completed", "cancelled", "cut_off"]
-    )
+def transaction_type_chart_data(request):
+    return JsonResponse(charts.cached_chart("transaction_types", filters_from_request(request)))
 
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # Group counts by department and status
-    data = defaultdict(lambda: {"Completed": 0, "Cancelled": 0, "Cut Off": 0})
-
-    for txn in queryset.select_related("course__department"):
-        dept = txn.course.department.name if txn.course and txn.course.department else "Unknown"
-        status = txn.status.replace("_", " ").title()
-        data[dept][status] += 1
-
-    # Convert to Chart.js format
-    labels = sorted(data.keys())
-    status_keys = ["Completed", "Cancelled", "Cut Off"]
-    datasets = []
-
-    color_map = {
-        "Completed": "#4dc9f6",
-        "Cancelled": "#f67019",
-        "Cut Off": "#f53794"
-    }
 
-    for status in status_keys:
-        datasets.append({
-            "label": status,
-            "data": [data[dept].get(status, 0) for dept in labels],
-            "backgroundColor": color_map[status]
-        })
+def status_donut_chart_data(request):
+    return JsonResponse(charts.cached_chart("status_donut", filters_from_request(request)))
 
-    return JsonResponse({
-        "labels": labels,
-        "datasets": datasets
-    })
 
+def status_by_department_chart_data(request):
+    return JsonResponse(charts.cached_chart("status_by_department", filters_from_request(request)))
 
-def heatmap_chart_data(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"series": [], "categories": []})
-
-    queryset = TransactionNF1.objects.filter(created_at__date__in=date_range)
-
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # X-axis: Dates | Y-axis: Transaction Types
-    date_labels = [str(d) for d in date_range]
-    type_set = set()
-    counts = defaultdict(int)
-
-    for txn in queryset:
-        tx_type = txn.transactionType.strip().title() if txn.transactionType else "Unknown"
-        date_key = txn.created_at.date()
-        type_set.add(tx_type)
-        counts[(tx_type, date_key)] += 1
-
-    # Build ApexCharts series
-    type_list = sorted(type_set)
-    series = []
-
-    for tx_type in type_list:
-        data = []
-        for date in date_range:
-            data.append({
-                "x": str(date),
-                "y": counts.get((tx_type, date), 0)
-            })
-        series.append({
-            "name": tx_type,
-            "data": data
-        })
 
-    return JsonResponse({
-        "series": series,
-        "categories": date_labels
-    })
+def heatmap_chart_data(request):
+    return JsonResponse(charts.cached_chart("heatmap_time", filters_from_request(request)))
 
 
 def hourly_heatmap_chart_data(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"series": [], "categories": []})
-
-    queryset = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        created_at__date__in=date_range
-    )
+    return JsonResponse(charts.cached_chart("heatmap_hourly", filters_from_request(request)))
 
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # Grouping by hour (Y) and date (X)
-    counts = defaultdict(int)
-    dates = [str(d) for d in date_range]
-    hours = [f"{h:02}:00" for h in range(24)]  # 00:00 to 23:00
-
-    for txn in queryset:
-        local_dt = txn.created_at.astimezone()  # Ensure local time
-        hour_label = f"{local_dt.hour:02}:00"
-        date_label = str(local_dt.date())
-        counts[(hour_label, date_label)] += 1
-
-    # Build ApexCharts-compatible data structure
-    series = []
-    for hour in hours:
-        data = []
-        for date in dates:
-            data.append({
-                "x": date,
-                "y": counts.get((hour, date), 0)
-            })
-        series.append({
-            "name": hour,
-            "data": data
-        })
 
-    return JsonResponse({
-        "series": series,
-        "categories": dates
-    })
-
-from datetime import date, timedelta
-
-# modify this also
 def forecast_chart_data(request):
-    today = localdate()  # Asia/Manila local date
-    current_time = now()  # timezone-aware datetime
-
-    time_filter = request.GET.get("time", "last_7_days")
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"labels": [], "series": []})
-
-    # Step 1: Filter base queryset
-    queryset = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        created_at__date__in=date_range
-    )
-
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-
-    # Step 2: Aggregate daily counts
-    daily_counts = defaultdict(int)
-    for txn in queryset:
-        txn_date = txn.created_at.astimezone().date()  # Use local date
-        daily_counts[txn_date] += 1
-
-    # Step 3: Calculate average hourly pattern for forecasting
-    hour_totals = defaultdict(int)
-    day_set = set()
-
-    for txn in queryset:
-        local_dt = txn.created_at.astimezone()
-        hour = local_dt.hour
-        txn_date = local_dt.date()
-        hour_totals[hour] += 1
-        day_set.add(txn_date)
-
-    total_days = len(day_set) or 1
-    avg_by_hour = {h: hour_totals[h] / total_days for h in range(24)}
-
-    # Step 4: Prepare labels and values (replace today's date with "Today")
-    labels = []
-    values = []
-
-    for d in date_range:
-        label = "Today" if d == today else str(d)
-        labels.append(label)
-        values.append(daily_counts.get(d, 0))
-
-    # Step 5: Today’s actual + projected value
-    today_actual_qs = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        created_at__date=today
-    )
-    if campus:
-        today_actual_qs = today_actual_qs.filter(campus__iexact=campus)
-    if course:
-        today_actual_qs = today_actual_qs.filter(course__id=course)
-    if department:
-        today_actual_qs = today_actual_qs.filter(course__department__id=department)
-
-    today_actual = today_actual_qs.count()
-    current_hour = current_time.hour
-
-    projected_remaining = sum(avg_by_hour.get(h, 0) for h in range(current_hour + 1, 18))
-    projected_today = today_actual + projected_remaining
-
-    # Update or append today's forecasted value
-    if "Today" in labels:
-        idx = labels.index("Today")
-        values[idx] = round(projected_today)
-    else:
-        labels.append("Today")
-        values.append(round(projected_today))
-
-    # Step 6: Forecast for tomorrow
-    # Step 6: Forecast for next period (day/week/month)
-    next_label = None
-    next_forecast = 0
-
-    if time_filter in ["last_7_days", "today", "weekly"]:
-        # Next day (Tomorrow)
-        next_date = today + timedelta(days=1)
-        next_label = "Tomorrow"
-        next_forecast = sum(avg_by_hour.get(h, 0) for h in range(6, 18))
-
-    elif time_filter == "this_month":
-        # Next month (if exists)
-        next_month = today.month + 1 if today.month < 12 else 1
-        next_year = today.year if today.month < 12 else today.year + 1
-        next_label = f"{date(next_year, next_month, 1):%B}"
-        # Rough estimate: average daily * typical number of working days (22)
-        avg_daily = sum(values) / len(values) if values else 0
-        next_forecast = round(avg_daily * 22)
-
-    elif time_filter == "monthly":
-        # Next year forecast
-        next_label = str(today.year + 1)
-        avg_monthly = sum(values) / len(values) if values else 0
-        next_forecast = round(avg_monthly * 12)
-
-    else:
-        # Default: Tomorrow
-        next_label = "Tomorrow"
-        next_forecast = sum(avg_by_hour.get(h, 0) for h in range(6, 18))
+    return JsonResponse(charts.cached_chart("forecast", filters_from_request(request)))
 
-    labels.append(next_label)
-    values.append(round(next_forecast))
-
-
-    return JsonResponse({
-        "labels": labels,
-        "series": values,
-        "actual_today": today_actual
-    })
-
-
-from django.db.models import F, ExpressionWrapper, DurationField, Avg
-from django.db.models.functions import Now
 
 def average_processing_time_view(request):
-    # Filters (same as others)
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    if not date_range:
-        return JsonResponse({"average_minutes": 0})
-
-    queryset = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        created_at__date__in=date_range
-    )
-
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    queryset = queryset.annotate(
-        processing_time=ExpressionWrapper(F('updated_at') - F('created_at'), output_field=DurationField())
-    )
-
-    avg_duration = queryset.aggregate(avg=Avg('processing_time'))['avg']
-
-    if avg_duration:
-        avg_minutes = round(avg_duration.total_seconds() / 60, 2)
-    else:
-        avg_minutes = 0
-
-    return JsonResponse({"average_minutes": avg_minutes})
-
+    return JsonResponse(charts.cached_chart("avg_processing_time", filters_from_request(request)))
 
-TRANSACTION_FOR_CHOICES = [
-    ('enrollment', 'Enrollment'),
-    ('sem_1', 'Sem 1'),
-    ('sem_2', 'Sem 2'),
-    ('summer', 'Summer'),
-    ('off_term', 'Off Term'),
-]
 
 def sem_transaction_type_grouped_chart(request):
-    valid_sems = ["sem_1", "sem_2", "summer"]
-    valid_tx_types = ["P1", "P2", "P3"]
-
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    date_range = get_date_range(time_filter)
-    queryset = TransactionNF1.objects.filter(
-        status=TransactionNF1.Status.COMPLETED,
-        transaction_for__in=valid_sems,
-        transactionType__in=valid_tx_types,
-        created_at__date__in=date_range
-    )
-
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-
-    grouped = defaultdict(lambda: defaultdict(int))  # sem -> tx_type -> count
-
-    for txn in queryset:
-        sem = dict(TRANSACTION_FOR_CHOICES).get(txn.transaction_for, txn.transaction_for)
-        tx_type = txn.transactionType.upper()
-        grouped[sem][tx_type] += 1
-
-    # dynamically get valid sems display names from TRANSACTION_FOR_CHOICES
-    sems = [label for key, label in TRANSACTION_FOR_CHOICES if key in valid_sems]
-    tx_types = valid_tx_types
-
-    series = []
-    for sem in sems:
-        data = [grouped[sem].get(tx_type, 0) for tx_type in tx_types]
-        series.append({"name": sem, "data": data})
-
-    return JsonResponse({
-        "categories": tx_types,
-        "series": series
-    })
-
-
-from collections import Counter
+    return JsonResponse(charts.cached_chart("sem_tx_grouped", filters_from_request(request)))
 
 
 def priority_breakdown_view(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    # Handle date range safely using local timezone
-    today = localdate()
-    if time_filter == "last_7_days":
-        start_date = today - timedelta(days=6)
-    elif time_filter == "this_month":
-        start_date = today.replace(day=1)
-    elif time_filter == "today":
-        start_date = today
-    else:
+    payload = charts.cached_chart("priority_breakdown", filters_from_request(request))
+    if payload is None:
         return JsonResponse({ "error": "Invalid time filter" }, status=400)
+    return JsonResponse(payload)
+
 
-    # Query: only completed transactions
-    queryset = TransactionNF1.objects.filter(
-        status__iexact="completed",
-        created_at__date__gte=start_date
+def generate_transaction_pdf(request):
+    denied = _admin_required(request)
+    if denied:
+        return denied
+
+    job = reports.enqueue(
+        "transaction_report",
+        _report_params(request, ["campus", "department", "course", "year", "transaction_for", "time"]),
+        requested_by=get_current_user(request),
     )
+    return redirect("report_job", job_id=job.pk)
 
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    # Count priority vs non-priority
-    priority_list = [bool(txn.priority) for txn in queryset]
-    counts = Counter(priority_list)
-
-    values = [counts.get(False, 0), counts.get(True, 0)]
-    total = sum(values)
-    percentages = [(v / total * 100 if total else 0) for v in values]
 
-    return JsonResponse({
-        "time_filter": time_filter.replace("_", " ").title(),
-        "department": department,
-        "course": course,
-        "campus": campus,
-        "non_priority": {
-            "count": values[0],
-            "percentage": round(percentages[0], 2)
-        },
-        "priority": {
-            "count": values[1],
-            "percentage": round(percentages[1], 2)
-        }
-    })
+@require_GET
+def transactions_export(request):
+    denied = _admin_required(request)
+    if denied:
+        return denied
 
+    export_format = request.GET.get("format", "csv")
+    if export_format not in exports.FORMATS:
+        return JsonResponse({"error": f"Unknown format: {export_format}"}, status=400)
+    if export_format != "csv" and not exports.pyarrow_available():
+        return JsonResponse({"error": f"{export_format} export requires pyarrow"}, status=400)
 
-from xhtml2pdf import pisa
-from io import BytesIO
+    try:
+        queryset = exports.export_queryset(
+            filters_from_request(request),
+            request.GET.get("start_date"),
+            request.GET.get("end_date"),
+        )
+    except exports.ExportError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
+    content_type, extension = exports.FORMATS[export_format]
+    filename = f"transactions-{localdate():%Y%m%d}.{extension}"
 
-def generate_transaction_pdf(request):
-    campus = request.GET.get("campus")
-    department = request.GET.get("department")
-    course = request.GET.get("course")
-    year = request.GET.get("year")
-    txn_for = request.GET.get("transaction_for")
-    time_filter = request.GET.get("time", "last_7_days")
-
-    # Use timezone-aware local date
-    today = localdate()
-    if time_filter == "last_7_days":
-        start_date = today - timedelta(days=6)
-    elif time_filter == "this_month":
-        start_date = today.replace(day=1)
-    elif time_filter == "today":
-        start_date = today
-    else:
-        start_date = today - timedelta(days=6)
+    if export_format == "parquet":
+        return FileResponse(exports.write_parquet(queryset), content_type=content_type, as_attachment=True, filename=filename)
 
-    queryset = TransactionNF1.objects.filter(created_at__date__gte=start_date)
+    stream = exports.stream_csv(queryset) if export_format == "csv" else exports.stream_arrow(queryset)
+    if isinstance(request, ASGIRequest):
+        stream = exports.astream(stream)  # Otherwise buffered whole before the first byte
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
-    department_obj = None
-    course_obj = None
 
-    # Apply filters
-    if campus:
-        queryset = queryset.filter(campus__iexact=campus)
-    if course:
-        queryset = queryset.filter(course__id=course)
-        try:
-            course_obj = Course.objects.get(id=course)
-        except Course.DoesNotExist:
-            pass
-    if department:
-        queryset = queryset.filter(course__department__id=department)
-        try:
-            department_obj = Department.objects.get(id=department)
-        except Department.DoesNotExist:
-            pass
-    if year:
-        queryset = queryset.filter(student__year_level=year)
-    if txn_for:
-        queryset = queryset.filter(transaction_for=txn_for)
-
-    queryset = queryset.order_by('created_at')
-
-    html_string = render_to_string("admin/partials/transaction_report.html", {
-        "transactions": queryset,
-        "time_filter": time_filter.replace("_", " ").title(),
-        "generated_at": now(),  # timezone-aware timestamp
-        "campus": campus,
-        "department": department_obj,
-        "course": course_obj,
-    })
+def cashier_transactions_pdf_view(request, cashier_id):
+    denied = _admin_required(request)
+    if denied:
+        return denied
+
+    get_object_or_404(User, pk=cashier_id)
+    job = reports.enqueue(
+        "cashier_transactions",
+        _report_params(request, REPORT_PARAMS, cashier_id=cashier_id),
+        requested_by=get_current_user(request),
+    )
+    return redirect("report_job", job_id=job.pk)
 
-    result = BytesIO()
-    pdf_status = pisa.CreatePDF(src=html_string, dest=result)
 
-    if pdf_status.err:
-        return HttpResponse("Error rendering PDF", status=500)
+def _report_job_for(request, job_id):
+    """The job if this session may see it: the requester, or any admin."""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return None
+    job = ReportJob.objects.filter(pk=job_id).first()
+    if job and (job.requested_by_id == user_id or request.session.get('is_admin', False)):
+        return job
+    return None
 
-    return HttpResponse(result.getvalue(), content_type='application/pdf')
 
-from django.template.loader import get_template
+def _report_job_status(job):
+    return {
+        "id": str(job.pk),
+        "status": job.status,
+        "processed": job.processed,
+        "total": job.total,
+        "percent": job.percent,
+        "error": job.error,
+        "download_url": reverse("report_job_download", args=[job.pk]) if job.status == ReportJob.Status.DONE else None,
+    }
 
 
-def cashier_transactions_pdf_view(request, cashier_id):
-    from_date = parse_date(request.GET.get("start_date", ""))
-    to_date = parse_date(request.GET.get("end_date", ""))
-    department_id = request.GET.get("department")
-    course_id = request.GET.get("course")
-    campus = request.GET.get("campus")
-
-    department_name = Department.objects.filter(pk=department_id).first().name if department_id else "All"
-    course_name = Course.objects.filter(pk=course_id).first().name if course_id else "All"
-    campus_name = campus if campus else "All"
-
-    transactions = TransactionNF1.objects.filter(reservedBy_id=cashier_id)
-    if from_date:
-        transactions = transactions.filter(created_at__date__gte=from_date)
-    if to_date:
-        transactions = transactions.filter(created_at__date__lte=to_date)
-    if department_id:
-        transactions = transactions.filter(course__department_id=department_id)
-    if course_id:
-        transactions = transactions.filter(course_id=course_id)
-    if campus:
-        transactions = transactions.filter(campus=campus)
-
-    transactions = transactions.select_related("student", "guest", "new_enrollee", "course__department")
-
-    results = []
-    for txn in transactions:
-        requester = txn.get_requester()
-        role = type(requester).__name__ if requester else "Unknown"
-        results.append({
-            "id_number": getattr(requester, 'studentId', getattr(requester, 'qrId', 'N/A')),
-            "name": getattr(requester, 'name', str(requester)),
-            "role": role,
-            "queue": txn.queueNumber,
-        })
+def report_job(request, job_id):
+    job = _report_job_for(request, job_id)
+    if not job:
+        return redirect("login")
+    return render(request, "reports/report_job.html", {
+        "job": job,
+        "status_url": reverse("report_job_status", args=[job.pk]),
+    })
 
-    context = {
-        "cashier": get_object_or_404(User, pk=cashier_id),
-        "transactions": results,
-        "filters": {
-            "start_date": from_date.strftime("%Y-%m-%d") if from_date else "All",
-            "end_date": to_date.strftime("%Y-%m-%d") if to_date else "All",
-            "department": department_name,
-            "course": course_name,
-            "campus": campus_name,
-        }
-    }
 
-    template = get_template("admin/partials/transactions_pdf.html")
-    html = template.render(context)
-    response = HttpResponse(content_type="application/pdf")
-    pdf_status = pisa.CreatePDF(html, dest=response)
+@require_GET
+def report_job_status(request, job_id):
+    reports.recover_stale()
+    job = _report_job_for(request, job_id)
+    if not job:
+        return JsonResponse({"error": "Report not found"}, status=404)
+    return JsonResponse(_report_job_status(job))
 
-    if pdf_status.err:
-        return HttpResponse("Failed to generate PDF", status=500)
 
-    return response
+@require_GET
+def report_job_download(request, job_id):
+    job = _report_job_for(request, job_id)
+    if not job:
+        return JsonResponse({"error": "Report not found"}, status=404)
+    if job.status != ReportJob.Status.DONE or not job.file:
+        return JsonResponse(_report_job_status(job), status=409)
+
+    report = reports.REPORTS[job.kind]
+    return FileResponse(
+        job.file.open("rb"),
+        content_type="application/pdf",
+        as_attachment=report.get('attachment', False),
+        filename=report['filename'],
+    )
 
 
 